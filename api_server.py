@@ -0,0 +1,159 @@
+import os
+import math
+import asyncio
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+import market_data
+import bars
+import ttl_cache
+import telemetry
+from financial_engine import FinancialEngine
+
+
+class SingleFlight:
+    """Coalesces concurrent identical computations: one runs, every waiter shares its result."""
+
+    def __init__(self):
+        self._inflight = {}
+        self.stats = {"started": 0, "coalesced": 0}
+
+    async def run(self, key, func, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(None, func, *args)
+            self._inflight[key] = future
+            # Drop the key when the work finishes, even if every waiter has disconnected
+            future.add_done_callback(lambda f, k=key: self._inflight.pop(k, None) if self._inflight.get(k) is f else None)
+            self.stats["started"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        # shield: a cancelled client must not cancel the computation other waiters share
+        return await asyncio.shield(future)
+
+    @property
+    def in_flight(self):
+        return len(self._inflight)
+
+
+flights = SingleFlight()
+
+
+def _table_records(table):
+    """DataFrame -> JSON-safe list of dicts."""
+    records = []
+    for row in table.to_dict(orient="records"):
+        clean = {}
+        for k, v in row.items():
+            if hasattr(v, "isoformat"):
+                v = v.isoformat() if v == v else None  # NaT != NaT
+            elif isinstance(v, float) and not math.isfinite(v):
+                v = None
+            clean[k] = v
+        records.append(clean)
+    return records
+
+
+def _error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+def _tickers_param(request):
+    raw = request.query_params.get("tickers", "")
+    return [t.strip().upper() for t in raw.replace(" ", ",").split(",") if t.strip()]
+
+
+async def analyze(request):
+    """GET /analyze?q=<free text>[&interval=1d|1h|5m|1m...][&profile=cprofile|sample]  (single-ticker or comparison, depending on what resolves)."""
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return _error("Missing query parameter 'q'.")
+    interval = request.query_params.get("interval", "1d")
+    if interval not in bars.INTERVALS:
+        return _error(f"interval must be one of {', '.join(bars.INTERVALS)}.")
+    tickers = FinancialEngine.resolve_tickers(query)
+    if not tickers:
+        return _error("No valid ticker found in query.", status=404)
+
+    tickers = sorted(tickers)
+    mode = request.query_params.get("profile")
+    if mode:
+        # Profiled runs are never coalesced, so the report covers exactly this request
+        if mode not in ("cprofile", "sample"):
+            return _error("profile must be 'cprofile' or 'sample'.")
+        result, report = await asyncio.get_running_loop().run_in_executor(None, _profiled, mode, tickers, interval)
+        return JSONResponse({**result.to_dict(), "profile": report})
+
+    key = ("analyze", tuple(tickers), interval, market_data.trading_day())
+    # Canonical query so coalesced callers get an identical result
+    result = await flights.run(key, FinancialEngine.run_for_tickers, tickers, " ".join(tickers), None, interval)
+    return JSONResponse(result.to_dict())
+
+
+def _profiled(mode, tickers, interval="1d"):
+    with telemetry.profile(mode) as prof:
+        result = FinancialEngine.run_for_tickers(tickers, " ".join(tickers), interval=interval)
+    return result, prof.report
+
+
+async def compare(request):
+    """GET /compare?tickers=AAPL,MSFT,NVDA[&interval=1h]"""
+    tickers = sorted(set(_tickers_param(request)))
+    if len(tickers) < 2:
+        return _error("Comparison needs at least two tickers.")
+    interval = request.query_params.get("interval", "1d")
+    if interval not in bars.INTERVALS:
+        return _error(f"interval must be one of {', '.join(bars.INTERVALS)}.")
+    key = ("compare", tuple(tickers), interval, market_data.trading_day())
+    result = await flights.run(key, FinancialEngine.run_comparison_pipeline, tickers, " ".join(tickers), interval)
+    return JSONResponse(result.to_dict())
+
+
+async def screen(request):
+    """GET /screen?tickers=...&period=1y  or  POST /screen {"tickers": [...], "period": "1y"}"""
+    if request.method == "POST":
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error("Body must be JSON.")
+        if not isinstance(body, dict):
+            return _error('Body must be a JSON object like {"tickers": ["AAPL"], "period": "1y"}.')
+        tickers, period = body.get("tickers", []), body.get("period", "1y")
+        if not isinstance(tickers, list) or not all(isinstance(t, str) for t in tickers):
+            return _error("'tickers' must be a list of strings.")
+        if not isinstance(period, str):
+            return _error("'period' must be a string such as '1y'.")
+    else:
+        tickers, period = _tickers_param(request), request.query_params.get("period", "1y")
+    tickers = sorted(set(t.upper() for t in tickers))
+    if not tickers:
+        return _error("Provide at least one ticker.")
+    key = ("screen", tuple(tickers), period, market_data.trading_day())
+    table = await flights.run(key, FinancialEngine.run_screener, tickers, period)
+    return JSONResponse({"period": period, "count": len(table), "results": _table_records(table)})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "in_flight": flights.in_flight, **flights.stats, "caches": ttl_cache.all_stats()})
+
+
+async def metrics(request):
+    """GET /metrics: Prometheus text; ?format=json for the same counters as a dict."""
+    if request.query_params.get("format") == "json":
+        return JSONResponse(telemetry.metrics())
+    return PlainTextResponse(telemetry.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+app = Starlette(routes=[
+    Route("/health", health),
+    Route("/metrics", metrics),
+    Route("/analyze", analyze),
+    Route("/compare", compare),
+    Route("/screen", screen, methods=["GET", "POST"]),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.environ.get("QUANT_API_HOST", "127.0.0.1"), port=int(os.environ.get("QUANT_API_PORT", 8000)))
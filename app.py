@@ -1,10 +1,34 @@
 import streamlit as st
 import os
 import re
-import matplotlib.pyplot as plt
 import datetime
-from financial_engine import run_deterministic_analysis, SharedState
-from report_generator import generate_pdf_report
+import pandas as pd
+from financial_engine import run_deterministic_analysis
+from report_generator import generate_result_report
+import market_data
+import telemetry
+
+# Reports kept per session (compact references only) and analyses cached across sessions
+HISTORY_LIMIT = 8
+ANALYSIS_CACHE_ENTRIES = 64
+
+@st.cache_resource(max_entries=ANALYSIS_CACHE_ENTRIES, show_spinner=False)
+def cached_analysis(query, trading_day):
+    """One shared, immutable AnalysisResult per (query, trading day); a new day recomputes."""
+    return run_deterministic_analysis(query)
+
+@st.cache_resource(max_entries=ANALYSIS_CACHE_ENTRIES, show_spinner=False)
+def cached_report(query, trading_day):
+    return generate_result_report(cached_analysis(query, trading_day))
+
+def remember(query, trading_day, result):
+    """Moves query to the front of this session's history, evicting the oldest beyond HISTORY_LIMIT."""
+    history = [h for h in st.session_state.get("history", []) if h["q"] != query]
+    history.append({"q": query, "day": trading_day, "tickers": tuple(result.tickers)})
+    st.session_state.history = history[-HISTORY_LIMIT:]
+
+def replay(query):
+    st.session_state.active = query
 
 # Page configuration
 st.set_page_config(
@@ -68,6 +92,8 @@ with st.sidebar:
     
     st.divider()
     edu_mode = st.toggle("Learner Mode", value=False)
+    show_timings = st.toggle("Stage Timings", value=False)
+    profile_run = st.toggle("Profile Next Run", value=False, help="Samples every thread's stack during the run")
     if st.button("System Reset"):
         st.session_state.clear()
         st.rerun()
@@ -92,127 +118,156 @@ if analyze_btn:
     if not query:
         st.warning("Please enter a ticker or query.")
     else:
-        with st.spinner("QUANT ENGINE EXECUTING..."):
-            try:
-                raw_result = run_deterministic_analysis(query)
+        st.session_state.active = query.strip()
+
+# The report on screen: the last query run or the history entry clicked; reruns replay it from the cache
+active = st.session_state.get("active")
+if active:
+    with st.spinner("QUANT ENGINE EXECUTING..."):
+        try:
+            day = market_data.trading_day()
+            prof = None
+            if profile_run and analyze_btn:
+                # Profiled runs bypass the cache so the report covers a real computation
+                with telemetry.profile("sample") as prof:
+                    result = run_deterministic_analysis(active)
+            else:
+                result = cached_analysis(active, day)
+            remember(active, day, result)
+            raw_result = result.response
+            
+            # Report Export Utilities
+            if result.fundamentals:
+                pdf_bytes = cached_report(active, day) if prof is None else generate_result_report(result)
+                st.download_button(
+                    "📥 DOWNLOAD ANALYST REPORT (PDF)",
+                    data=pdf_bytes,
+                    file_name=f"Quant_Report_{datetime.datetime.now().strftime('%Y%m%d')}.pdf",
+                    mime="application/pdf",
+                    width="stretch"
+                )
+            
+            res_col, viz_col = st.columns([2, 3], gap="large")
+            
+            with res_col:
+                st.markdown("### 📊 Engine Insights")
                 
-                # Report Export Utilities
-                if SharedState.latest_fundamentals:
-                    pdf_bytes = generate_pdf_report(
-                        SharedState.latest_tickers[0] if SharedState.latest_tickers else "REPORT",
-                        raw_result, 
-                        SharedState.latest_signals, 
-                        SharedState.latest_fundamentals
-                    )
-                    st.download_button(
-                        "📥 DOWNLOAD ANALYST REPORT (PDF)",
-                        data=pdf_bytes,
-                        file_name=f"Quant_Report_{datetime.datetime.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf",
-                        width="stretch"
-                    )
+                # 1. Technical Signals / Alerts
+                if result.signals:
+                    st.markdown("**Active Signals**")
+                    for sig in result.signals:
+                        color = "#00ff88" if sig['type'] == "BULLISH" else ("#ff3366" if sig['type'] == "BEARISH" else "#ffcc00")
+                        st.markdown(f"""<div style='border-left: 3px solid {color}; padding: 10px; background: rgba(255,255,255,0.02); margin-bottom: 5px;'>
+                            <span style='color: {color}; font-weight: bold;'>{sig['label']}</span><br>
+                            <span style='font-size: 0.85rem; color: #888;'>{sig['desc']}</span>
+                        </div>""", unsafe_allow_html=True)
                 
-                res_col, viz_col = st.columns([2, 3], gap="large")
+                # 2. Fundamentals Metrics Grid
+                if result.fundamentals:
+                    st.markdown("<br>**Valuation & Fundamentals**", unsafe_allow_html=True)
+                    f_col1, f_col2 = st.columns(2)
+                    f = result.fundamentals
+                    def fmt_val(val):
+                        if isinstance(val, (int, float)):
+                            if val > 1e12: return f"${val/1e12:.1f}T"
+                            if val > 1e9: return f"${val/1e9:.1f}B"
+                            return f"{val:.2f}"
+                        return str(val)
+
+                    with f_col1:
+                        st.markdown(f"""<div class='metric-card'>
+                            <p style='color: #888; font-size: 0.8rem; margin:0;'>P/E Ratio</p>
+                            <h3 style='margin: 0;'>{fmt_val(f.get('P/E Ratio'))}</h3>
+                        </div>""", unsafe_allow_html=True)
+                        st.markdown(f"""<div class='metric-card'>
+                            <p style='color: #888; font-size: 0.8rem; margin:0;'>Market Cap</p>
+                            <h3 style='margin: 0;'>{fmt_val(f.get('Market Cap'))}</h3>
+                        </div>""", unsafe_allow_html=True)
+                    with f_col2:
+                        st.markdown(f"""<div class='metric-card'>
+                            <p style='color: #888; font-size: 0.8rem; margin:0;'>PEG Ratio</p>
+                            <h3 style='margin: 0;'>{fmt_val(f.get('PEG Ratio'))}</h3>
+                        </div>""", unsafe_allow_html=True)
+                        st.markdown(f"""<div class='metric-card'>
+                            <p style='color: #888; font-size: 0.8rem; margin:0;'>Fair Value</p>
+                            <h3 style='margin: 0; color: #ffcc00;'>{fmt_val(f.get('Fair Value'))}</h3>
+                        </div>""", unsafe_allow_html=True)
+
+                # 3. Whale Tracking (New Phase 3)
+                if result.whale_data and result.whale_data.get('holders'):
+                    with st.expander("🐋 Institutional Whale Tracking"):
+                        st.markdown("**Top Institutional Holders**")
+                        for h in result.whale_data['holders'][:3]:
+                            st.markdown(f"- {h.get('Holder', 'Unknown')}: {h.get('Ownership', 'N/A')} ownership")
+                        
+                        if result.whale_data.get('insiders'):
+                            st.markdown("<br>**Recent Insider Moves**", unsafe_allow_html=True)
+                            for i in result.whale_data['insiders'][:2]:
+                                st.markdown(f"- {i.get('Text', 'Trade detected')}")
+
+                # 4. Text Result Area
+                st.markdown("<br>", unsafe_allow_html=True)
+                # Startup Grade Badge
+                st.markdown("""
+                    <div style='background: rgba(0, 209, 255, 0.1); border: 1px solid #00d1ff; border-radius: 4px; padding: 4px 10px; display: inline-block; margin-bottom: 10px;'>
+                        <span style='color: #00d1ff; font-size: 0.65rem; font-weight: bold;'>STARTUP GRADE | 100% RELIABLE</span>
+                    </div>
+                """, unsafe_allow_html=True)
                 
-                with res_col:
-                    st.markdown("### 📊 Engine Insights")
-                    
-                    # 1. Technical Signals / Alerts
-                    if SharedState.latest_signals:
-                        st.markdown("**Active Signals**")
-                        for sig in SharedState.latest_signals:
-                            color = "#00ff88" if sig['type'] == "BULLISH" else ("#ff3366" if sig['type'] == "BEARISH" else "#ffcc00")
-                            st.markdown(f"""<div style='border-left: 3px solid {color}; padding: 10px; background: rgba(255,255,255,0.02); margin-bottom: 5px;'>
-                                <span style='color: {color}; font-weight: bold;'>{sig['label']}</span><br>
-                                <span style='font-size: 0.85rem; color: #888;'>{sig['desc']}</span>
-                            </div>""", unsafe_allow_html=True)
-                    
-                    # 2. Fundamentals Metrics Grid
-                    if SharedState.latest_fundamentals:
-                        st.markdown("<br>**Valuation & Fundamentals**", unsafe_allow_html=True)
-                        f_col1, f_col2 = st.columns(2)
-                        f = SharedState.latest_fundamentals
-                        def fmt_val(val):
-                            if isinstance(val, (int, float)):
-                                if val > 1e12: return f"${val/1e12:.1f}T"
-                                if val > 1e9: return f"${val/1e9:.1f}B"
-                                return f"{val:.2f}"
-                            return str(val)
-
-                        with f_col1:
-                            st.markdown(f"""<div class='metric-card'>
-                                <p style='color: #888; font-size: 0.8rem; margin:0;'>P/E Ratio</p>
-                                <h3 style='margin: 0;'>{fmt_val(f.get('P/E Ratio'))}</h3>
-                            </div>""", unsafe_allow_html=True)
-                            st.markdown(f"""<div class='metric-card'>
-                                <p style='color: #888; font-size: 0.8rem; margin:0;'>Market Cap</p>
-                                <h3 style='margin: 0;'>{fmt_val(f.get('Market Cap'))}</h3>
-                            </div>""", unsafe_allow_html=True)
-                        with f_col2:
-                            st.markdown(f"""<div class='metric-card'>
-                                <p style='color: #888; font-size: 0.8rem; margin:0;'>PEG Ratio</p>
-                                <h3 style='margin: 0;'>{fmt_val(f.get('PEG Ratio'))}</h3>
-                            </div>""", unsafe_allow_html=True)
-                            st.markdown(f"""<div class='metric-card'>
-                                <p style='color: #888; font-size: 0.8rem; margin:0;'>Fair Value</p>
-                                <h3 style='margin: 0; color: #ffcc00;'>{fmt_val(f.get('Fair Value'))}</h3>
-                            </div>""", unsafe_allow_html=True)
-
-                    # 3. Whale Tracking (New Phase 3)
-                    if SharedState.latest_whale_data and SharedState.latest_whale_data.get('holders'):
-                        with st.expander("🐋 Institutional Whale Tracking"):
-                            st.markdown("**Top Institutional Holders**")
-                            for h in SharedState.latest_whale_data['holders'][:3]:
-                                st.markdown(f"- {h.get('Holder', 'Unknown')}: {h.get('Ownership', 'N/A')} ownership")
-                            
-                            if SharedState.latest_whale_data.get('insiders'):
-                                st.markdown("<br>**Recent Insider Moves**", unsafe_allow_html=True)
-                                for i in SharedState.latest_whale_data['insiders'][:2]:
-                                    st.markdown(f"- {i.get('Text', 'Trade detected')}")
-
-                    # 4. Text Result Area
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    # Startup Grade Badge
-                    st.markdown("""
-                        <div style='background: rgba(0, 209, 255, 0.1); border: 1px solid #00d1ff; border-radius: 4px; padding: 4px 10px; display: inline-block; margin-bottom: 10px;'>
-                            <span style='color: #00d1ff; font-size: 0.65rem; font-weight: bold;'>STARTUP GRADE | 100% RELIABLE</span>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    with st.container(border=True):
-                        st.markdown(raw_result)
-
-                with viz_col:
-                    st.markdown("### 📈 Technical Forecast")
-                    if SharedState.latest_fig:
-                        st.plotly_chart(SharedState.latest_fig, width="stretch", config={'displayModeBar': False})
-                    
-                    # 5. Correlation Heatmap (New Phase 2)
-                    if SharedState.latest_corr_fig:
-                        st.markdown("### 🧬 Portfolio Correlation")
-                        st.plotly_chart(SharedState.latest_corr_fig, width="stretch")
-                    
+                with st.container(border=True):
+                    st.markdown(raw_result)
+
+                # 5. Where the time went (per-stage spans of this request)
+                if show_timings and result.timings:
+                    with st.expander("⏱️ Stage Timings", expanded=True):
+                        timings = pd.Series(dict(result.timings), name="ms") * 1000
+                        st.dataframe(timings.sort_values(ascending=False).round(1), width="stretch")
+                        if prof is not None:
+                            st.code(prof.report, language=None)
+
+            with viz_col:
+                st.markdown("### 📈 Technical Forecast")
+                if result.fig:
+                    st.plotly_chart(result.fig.figure(), width="stretch", config={'displayModeBar': False})
                     if edu_mode:
-                        with st.expander("🔍 How to read the charts"):
-                            st.markdown("""
-                            - **SMA 50/200:** The average price over 50 or 200 days. When the price stays above these, it's generally healthy.
-                            - **Bollinger Bands (Blue Shade):** Shows price volatility. If the price hits the edges, it might be 'over-extended'.
-                            - **RSI (Green/Red Graph):** Measures momentum. Above 70 is 'Expensive' (Red line), Below 30 is 'Cheap' (Green line).
-                            - **Random Forest Trend:** A machine learning model that looks at past patterns to guess the next 30 days.
-                            """)
+                        cs = result.fig.stats()
+                        st.caption(f"Chart: {cs['points']:,} points · built in {cs['build_ms']:.0f} ms · {cs['payload_bytes']/1024:.0f} KB")
+                
+                # 5. Correlation Heatmap (New Phase 2)
+                if result.corr_fig:
+                    st.markdown("### 🧬 Portfolio Correlation")
+                    st.plotly_chart(result.corr_fig.figure(), width="stretch")
+                
+                if result.risk:
+                    st.markdown("### 🛡️ Risk Breakdown")
+                    st.dataframe(pd.DataFrame({t: dict(m) for t, m in result.risk["assets"].items()}).T, width="stretch")
+                    if edu_mode:
+                        st.caption("VaR/CVaR are 1-day losses at 95% confidence. Risk Contribution is each stock's share of the equal-weight portfolio's variance.")
+                
+                if edu_mode:
+                    with st.expander("🔍 How to read the charts"):
+                        st.markdown("""
+                        - **SMA 50/200:** The average price over 50 or 200 days. When the price stays above these, it's generally healthy.
+                        - **Bollinger Bands (Blue Shade):** Shows price volatility. If the price hits the edges, it might be 'over-extended'.
+                        - **RSI (Green/Red Graph):** Measures momentum. Above 70 is 'Expensive' (Red line), Below 30 is 'Cheap' (Green line).
+                        - **Random Forest Trend:** A machine learning model that looks at past patterns to guess the next 30 days.
+                        """)
 
-                if 'history' not in st.session_state: st.session_state.history = []
-                st.session_state.history.append({"q": query, "r": raw_result, "f": SharedState.latest_fig})
 
-            except Exception as e:
-                st.error(f"ENGINE ERROR: {str(e)}")
+        except Exception as e:
+            st.error(f"ENGINE ERROR: {str(e)}")
 
 # Bottom Tray
-if 'history' in st.session_state and st.session_state.history:
+history = st.session_state.get("history", [])
+if history:
     st.markdown("### 🕒 Recent Reports")
-    h_cols = st.columns(min(len(st.session_state.history), 4))
-    for i, item in enumerate(reversed(st.session_state.history[-4:])):
-        with h_cols[i]:
-            st.button(f"{item['q'][:15]}...", key=f"hist_{i}")
+    recent = history[::-1]
+    for row in range(0, len(recent), 4):
+        h_cols = st.columns(4)
+        for i, item in enumerate(recent[row:row + 4]):
+            with h_cols[i]:
+                label = item["q"] if len(item["q"]) <= 18 else f"{item['q'][:15]}..."
+                st.button(label, key=f"hist_{row + i}", on_click=replay, args=(item["q"],),
+                          help=f"{item['q']} ({', '.join(item['tickers']) or 'no ticker'})", width="stretch")
 
 st.markdown("<br><br><p style='text-align: center; color: #444; font-size: 0.8rem;'>QUANT-DETERMINISTIC v3.1 | EXPERT & LEARNER PLATFORM</p>", unsafe_allow_html=True)
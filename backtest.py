@@ -0,0 +1,162 @@
+import os
+import sys
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import bars
+import market_data
+import indicators
+import screener
+
+# Forward horizons (bars) evaluated after every signal; drawdown uses the longest
+HORIZONS = (5, 20, 60)
+# Expected direction of each rule type: warnings (overbought) expect a pullback
+DIRECTIONS = {"BULLISH": 1.0, "BEARISH": -1.0, "WARNING": -1.0}
+
+DEFAULT_GRID = {
+    "sma_fast": [20, 50],
+    "sma_slow": [100, 200],
+    "rsi_window": [14],
+    "overbought": [70.0, 80.0],
+    "oversold": [20.0, 30.0],
+}
+
+
+def horizon_label(horizon, interval="1d"):
+    """Column suffix for a horizon in bars: "20d" on daily bars, "20x5m" intraday."""
+    return f"{horizon}d" if interval == "1d" else f"{horizon}x{bars.check_interval(interval)}"
+
+
+def forward_returns(aligned, horizon):
+    """close[t + horizon] / close[t] - 1 per column (NaN past the last bar)."""
+    out = np.full(aligned.shape, np.nan)
+    if horizon < len(aligned):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:-horizon] = aligned[horizon:] / aligned[:-horizon] - 1.0
+    return out
+
+
+def adverse_excursion(aligned, rows, cols, horizon, direction):
+    """Worst move against the signal within the next `horizon` bars, per event (negative = loss).
+
+    For bullish signals that is the lowest close relative to the entry; for bearish ones the
+    highest close (a short's loss). Gathered as an events x horizon block, no per-bar loop.
+    """
+    if not len(rows):
+        return np.empty(0)
+    path_rows = rows[:, None] + np.arange(1, horizon + 1)
+    inside = path_rows < len(aligned)
+    path = aligned[np.minimum(path_rows, len(aligned) - 1), cols[:, None]]
+    path = np.where(inside, path, np.nan)
+    entry = aligned[rows, cols][:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moves = direction * (path / entry - 1.0)
+    # fmin skips NaNs (and stays NaN for an all-NaN path) without warnings
+    return np.minimum(np.fmin.reduce(moves, axis=1), 0.0)
+
+
+def backtest_matrix(closes, sma_fast=50, sma_slow=200, rsi_window=14, overbought=70.0, oversold=30.0,
+                    horizons=HORIZONS, entries_only=True, interval="1d"):
+    """Historical performance of every SIGNAL_RULES rule over a dates x tickers close matrix.
+
+    Rules are evaluated on every bar with indicators.signal_masks (the same masks scan_signals
+    uses for the last bar), each ticker on its own calendar. entries_only counts a state rule
+    such as RSI > 70 once per run instead of on every bar it stays true. Horizons count bars of
+    interval, which names the columns (see horizon_label). Returns one row per rule.
+    """
+    aligned, n_bars, _ = screener._right_align(closes)
+    ind = indicators.compute_indicators(aligned, sma_fast=sma_fast, sma_slow=sma_slow, rsi_window=rsi_window)
+    masks = indicators.signal_masks(ind["sma_fast"], ind["sma_slow"], ind["rsi"], overbought, oversold)
+
+    # Same minimum history as scan_signals: a full slow window of bars behind the signal
+    bar_number = np.arange(len(aligned))[:, None] - (len(aligned) - n_bars)[None, :] + 1
+    enough = bar_number >= sma_slow
+    fwd = {h: forward_returns(aligned, h) for h in horizons}
+    longest = max(horizons)
+    span = {h: horizon_label(h, interval) for h in horizons}
+
+    rows = []
+    for rule in indicators.SIGNAL_RULES:
+        mask = masks[rule["key"]] & enough
+        if entries_only:
+            mask[1:] &= ~mask[:-1]
+        direction = DIRECTIONS[rule["type"]]
+        ev_rows, ev_cols = np.nonzero(mask)
+        row = {"Rule": rule["label"], "Type": rule["type"], "Signals": len(ev_rows),
+               "Tickers": int(len(np.unique(ev_cols)))}
+        for h in horizons:
+            r = fwd[h][ev_rows, ev_cols]
+            r = r[np.isfinite(r)]
+            row[f"Fwd {span[h]}"] = float(r.mean()) if len(r) else np.nan
+            row[f"Hit {span[h]}"] = float((direction * r > 0).mean()) if len(r) else np.nan
+        dd = adverse_excursion(aligned, ev_rows, ev_cols, longest, direction)
+        dd = dd[np.isfinite(dd)]
+        row[f"Avg Drawdown {span[longest]}"] = float(dd.mean()) if len(dd) else np.nan
+        row[f"Worst Drawdown {span[longest]}"] = float(dd.min()) if len(dd) else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def backtest_universe(tickers, period="10y", interval="1d", **params):
+    """backtest_matrix on one batched close-matrix fetch (bars of interval) for a watchlist."""
+    closes = market_data.get_close_matrix(list(dict.fromkeys(t.upper() for t in tickers)), period, interval)
+    return backtest_matrix(closes, interval=interval, **params)
+
+
+def parameter_grid(**choices):
+    """Cartesian product of parameter choices (DEFAULT_GRID for anything not given) as a list of dicts."""
+    grid = {**DEFAULT_GRID, **choices}
+    combos = (dict(zip(grid, values)) for values in itertools.product(*grid.values()))
+    return [params for params in combos if params["sma_fast"] < params["sma_slow"]]
+
+
+_worker_closes = None
+_worker_interval = "1d"
+
+
+def _init_worker(closes, interval="1d"):
+    # Each worker receives the close matrix once, not once per parameter set
+    global _worker_closes, _worker_interval
+    _worker_closes, _worker_interval = closes, interval
+
+
+def _run_params(params):
+    table = backtest_matrix(_worker_closes, interval=_worker_interval, **params)
+    for key, value in reversed(list(params.items())):
+        table.insert(0, key, value)
+    return table
+
+
+def sweep(closes, grid=None, processes=None, interval="1d"):
+    """Runs backtest_matrix for every parameter set in grid across a process pool.
+
+    Returns one table (parameters + rule metrics), best hit rate at the longest horizon first.
+    """
+    grid = grid if grid is not None else parameter_grid()
+    if not grid:
+        return pd.DataFrame()
+    workers = min(processes or os.cpu_count() or 1, len(grid))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(closes, interval)) as pool:
+        tables = list(pool.map(_run_params, grid))
+    result = pd.concat(tables, ignore_index=True)
+    hit = f"Hit {horizon_label(max(HORIZONS), interval)}"
+    return result.sort_values(["Rule", hit], ascending=[True, False], na_position="last").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python backtest.py <watchlist.txt> [period] [--sweep] [--interval 5m]")
+        sys.exit(1)
+    argv = sys.argv[2:]
+    interval = "1d"
+    if "--interval" in argv:
+        at = argv.index("--interval")
+        interval, argv = argv[at + 1], argv[:at] + argv[at + 2:]
+    args = [a for a in argv if not a.startswith("--")]
+    closes = market_data.get_close_matrix(screener.load_watchlist(sys.argv[1]),
+                                          args[0] if args else ("10y" if interval == "1d" else bars.default_period(interval)),
+                                          interval)
+    table = sweep(closes, interval=interval) if "--sweep" in sys.argv else backtest_matrix(closes, interval=interval)
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        print(table.to_string(index=False))
@@ -0,0 +1,289 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Bar length in seconds for every supported interval
+INTERVALS = {"1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "1d": 86400}
+DAY = INTERVALS["1d"]
+
+# Intraday resolutions fetched from upstream, with how far back (days) yfinance serves them.
+# Every other intraday interval is resampled from one of these.
+BASE_INTERVALS = (("1m", 7), ("5m", 60), ("1h", 730))
+
+# Default lookback per interval when the caller gives no period
+DEFAULT_PERIODS = {"1m": "5d", "2m": "5d", "5m": "1mo", "15m": "1mo", "30m": "1mo", "1h": "6mo", "1d": "1y"}
+
+# In-memory bar store budget and how long fetched bars are trusted before asking upstream again
+MAX_STORE_BYTES = int(os.environ.get("QUANT_BAR_STORE_BYTES", 512 * 1024 * 1024))
+STORE_MAX_AGE = int(os.environ.get("QUANT_BAR_STORE_MAX_AGE", 60))
+
+
+def check_interval(interval):
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval '{interval}'. Available: {', '.join(INTERVALS)}")
+    return interval
+
+
+def default_period(interval):
+    return DEFAULT_PERIODS[check_interval(interval)]
+
+
+def _seconds(when):
+    return pd.Timestamp(when).value // 1_000_000_000
+
+
+class Bars:
+    """OHLCV bars as compact typed arrays: int64 epoch seconds, float32 prices, int64 volume.
+
+    Timestamps are wall-clock times as delivered (tz-naive), sorted ascending. 32 bytes per bar,
+    so a year of minute bars (~98k) for one ticker is about 3 MB.
+    """
+
+    __slots__ = ("ticker", "interval", "ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self, ticker, interval, ts, open, high, low, close, volume):
+        self.ticker = ticker
+        self.interval = interval
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float32)
+        self.high = np.asarray(high, dtype=np.float32)
+        self.low = np.asarray(low, dtype=np.float32)
+        self.close = np.asarray(close, dtype=np.float32)
+        self.volume = np.asarray(volume, dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df, ticker, interval):
+        """From a Date-indexed OHLCV frame (market_data.normalize_ohlcv output); rows missing a price are dropped."""
+        if df is None or df.empty:
+            return cls.empty(ticker, interval)
+        prices = df[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64)
+        keep = np.isfinite(prices).all(axis=1)
+        volume = df["Volume"].to_numpy(dtype=np.float64) if "Volume" in df.columns else np.zeros(len(df))
+        ts = pd.DatetimeIndex(df.index).as_unit("s").asi8
+        order = np.argsort(ts[keep], kind="stable")
+        return cls(ticker, interval, ts[keep][order], *(prices[keep][order].T),
+                   np.nan_to_num(volume[keep][order]).astype(np.int64))
+
+    @classmethod
+    def empty(cls, ticker, interval):
+        return cls(ticker, interval, [], [], [], [], [], [])
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ("ts", "open", "high", "low", "close", "volume"))
+
+    def index(self):
+        return pd.DatetimeIndex(pd.to_datetime(self.ts, unit="s"), name="Date")
+
+    def to_frame(self):
+        """Date-indexed OHLCV frame (float64 prices) for the analysis code."""
+        return pd.DataFrame({
+            "Open": self.open.astype(np.float64),
+            "High": self.high.astype(np.float64),
+            "Low": self.low.astype(np.float64),
+            "Close": self.close.astype(np.float64),
+            "Volume": self.volume,
+        }, index=self.index())
+
+    def slice(self, start=None, end=None):
+        """Bars with start <= timestamp < end (Timestamps or anything pd.Timestamp accepts)."""
+        lo = 0 if start is None else np.searchsorted(self.ts, _seconds(start))
+        hi = len(self.ts) if end is None else np.searchsorted(self.ts, _seconds(end))
+        return Bars(self.ticker, self.interval, *(getattr(self, n)[lo:hi] for n in
+                                                  ("ts", "open", "high", "low", "close", "volume")))
+
+
+def resample(bars, interval):
+    """Coarser bars from finer ones with one reduceat pass per field.
+
+    Intraday buckets are anchored at each session's first bar, so hourly bars built from
+    a 9:30 open cover 9:30-10:30 like the ones yfinance serves; daily bars are labelled at midnight.
+    """
+    step, src = INTERVALS[check_interval(interval)], INTERVALS[bars.interval]
+    if step % src:
+        raise ValueError(f"Cannot build {interval} bars from {bars.interval} bars")
+    if step == src or not len(bars):
+        return bars if step == src else Bars.empty(bars.ticker, interval)
+
+    ts = bars.ts
+    day = ts // DAY
+    if step >= DAY:
+        key = day
+        label = day * DAY
+    else:
+        day_starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        first = np.repeat(ts[day_starts], np.diff(np.r_[day_starts, len(ts)]))
+        slot = (ts - first) // step
+        key = day * (DAY // step + 1) + slot
+        label = first + slot * step
+
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(ts)]
+    return Bars(
+        bars.ticker, interval, label[starts],
+        bars.open[starts],
+        np.maximum.reduceat(bars.high, starts),
+        np.minimum.reduceat(bars.low, starts),
+        bars.close[ends - 1],
+        np.add.reduceat(bars.volume, starts),
+    )
+
+
+def base_interval(interval, start, now=None):
+    """Finest upstream resolution that divides interval and still reaches back to start."""
+    check_interval(interval)
+    if interval == "1d":
+        return "1d"
+    now = pd.Timestamp(now or pd.Timestamp.now())
+    lookback = (now - pd.Timestamp(start)).days
+    for base, max_days in BASE_INTERVALS:
+        if INTERVALS[interval] % INTERVALS[base] == 0 and lookback <= max_days:
+            return base
+    raise ValueError(f"{interval} bars are only available for the last "
+                     f"{max(d for b, d in BASE_INTERVALS if INTERVALS[interval] % INTERVALS[b] == 0)} days")
+
+
+_calendar = None
+
+
+def trading_calendar():
+    """CustomBusinessDay over NYSE full-day holidays (built once; pandas holiday rules)."""
+    global _calendar
+    if _calendar is None:
+        from pandas.tseries.holiday import (
+            AbstractHolidayCalendar, Holiday, nearest_workday, sunday_to_monday, USMartinLutherKingJr,
+            USPresidentsDay, GoodFriday, USMemorialDay, USLaborDay, USThanksgivingDay,
+        )
+
+        class NYSEHolidayCalendar(AbstractHolidayCalendar):
+            rules = [
+                Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+                USMartinLutherKingJr, USPresidentsDay, GoodFriday, USMemorialDay,
+                Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+                Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+                USLaborDay, USThanksgivingDay,
+                Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+            ]
+
+        _calendar = pd.offsets.CustomBusinessDay(calendar=NYSEHolidayCalendar())
+    return _calendar
+
+
+def future_timestamps(dates, n, interval="1d"):
+    """The next n bar timestamps after the last of dates, on the history's own calendar.
+
+    A history with weekend bars (crypto) continues every calendar day; anything else skips
+    weekends and NYSE holidays. Intraday bars step by the interval inside the session window
+    seen in the history and roll over to the next trading day's open.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if not len(dates) or n <= 0:
+        return pd.DatetimeIndex([], name="Date")
+    last = dates[-1]
+    next_day = pd.offsets.Day(1) if (dates.dayofweek >= 5).any() else trading_calendar()
+    if check_interval(interval) == "1d":
+        return pd.DatetimeIndex([last.normalize() + next_day * i for i in range(1, n + 1)], name="Date")
+
+    step = pd.Timedelta(seconds=INTERVALS[interval])
+    time_of_day = dates - dates.normalize()
+    session_open, session_last = time_of_day.min(), time_of_day.max()
+    day, slot = last.normalize(), (last - last.normalize()) + step
+    out = []
+    while len(out) < n:
+        if slot > session_last:
+            day, slot = day + next_day, session_open
+        out.append(day + slot)
+        slot += step
+    return pd.DatetimeIndex(out, name="Date")
+
+
+class BarStore:
+    """Process-wide intraday bars in compact form, fetched once per base resolution.
+
+    Coarser intervals are resampled from a stored finer base (5m and 15m from the same 1m
+    fetch, say) and memoized. Bases are refreshed through the provider (incremental when it
+    is a CachedProvider) after max_age seconds; least recently used tickers are dropped once
+    the store exceeds max_bytes.
+    """
+
+    def __init__(self, provider, max_bytes=MAX_STORE_BYTES, max_age=STORE_MAX_AGE, clock=time.time):
+        self.provider = provider  # callable returning the current MarketDataProvider
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+        self._bases = OrderedDict()  # (ticker, base) -> (fetched_at, start, Bars)
+        self._derived = {}           # (ticker, interval, base) -> (source Bars, resampled Bars)
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _stored_base(self, ticker, interval, start, now):
+        """Coarsest stored, fresh base that divides interval and covers start (cheapest to resample)."""
+        best = None
+        for (t, base), (fetched_at, covered, _) in self._bases.items():
+            if t == ticker and INTERVALS[interval] % INTERVALS[base] == 0 and covered <= start \
+                    and now - fetched_at < self.max_age:
+                if best is None or INTERVALS[base] > INTERVALS[best]:
+                    best = base
+        return best
+
+    def get_many(self, tickers, interval, start):
+        """{ticker: Bars} at interval from start onwards; missing bases are fetched in one batch per base."""
+        check_interval(interval)
+        start = pd.Timestamp(start)
+        now = self.clock()
+        plan, to_fetch = {}, {}
+        with self._lock:
+            for t in tickers:
+                base = self._stored_base(t, interval, start, now)
+                if base is None:
+                    base = base_interval(interval, start)
+                    to_fetch.setdefault(base, []).append(t)
+                plan[t] = base
+
+        for base, names in to_fetch.items():
+            frames = self.provider().fetch_many(names, start, interval=base)
+            self.fetches += 1
+            with self._lock:
+                for t in names:
+                    self._bases[(t, base)] = (now, start, Bars.from_frame(frames.get(t), t, base))
+                    self._bases.move_to_end((t, base))
+
+        out = {}
+        with self._lock:
+            for t, base in plan.items():
+                _, _, source = self._bases[(t, base)]
+                self._bases.move_to_end((t, base))
+                if base == interval:
+                    result = source
+                else:
+                    cached = self._derived.get((t, interval, base))
+                    if cached is None or cached[0] is not source:
+                        cached = self._derived[(t, interval, base)] = (source, resample(source, interval))
+                    result = cached[1]
+                out[t] = result.slice(start)
+            self._evict()
+        return out
+
+    def get(self, ticker, interval, start):
+        return self.get_many([ticker], interval, start)[ticker]
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for _, _, b in self._bases.values()) + sum(d.nbytes for _, d in self._derived.values())
+
+    def _evict(self):
+        while len(self._bases) > 1 and self.nbytes > self.max_bytes:
+            (ticker, base), _ = self._bases.popitem(last=False)
+            for key in [k for k in self._derived if k[0] == ticker and k[2] == base]:
+                del self._derived[key]
+
+    def clear(self):
+        with self._lock:
+            self._bases.clear()
+            self._derived.clear()
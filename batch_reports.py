@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import market_data
+import screener
+
+# Reports rendered ahead of the writer: bounds memory to a few PDFs per worker, not the whole batch
+IN_FLIGHT_PER_WORKER = 2
+
+
+def report_name(ticker):
+    """File name inside the ZIP / directory for one ticker's report."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", ticker.upper()) + ".pdf"
+
+
+def render_report(ticker, include_chart=True):
+    """Runs the single-ticker analysis and returns (ticker, pdf_bytes, error).
+
+    Executed inside the worker processes; the matplotlib chart template and the module-level
+    caches are created once per worker and reused for every report it renders.
+    """
+    from financial_engine import FinancialEngine
+    from report_generator import generate_result_report
+    try:
+        result = FinancialEngine.run_for_tickers([ticker], query=ticker)
+        if result.fig is None:
+            return ticker, None, "no price data"
+        return ticker, generate_result_report(result, include_chart=include_chart), None
+    except Exception as e:
+        return ticker, None, str(e)
+
+
+class ZipSink:
+    """Writes each report into one ZIP as it arrives (stored: PDFs and PNGs are already compressed)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+
+    def write(self, name, data):
+        self._zip.writestr(name, data)
+
+    def close(self):
+        self._zip.close()
+
+
+class DirectorySink:
+    """Writes each report to its own file (via a temp file, so readers never see half a PDF)."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name, data):
+        target = os.path.join(self.path, name)
+        with open(target + ".tmp", "wb") as fh:
+            fh.write(data)
+        os.replace(target + ".tmp", target)
+
+    def close(self):
+        pass
+
+
+def open_sink(output):
+    """ZipSink for a *.zip path, DirectorySink otherwise."""
+    return ZipSink(output) if output.lower().endswith(".zip") else DirectorySink(output)
+
+
+def generate_batch(tickers, output, processes=None, include_chart=True, prefetch=True, progress=None):
+    """Renders a report per ticker across a process pool and streams each PDF into output.
+
+    At most IN_FLIGHT_PER_WORKER reports per worker are pending at any time; finished PDFs are
+    written immediately and dropped. Prices for the whole list are fetched first in one batched
+    call, so workers read them from the on-disk cache instead of hitting yfinance one by one.
+    Returns {"written", "failed" (ticker -> error), "seconds", "output"}.
+    """
+    started = time.perf_counter()
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if prefetch and tickers:
+        try:
+            market_data.get_close_matrix(tickers)
+        except Exception:
+            pass  # workers fall back to per-ticker fetches
+
+    workers = max(1, min(processes or os.cpu_count() or 1, len(tickers) or 1))
+    limit = workers * IN_FLIGHT_PER_WORKER
+    sink = open_sink(output)
+    written, failed = 0, {}
+    pending = set()
+    queue = iter(tickers)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                for ticker in queue:
+                    pending.add(pool.submit(render_report, ticker, include_chart))
+                    if len(pending) >= limit:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker, pdf, error = future.result()
+                    if pdf is None:
+                        failed[ticker] = error
+                    else:
+                        sink.write(report_name(ticker), pdf)
+                        written += 1
+                    if progress:
+                        progress(written + len(failed), len(tickers), ticker, error)
+    finally:
+        sink.close()
+    return {"written": written, "failed": failed, "seconds": round(time.perf_counter() - started, 2), "output": output}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python batch_reports.py <watchlist.txt> <reports.zip | directory> [--workers N] [--no-chart]")
+        sys.exit(1)
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+
+    def show(done, total, ticker, error):
+        print(f"[{done}/{total}] {ticker}" + (f" FAILED: {error}" if error else ""))
+
+    summary = generate_batch(screener.load_watchlist(sys.argv[1]), sys.argv[2], processes=workers,
+                             include_chart="--no-chart" not in sys.argv, progress=show)
+    print(f"{summary['written']} reports written to {summary['output']} in {summary['seconds']}s, "
+          f"{len(summary['failed'])} failed")
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import bars
+import market_data
+import rate_limit
+import screener
+
+# Queries submitted ahead of the writer per worker (bounds memory and keeps the pool busy)
+IN_FLIGHT_PER_WORKER = 2
+
+# Requests per second per source for the whole run, split evenly between the workers
+DEFAULT_LIMITS = {"yfinance": 4.0, "ddgs": 1.0}
+
+# AnalysisResult fields written per query (charts are never built)
+RECORD_FIELDS = ("tickers", "signals", "fundamentals", "sentiment", "headlines", "missed_sources", "risk", "timings")
+
+
+def load_queries(path):
+    """One free-text query per line (blank lines and lines starting with '#' skipped, duplicates dropped).
+
+    A '#' inside a query ("Analyze #AAPL") is part of the query.
+    """
+    queries = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                queries.append(line)
+    return list(dict.fromkeys(queries))
+
+
+def run_query(query, forecaster=None, interval="1d", symbol=False):
+    """Runs one query (inside a worker process) and returns its JSONL record; never raises.
+
+    With symbol, query is an exact ticker (V, BRK.B) analysed as is, without free-text resolution.
+    """
+    from financial_engine import FinancialEngine
+    started = time.perf_counter()
+    try:
+        if symbol:
+            result = FinancialEngine.run_for_tickers([query], query=query, forecaster=forecaster, interval=interval)
+        else:
+            result = FinancialEngine.run_analysis(query, forecaster=forecaster, interval=interval)
+        data = result.to_dict(include_charts=False)
+        error = None
+        if not result.tickers:
+            error = "no ticker found"
+        elif symbol and result.fig is None:
+            error = "no price data"
+        elif result.missed_sources:
+            # Partial report (a source timed out or failed): recorded, but retried on resume
+            error = "missed sources: " + ", ".join(result.missed_sources)
+        record = {"query": query, "summary": data["response"], **{k: data[k] for k in RECORD_FIELDS},
+                  "error": error}
+    except Exception as e:
+        record = {"query": query, "error": f"{type(e).__name__}: {e}"}
+    record["seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def completed_queries(path):
+    """Queries with a successful record in an earlier run's output.
+
+    A torn last line (the run was killed mid-write) is cut off so appended records start on
+    a fresh line. Failed queries and partial reports (missed_sources) are not counted, so a
+    resumed run retries them.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as fh:
+        data = fh.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            fh.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("error") is None and not record.get("missed_sources"):
+            done.add(record.get("query"))
+    return done
+
+
+def _init_worker(limits, share):
+    rate_limit.configure(limits, share=share)
+
+
+def _prefetch(queries, interval, symbols=False):
+    """One batched price download for every ticker in the run, so workers read the on-disk cache."""
+    from financial_engine import FinancialEngine
+    if symbols:
+        tickers = list(queries)
+    else:
+        tickers = list(dict.fromkeys(t for q in queries for t in FinancialEngine.resolve_tickers(q)))
+    if tickers:
+        market_data.get_close_matrix(tickers, bars.default_period(interval), interval)
+
+
+def run_batch(queries, output, processes=None, resume=True, limits=None, forecaster=None, interval="1d",
+              prefetch=True, progress=None, symbols=False):
+    """Runs every query across a process pool and appends one JSON line per query to output as it finishes.
+
+    At most IN_FLIGHT_PER_WORKER queries per worker are pending. limits ({source: requests per
+    second}, default DEFAULT_LIMITS) hold for the run as a whole: each worker enforces its share.
+    With symbols, every query is an exact ticker (a watchlist) rather than free text.
+    With resume, queries that already succeeded in output are skipped and new records are
+    appended; otherwise output is overwritten. Records arrive in completion order, each with its
+    "query". Returns {"written", "failed", "skipped", "seconds", "output"}.
+    """
+    started = time.perf_counter()
+    queries = list(dict.fromkeys(queries))
+    done = completed_queries(output) if resume else set()
+    todo = [q for q in queries if q not in done]
+    if prefetch and todo:
+        try:
+            _prefetch(todo, interval, symbols)
+        except Exception:
+            pass  # workers fall back to their own downloads
+
+    workers = max(1, min(processes or os.cpu_count() or 1, len(todo) or 1))
+    limit = workers * IN_FLIGHT_PER_WORKER
+    written, failed = 0, {}
+    pending = set()
+    queue = iter(todo)
+    with open(output, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(DEFAULT_LIMITS if limits is None else limits, workers)) as pool:
+        while True:
+            for query in queue:
+                pending.add(pool.submit(run_query, query, forecaster, interval, symbols))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                if record["error"] is None:
+                    written += 1
+                else:
+                    failed[record["query"]] = record["error"]
+                if progress:
+                    progress(written + len(failed), len(todo), record["query"], record["error"])
+    return {"written": written, "failed": failed, "skipped": len(queries) - len(todo),
+            "seconds": round(time.perf_counter() - started, 2), "output": output}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs a file of queries across a process pool into a JSONL file")
+    parser.add_argument("input", help="queries, one per line (or a watchlist with --tickers)")
+    parser.add_argument("output", help="JSONL results file; an existing one is resumed")
+    parser.add_argument("--tickers", action="store_true", help="input is a watchlist: one single-ticker query per symbol")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--rate", default=",".join(f"{k}={v:g}" for k, v in DEFAULT_LIMITS.items()),
+                        help="requests per second per source for the whole run, e.g. yfinance=4,ddgs=1 (0 = unlimited)")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite output instead of skipping finished queries")
+    parser.add_argument("--interval", default="1d", choices=list(bars.INTERVALS), help="bar size (default 1d)")
+    parser.add_argument("--forecaster", default=None, help="forecasting model (default: the engine default)")
+    args = parser.parse_args(argv)
+
+    queries = screener.load_watchlist(args.input) if args.tickers else load_queries(args.input)
+
+    def show(done, total, query, error):
+        print(f"[{done}/{total}] {query}" + (f" FAILED: {error}" if error else ""))
+
+    summary = run_batch(queries, args.output, processes=args.workers, resume=not args.no_resume,
+                        limits=rate_limit.parse_limits(args.rate), forecaster=args.forecaster,
+                        interval=args.interval, progress=show, symbols=args.tickers)
+    print(f"{summary['written']} results written to {summary['output']} in {summary['seconds']}s, "
+          f"{len(summary['failed'])} failed, {summary['skipped']} already done")
+    return 0 if not summary["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sentiment import SentimentScorer
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "headlines.txt")
+
+
+def load_corpus(path=CORPUS):
+    with open(path, encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+
+
+def legacy_score(texts):
+    """The original substring-keyword scorer from FinancialEngine.get_sentiment."""
+    pos = ["bullish", "growth", "buy", "up", "high", "positive", "beat", "profit"]
+    neg = ["bearish", "fall", "sell", "down", "low", "negative", "miss", "loss"]
+    score = 0
+    for text in texts:
+        text = text.lower()
+        for p in pos:
+            if p in text: score += 1
+        for n in neg:
+            if n in text: score -= 1
+    return max(-1, min(1, score / (len(texts) * 2) if texts else 0))
+
+
+def bench(fn, texts, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(batch_size=20000):
+    corpus = load_corpus()
+    texts = (corpus * (batch_size // len(corpus) + 1))[:batch_size]
+    scorer = SentimentScorer()
+
+    legacy = bench(legacy_score, texts)
+    compiled = bench(scorer.score_batch, texts)
+    print(f"Corpus: {len(corpus)} unique headlines, batch of {len(texts):,}")
+    print(f"legacy substring scorer : {len(texts) / legacy:>12,.0f} headlines/s")
+    print(f"compiled lexicon scorer : {len(texts) / compiled:>12,.0f} headlines/s")
+
+    print("\nSample scores:")
+    for text in corpus[:8]:
+        print(f"  {scorer.score(text):+.2f}  {text}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
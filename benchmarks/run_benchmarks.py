@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic
+import market_data
+import indicators
+import forecasting
+import charts
+import correlation
+import portfolio_risk
+import screener
+import ttl_cache
+import holdings_store
+from quant_utils import FinancialAnalyzer
+from financial_engine import FinancialEngine
+from report_generator import generate_result_report
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+OUTPUT = os.path.join(HERE, "results", "latest.json")
+
+# (tickers, years of daily bars), plus COLD_START: import time of the entry modules in a fresh interpreter
+COLD_START = "cold_start"
+CASES = [COLD_START, (1, 1), (1, 5), (1, 20), (10, 1), (100, 1), (100, 5), (1000, 1), (1000, 20)]
+QUICK_CASES = [COLD_START, (1, 1), (10, 1), (100, 5)]
+COLD_START_MODULES = ["financial_engine", "cli", "api_server", "batch_reports"]
+
+# A stage regresses when it is both TOLERANCE slower (relative) and MIN_DELTA seconds slower than baseline
+TOLERANCE = 0.25
+MIN_DELTA = 0.005
+
+
+def case_name(case):
+    return case if case == COLD_START else f"{case[0]}x{case[1]}y"
+
+
+def parse_case(text):
+    """'100x5' / '100x5y' -> (100, 5); 'cold_start' passes through."""
+    if text == COLD_START:
+        return text
+    return tuple(int(x) for x in text.lower().rstrip("y").split("x"))
+
+
+def best_of(fn, repeat, setup=None):
+    """Fastest of `repeat` runs (setup runs untimed before each one)."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def cold_sources():
+    ttl_cache._caches.clear()
+    holdings_store.set_store(holdings_store.HoldingsStore())
+
+
+def cold_all():
+    cold_sources()
+    forecasting.clear_cache()
+    correlation.clear_cache()
+
+
+def cold_start_stages(repeat):
+    """Seconds to import each entry module in a new interpreter (interpreter start-up itself excluded)."""
+    code = "import time; t = time.perf_counter(); import {0}; print(time.perf_counter() - t)"
+
+    def import_seconds(module):
+        out = subprocess.run([sys.executable, "-c", code.format(module)], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return float(out.stdout.strip().splitlines()[-1])
+
+    return {f"import_{m}": min(import_seconds(m) for _ in range(repeat)) for m in COLD_START_MODULES}
+
+
+def single_ticker_stages(ticker, years, repeat):
+    """Stage-by-stage timings of the run_analysis path for one ticker."""
+    period = f"{years}y"
+    query = f"Analyze {ticker}"
+    bars = market_data.get_history(ticker, period)
+    close = bars["Close"].to_numpy(dtype=np.float64)
+    fig = FinancialAnalyzer.get_analysis(ticker, period, include_extras=False)[1]
+    fundamentals = FinancialAnalyzer.get_fundamentals(ticker)
+    result = FinancialEngine.run_analysis(query)
+
+    stages = {
+        "resolve": best_of(lambda: FinancialEngine.resolve_tickers(query), repeat),
+        "download": best_of(lambda: market_data.get_history(ticker, period), repeat),
+        "indicators": best_of(lambda: indicators.compute_indicators(close), repeat),
+        "model_fit": best_of(
+            lambda: forecasting.get_fitted(forecasting.DEFAULT_FORECASTER, ticker, close, bars.index[0], bars.index[-1]),
+            repeat, setup=forecasting.clear_cache),
+        "figure": best_of(lambda: charts.LazyFigure(fig.builder, fig.data).figure(), repeat),
+        "fundamentals": best_of(lambda: FinancialAnalyzer.get_fundamentals(ticker), repeat, setup=cold_sources),
+        "whale": best_of(lambda: FinancialAnalyzer.get_whale_data(ticker, fundamentals.get("Market Cap", 0)),
+                         repeat, setup=cold_sources),
+        "sentiment": best_of(lambda: FinancialEngine.get_sentiment(ticker), repeat),
+        "pdf": best_of(lambda: generate_result_report(result), repeat),
+    }
+    if years == 1:
+        # run_analysis itself always uses the engine's 1y window
+        stages["end_to_end"] = best_of(lambda: FinancialEngine.run_analysis(query), repeat, setup=cold_all)
+    return stages
+
+
+def universe_stages(tickers, years, repeat):
+    """Stage timings for the multi-ticker paths (comparison, screener, holdings) over a universe."""
+    period = f"{years}y"
+    query = "Compare " + ", ".join(tickers)
+    closes = market_data.get_close_matrix(tickers, period)
+    values = closes.to_numpy(dtype=np.float64)
+
+    def figures():
+        FinancialAnalyzer.get_comparison_analysis(tickers, closes=closes)[1].figure()
+        FinancialAnalyzer.get_correlation_heatmap(tickers, closes=closes).figure()
+
+    stages = {
+        "resolve": best_of(lambda: FinancialEngine.resolve_tickers(query), repeat),
+        "download": best_of(lambda: market_data.get_close_matrix(tickers, period), repeat),
+        "indicators": best_of(lambda: indicators.compute_indicators(values), repeat),
+        "screen": best_of(lambda: screener.screen_matrix(closes), repeat),
+        "correlation": best_of(lambda: correlation.get_correlation(closes), repeat, setup=correlation.clear_cache),
+        "risk": best_of(lambda: portfolio_risk.comparison_risk(closes), repeat),
+        "figure": best_of(figures, repeat, setup=correlation.clear_cache),
+        "fundamentals": best_of(lambda: [FinancialAnalyzer.get_fundamentals(t) for t in tickers], repeat,
+                                setup=cold_sources),
+        "whale": best_of(lambda: holdings_store.ingest_universe(holdings_store.get_store(), tickers,
+                                                                FinancialAnalyzer.fetch_whale_frames),
+                         repeat, setup=cold_sources),
+        "sentiment": best_of(lambda: [FinancialEngine.get_sentiment(t) for t in tickers], repeat),
+    }
+    if years == 1:
+        result = FinancialEngine.run_comparison_pipeline(tickers, query)
+        stages["pdf"] = best_of(lambda: generate_result_report(result), repeat)
+        stages["end_to_end"] = best_of(lambda: FinancialEngine.run_comparison_pipeline(tickers, query), repeat,
+                                       setup=cold_all)
+    return stages
+
+
+def run_case(n_tickers, years, repeat=3):
+    tickers = synthetic.synthetic_tickers(n_tickers)
+    market = synthetic.FakeMarket(tickers, years)
+    with synthetic.offline(market):
+        if n_tickers == 1:
+            return single_ticker_stages(tickers[0], years, repeat)
+        return universe_stages(tickers, years, repeat)
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    """Rows of (case, stage, baseline, current, ratio, regressed) for stages present in both runs."""
+    rows = []
+    for case, stages in results.items():
+        for stage, current in stages.items():
+            base = baseline.get(case, {}).get(stage)
+            if base is None:
+                continue
+            regressed = current > base * (1 + tolerance) and current - base > min_delta
+            rows.append((case, stage, base, current, current / base if base else float("inf"), regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (synthetic data, fake yfinance/DDGS).")
+    parser.add_argument("--quick", action="store_true", help="small cases only")
+    parser.add_argument("--case", action="append", default=[], help="NxY, e.g. 100x5, or cold_start (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=OUTPUT)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="regression gate: a missing baseline is an error instead of a warning")
+    args = parser.parse_args(argv)
+
+    # The baseline is per machine (gitignored), so a gate without one must not pass silently
+    if args.check and not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; store one on this machine first with: "
+              f"python benchmarks/run_benchmarks.py --update-baseline", file=sys.stderr)
+        return 2
+
+    cases = [parse_case(c) for c in args.case] or (QUICK_CASES if args.quick else CASES)
+
+    results = {}
+    for case in cases:
+        name = case_name(case)
+        started = time.perf_counter()
+        results[name] = cold_start_stages(args.repeat) if case == COLD_START else run_case(*case, args.repeat)
+        summary = "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in results[name].items())
+        print(f"[{name}] {time.perf_counter() - started:.1f}s  {summary}")
+
+    report = {
+        "meta": {
+            "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fh:
+                baseline = json.load(fh)
+        # Merge, so a --quick or --case run only replaces the cases it measured
+        report["results"] = {**baseline.get("results", {}), **results}
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --update-baseline to store one (--check fails here).")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)["results"]
+    rows = compare(results, baseline, args.tolerance)
+    regressions = [r for r in rows if r[-1]]
+    for case, stage, base, current, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{case:>10} {stage:<13} {base * 1000:9.1f}ms -> {current * 1000:9.1f}ms  x{ratio:5.2f}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed more than {args.tolerance:.0%} against the baseline.")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import os
+import zlib
+import string
+import itertools
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+HEADLINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "headlines.txt")
+
+
+def synthetic_tickers(n):
+    """n distinct all-letter symbols (Q + three letters) that resolve_tickers picks up as tickers."""
+    codes = ("Q" + "".join(c) for c in itertools.product(string.ascii_uppercase, repeat=3))
+    return list(itertools.islice(codes, n))
+
+
+def _seed(ticker):
+    return zlib.crc32(ticker.encode())
+
+
+def gbm_ohlcv(ticker, years=1, end=None, mu=0.07, sigma=0.3):
+    """Business-day OHLCV bars from geometric Brownian motion; deterministic per ticker."""
+    rng = np.random.default_rng(_seed(ticker))
+    end = pd.Timestamp(end or pd.Timestamp.now()).normalize()
+    dates = pd.bdate_range(end=end, periods=int(252 * years), name="Date")
+    dt = 1 / 252
+    shocks = rng.normal((mu - sigma ** 2 / 2) * dt, sigma * np.sqrt(dt), len(dates))
+    close = rng.uniform(10, 500) * np.exp(np.cumsum(shocks))
+    open_ = close * np.exp(rng.normal(0, sigma * np.sqrt(dt) / 2, len(dates)))
+    spread = np.abs(rng.normal(0, sigma * np.sqrt(dt) / 2, len(dates)))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + spread),
+        "Low": np.minimum(open_, close) * (1 - spread),
+        "Close": close,
+        "Volume": rng.integers(100_000, 50_000_000, len(dates)).astype(np.int64),
+    }, index=dates)
+
+
+class FakeMarket:
+    """Pre-generated bars for a universe, served the way yf.download returns them."""
+
+    def __init__(self, tickers, years):
+        self.bars = {t: gbm_ohlcv(t, years) for t in tickers}
+        self.calls = 0
+
+    def _bars(self, ticker, start=None, end=None):
+        df = self.bars.get(ticker.upper())
+        if df is None:
+            # Unknown symbols (e.g. the risk benchmark) still get deterministic data
+            df = self.bars[ticker.upper()] = gbm_ohlcv(ticker.upper(), years=len(next(iter(self.bars.values()))) / 252)
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df
+
+    def download(self, tickers, start=None, end=None, group_by="column", **kwargs):
+        """yf.download: (Price, Ticker) columns, or (Ticker, Price) with group_by='ticker'."""
+        self.calls += 1
+        names = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: self._bars(t, start, end) for t in names}
+        out = pd.concat(frames, axis=1)  # (Ticker, Price)
+        if group_by != "ticker":
+            out = out.swaplevel(0, 1, axis=1)
+        return out
+
+
+class FakeTicker:
+    """yf.Ticker stand-in with deterministic info, holders and insider trades."""
+
+    def __init__(self, ticker):
+        self.ticker = ticker.upper()
+        self._rng = np.random.default_rng(_seed(self.ticker))
+
+    @property
+    def info(self):
+        return {
+            "trailingPE": float(self._rng.uniform(5, 60)),
+            "pegRatio": float(self._rng.uniform(0.5, 3)),
+            "debtToEquity": float(self._rng.uniform(0, 200)),
+            "dividendYield": float(self._rng.uniform(0, 0.05)),
+            "marketCap": float(self._rng.uniform(1e9, 3e12)),
+            "targetMeanPrice": float(self._rng.uniform(10, 500)),
+        }
+
+    @property
+    def institutional_holders(self):
+        funds = ["Vanguard Group Inc", "Blackrock Inc.", "State Street Corp", "FMR, LLC", "Geode Capital",
+                 "Morgan Stanley", "Northern Trust", "JPMorgan Chase", "T. Rowe Price", "Invesco Ltd."]
+        n = len(funds)
+        return pd.DataFrame({
+            "Date Reported": pd.Timestamp("2026-06-30"),
+            "Holder": funds,
+            "pctHeld": np.sort(self._rng.uniform(0.005, 0.09, n))[::-1],
+            "Shares": self._rng.integers(1_000_000, 500_000_000, n),
+            "Value": self._rng.uniform(1e8, 1e11, n),
+            "pctChange": self._rng.normal(0, 0.05, n),
+        })
+
+    @property
+    def insider_transactions(self):
+        n = 8
+        return pd.DataFrame({
+            "Shares": self._rng.integers(1_000, 100_000, n),
+            "Value": self._rng.uniform(1e5, 1e7, n),
+            "Text": [f"Sale at price {p:.2f}" for p in self._rng.uniform(10, 500, n)],
+            "Insider": [f"INSIDER {i}" for i in range(n)],
+            "Position": ["Director"] * n,
+            "Start Date": pd.date_range(end="2026-09-30", periods=n, freq="W"),
+        })
+
+
+class FakeDDGS:
+    """DDGS stand-in: text() returns headlines from the benchmark corpus."""
+
+    _corpus = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query, max_results=5):
+        if FakeDDGS._corpus is None:
+            with open(HEADLINES, encoding="utf-8") as fh:
+                FakeDDGS._corpus = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+        start = _seed(query) % len(FakeDDGS._corpus)
+        picks = (FakeDDGS._corpus * 2)[start:start + max_results]
+        return [{"title": h, "body": h, "href": "https://example.invalid/news"} for h in picks]
+
+
+@contextlib.contextmanager
+def offline(market):
+    """Routes every network call site to the fakes and starts from cold, in-memory caches.
+
+    yf.download / yf.Ticker are patched on the yfinance module itself and DDGS on
+    financial_engine; the OHLCV provider is the uncached YFinanceProvider so the download
+    stage is measured, not the Parquet cache.
+    """
+    import yfinance as yf
+    import financial_engine
+    import market_data
+    import ttl_cache
+    import holdings_store
+    import forecasting
+    import correlation
+
+    saved = {
+        "download": yf.download, "Ticker": yf.Ticker, "DDGS": financial_engine.DDGS,
+        "provider": market_data._provider, "caches": dict(ttl_cache._caches),
+        "ttl_dir": ttl_cache.TTL_CACHE_DIR, "store": holdings_store._store,
+    }
+    yf.download, yf.Ticker, financial_engine.DDGS = market.download, FakeTicker, FakeDDGS
+    market_data.set_provider(market_data.YFinanceProvider())
+    ttl_cache._caches.clear()
+    ttl_cache.TTL_CACHE_DIR = ""
+    holdings_store.set_store(holdings_store.HoldingsStore())
+    forecasting.clear_cache()
+    correlation.clear_cache()
+    try:
+        yield market
+    finally:
+        yf.download, yf.Ticker, financial_engine.DDGS = saved["download"], saved["Ticker"], saved["DDGS"]
+        market_data.set_provider(saved["provider"])
+        ttl_cache._caches.clear()
+        ttl_cache._caches.update(saved["caches"])
+        ttl_cache.TTL_CACHE_DIR = saved["ttl_dir"]
+        holdings_store.set_store(saved["store"])
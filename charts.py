@@ -0,0 +1,217 @@
+import time
+import threading
+import numpy as np
+import telemetry
+
+# Series longer than this are thinned with LTTB before they reach the browser
+DEFAULT_MAX_POINTS = 1500
+# Raw series longer than this are drawn with WebGL (Scattergl) traces
+WEBGL_THRESHOLD = 5000
+# Heatmaps with more rows than this drop the per-cell value labels
+HEATMAP_LABEL_LIMIT = 25
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of (x, y)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    # First and last points are always kept; the rest is split into n_out - 2 buckets
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        # Average of the next bucket (just the last point for the final bucket) is the third vertex
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _x_numeric(dates):
+    """Datetime-like x values as float nanoseconds for LTTB areas."""
+    arr = np.asarray(dates)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return np.arange(len(arr), dtype=np.float64)
+
+
+class LazyFigure:
+    """Numeric chart data plus a builder; the Plotly figure is only created when a view asks for it.
+
+    Built figures are cached per (max_points, webgl) option set. stats() reports build time,
+    point count and serialized payload size of the last build.
+    """
+
+    def __init__(self, builder, data):
+        self.builder = builder
+        self.data = data
+        self._figures = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def figure(self, max_points=DEFAULT_MAX_POINTS, webgl=None):
+        key = (max_points, webgl)
+        with self._lock:
+            if key not in self._figures:
+                started = time.perf_counter()
+                fig, points = self.builder(self.data, max_points=max_points, webgl=webgl)
+                elapsed = time.perf_counter() - started
+                telemetry.observe("chart_build_seconds", elapsed, builder=getattr(self.builder, "__name__", "chart"))
+                self._figures[key] = fig
+                self._stats[key] = {
+                    "build_ms": round(elapsed * 1000, 2),
+                    "points": points,
+                    "traces": len(fig.data),
+                }
+            return self._figures[key]
+
+    def stats(self, max_points=DEFAULT_MAX_POINTS, webgl=None):
+        """Build time, plotted points and JSON payload size for this option set (builds if needed)."""
+        key = (max_points, webgl)
+        fig = self.figure(max_points, webgl)
+        with self._lock:
+            stats = self._stats[key]
+            if "payload_bytes" not in stats:
+                stats["payload_bytes"] = len(fig.to_json())
+            return dict(stats)
+
+    def to_json_dict(self, max_points=DEFAULT_MAX_POINTS, webgl=None):
+        """Plotly JSON spec, for APIs."""
+        import json
+        return json.loads(self.figure(max_points, webgl).to_json())
+
+
+def _thin(data, keys, max_points):
+    """Applies one LTTB index set (chosen on Close) to every aligned series."""
+    n = len(data["Date"])
+    if not max_points or n <= max_points:
+        return {k: data[k] for k in keys}
+    idx = lttb_indices(_x_numeric(data["Date"]), data["Close"], max_points)
+    return {k: np.asarray(data[k])[idx] for k in keys}
+
+
+def forecast_label(bars, interval="1d"):
+    """Legend name of a forecast trace: "30D Forecast" on daily bars, "30 x 5m Forecast" intraday."""
+    return f"{bars}D Forecast" if interval == "1d" else f"{bars} x {interval} Forecast"
+
+
+def build_analysis_figure(data, max_points=DEFAULT_MAX_POINTS, webgl=None):
+    """3-row price/RSI/volume chart from get_analysis series."""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    raw_points = len(data["Date"])
+    use_gl = raw_points > WEBGL_THRESHOLD if webgl is None else webgl
+    Line = go.Scattergl if use_gl else go.Scatter
+    keys = ["Date", "Close", "SMA50", "BB_Upper", "BB_Lower", "Trendline", "RSI", "Volume"]
+    d = _thin(data, keys, max_points)
+    ticker = data["ticker"]
+
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=(f'{ticker} Analysis', 'RSI', 'Volume'),
+        row_heights=[0.6, 0.2, 0.2]
+    )
+
+    # Price Area
+    fig.add_trace(Line(x=d['Date'], y=d['Close'], name='Close', line=dict(color='#00d1ff', width=2)), row=1, col=1)
+    fig.add_trace(Line(x=d['Date'], y=d['SMA50'], name='50 MA', line=dict(color='#ff3366', width=1)), row=1, col=1)
+
+    # Bollinger Bands
+    fig.add_trace(Line(x=d['Date'], y=d['BB_Upper'], name='BB Upper', line=dict(color='rgba(173, 204, 255, 0.3)', width=0), showlegend=False), row=1, col=1)
+    fig.add_trace(Line(x=d['Date'], y=d['BB_Lower'], name='BB Lower', line=dict(color='rgba(173, 204, 255, 0.3)', width=0), fill='tonexty', fillcolor='rgba(173, 204, 255, 0.1)'), row=1, col=1)
+
+    # Historical Trendline
+    fig.add_trace(Line(x=d['Date'], y=d['Trendline'], name='Model Trend', line=dict(color='yellow', dash='dot', width=1)), row=1, col=1)
+
+    # Future Forecast (counted in bars of the chart's interval)
+    fig.add_trace(go.Scatter(x=data['ForecastDate'], y=data['Forecast'], name=forecast_label(len(data['Forecast']), data.get('interval', '1d')), line=dict(color='#ffcc00', dash='dash', width=2)), row=1, col=1)
+
+    # RSI
+    fig.add_trace(Line(x=d['Date'], y=d['RSI'], name='RSI', line=dict(color='#00ff88', width=1.5)), row=2, col=1)
+    fig.add_hline(y=70, line_dash="dot", line_color="red", row=2, col=1)
+    fig.add_hline(y=30, line_dash="dot", line_color="green", row=2, col=1)
+
+    # Volume
+    fig.add_trace(go.Bar(x=d['Date'], y=d['Volume'], name='Volume', marker_color='rgba(100,100,100,0.5)'), row=3, col=1)
+
+    fig.update_layout(
+        template='plotly_dark',
+        hovermode='x unified',
+        height=800,
+        showlegend=True,
+        margin=dict(l=20, r=20, t=50, b=20),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig, len(d["Date"]) * 7 + len(data["Forecast"])
+
+
+def build_comparison_figure(data, max_points=DEFAULT_MAX_POINTS, webgl=None):
+    """Normalized performance lines; data maps ticker -> (dates, normalized values)."""
+    import plotly.graph_objects as go
+
+    colors = ['#00d1ff', '#ff3366', '#ffcc00', '#00ff88', '#ffffff']
+    longest = max((len(v[0]) for v in data.values()), default=0)
+    use_gl = longest > WEBGL_THRESHOLD if webgl is None else webgl
+    Line = go.Scattergl if use_gl else go.Scatter
+
+    fig = go.Figure()
+    points = 0
+    for i, (ticker, (dates, values)) in enumerate(data.items()):
+        d = _thin({"Date": dates, "Close": values}, ["Date", "Close"], max_points)
+        points += len(d["Date"])
+        fig.add_trace(Line(
+            x=d["Date"],
+            y=d["Close"],
+            name=ticker,
+            line=dict(color=colors[i % len(colors)], width=2)
+        ))
+
+    fig.update_layout(
+        template='plotly_dark',
+        title="Relative Performance Comparison (Normalized to 100)",
+        yaxis_title="Performance (%)",
+        hovermode='x unified',
+        height=600,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig, points
+
+
+def build_correlation_figure(corr_df, max_points=None, webgl=None):
+    """Correlation heatmap from a square DataFrame (cell labels only while they stay readable)."""
+    import plotly.graph_objects as go
+
+    k = len(corr_df)
+    labels = {"text": np.round(corr_df.values, 2), "texttemplate": "%{text}"} if k <= HEATMAP_LABEL_LIMIT else {}
+    fig = go.Figure(data=go.Heatmap(
+        z=corr_df.values,
+        x=corr_df.columns,
+        y=corr_df.index,
+        colorscale='RdBu',
+        zmin=-1, zmax=1,
+        showscale=True,
+        **labels
+    ))
+
+    fig.update_layout(
+        title="Stock Correlation Matrix (Portfolio Risk)",
+        template='plotly_dark',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=min(500 + max(0, k - 20) * 12, 1600)
+    )
+    return fig, corr_df.size
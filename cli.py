@@ -0,0 +1,49 @@
+import sys
+import json
+import argparse
+import bars
+import pooled_model
+from financial_engine import FinancialEngine
+
+# A least-squares trend: text-only runs never import scikit-learn (charts are never built either).
+# A trained pooled model (numpy only) is preferred when its artifact exists.
+CLI_FORECASTER = "linear"
+
+
+def format_text(result, timings=False):
+    """Plain-text report: the engine response plus signals, fundamentals and (optionally) stage timings."""
+    lines = [result.response.strip()]
+    if result.signals:
+        lines += ["", "Signals:"] + [f"  [{s['type']}] {s['label']}: {s['desc']}" for s in result.signals]
+    if result.fundamentals:
+        lines += ["", "Fundamentals:"] + [f"  {k}: {v}" for k, v in result.fundamentals.items()]
+    if timings and result.timings:
+        lines += ["", "Timings (ms):"] + [f"  {k}: {v * 1000:.1f}" for k, v in
+                                         sorted(result.timings.items(), key=lambda kv: -kv[1])]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Text-only quant analysis from the terminal, e.g. cli.py Analyze Apple")
+    parser.add_argument("query", nargs="+", help="free-text query, as typed in the dashboard")
+    parser.add_argument("--forecaster", default=None,
+                        help=f"forecasting model (default pooled if trained, else {CLI_FORECASTER}; "
+                             "random_forest needs scikit-learn)")
+    parser.add_argument("--interval", default="1d", choices=list(bars.INTERVALS),
+                        help="bar size (default 1d; intraday history is limited to recent weeks)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    parser.add_argument("--timings", action="store_true", help="show per-stage timings")
+    args = parser.parse_args(argv)
+
+    forecaster = args.forecaster or ("pooled" if args.interval == "1d" and pooled_model.available() else CLI_FORECASTER)
+    result = FinancialEngine.run_analysis(" ".join(args.query), forecaster=forecaster,
+                                          interval=args.interval)
+    if args.json:
+        print(json.dumps(result.to_dict(include_charts=False), indent=2, default=str))
+    else:
+        print(format_text(result, timings=args.timings))
+    return 0 if result.tickers else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+from financial_engine import FinancialEngine
+from quant_utils import FinancialAnalyzer
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF", "GGG", "HHH"]
+
+
+@pytest.fixture
+def offline_engine(monkeypatch):
+    """Fixture prices plus fake sentiment/fundamentals/whale sources that stamp the ticker into their output."""
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=320)
+    frames = {}
+    for i, t in enumerate(TICKERS):
+        close = (10 + 10 * i) * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        frames[t] = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000}, index=dates)
+    monkeypatch.setattr(market_data, "_provider", market_data.FixtureProvider(frames=frames))
+
+    def jitter():
+        time.sleep(np.random.uniform(0, 0.01))
+
+    monkeypatch.setattr(FinancialEngine, "get_sentiment",
+                        staticmethod(lambda t: (jitter(), (0.0, [f"headline for {t}"]))[1]))
+    monkeypatch.setattr(FinancialAnalyzer, "get_fundamentals",
+                        staticmethod(lambda t: (jitter(), {"Market Cap": float(TICKERS.index(t) + 1) * 1e9, "Name": t})[1]))
+    monkeypatch.setattr(FinancialAnalyzer, "fetch_whale_frames",
+                        staticmethod(lambda t: (jitter(), (pd.DataFrame({"Holder": [f"Fund of {t}"], "pctHeld": [0.05]}), None))[1]))
+    return frames
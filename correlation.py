@@ -0,0 +1,167 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import telemetry
+
+# Column block edge for the pairwise products (block x block outputs per matmul)
+BLOCK_SIZE = 512
+MAX_CACHED_MATRICES = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def returns_matrix(closes, dtype=np.float32):
+    """Simple returns per column against that column's previous valid close.
+
+    Each ticker keeps its own calendar: an equity's Monday return is measured from Friday even
+    when crypto columns have weekend bars. Dates where a ticker has no bar stay NaN.
+    """
+    values = closes.to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    # Index of the last valid row at or before each row, per column
+    idx = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    prev = np.full_like(values, np.nan)
+    prev[1:] = np.take_along_axis(values, idx[:-1], axis=0)
+    prev[1:][~np.take_along_axis(valid, idx[:-1], axis=0)] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rets = values / prev - 1.0
+    rets[~valid] = np.nan
+    return rets.astype(dtype, copy=False)
+
+
+def _pair_block(xa, ma, xb, mb):
+    """Pairwise-complete correlation between two column blocks via five mask/value products."""
+    n = ma.T @ mb                      # common observations
+    sa = xa.T @ mb                     # sum of a over dates where b is valid
+    sb = ma.T @ xb                     # sum of b over dates where a is valid
+    saa = (xa * xa).T @ mb
+    sbb = ma.T @ (xb * xb)
+    sab = xa.T @ xb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sab - sa * sb / n
+        var_a = saa - sa * sa / n
+        var_b = sbb - sb * sb / n
+        return cov / np.sqrt(var_a * var_b), n
+
+
+def correlation_matrix(returns, min_periods=2, block=BLOCK_SIZE, dtype=np.float32):
+    """Pearson correlation with pairwise NaN handling (what DataFrame.corr does), in float32 blocks.
+
+    NaNs become zeros plus a 0/1 mask, so each block pair is a handful of BLAS matrix products
+    instead of a Python loop over N^2 pairs. Columns are de-meaned first to keep float32 sums accurate.
+    """
+    frame = returns if isinstance(returns, pd.DataFrame) else None
+    x = np.asarray(returns, dtype=np.float64)
+    mask = np.isfinite(x)
+    counts = mask.sum(axis=0)
+    means = np.where(counts > 0, np.where(mask, x, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+    xs = np.where(mask, x - means, 0.0).astype(dtype)
+    m = mask.astype(dtype)
+
+    k = x.shape[1]
+    out = np.full((k, k), np.nan, dtype=np.float64)
+    for i in range(0, k, block):
+        for j in range(i, k, block):
+            corr, n = _pair_block(xs[:, i:i + block], m[:, i:i + block], xs[:, j:j + block], m[:, j:j + block])
+            corr = np.where(n >= max(min_periods, 2), np.clip(corr, -1.0, 1.0), np.nan)
+            out[i:i + block, j:j + block] = corr
+            out[j:j + block, i:i + block] = corr.T
+    # Exact ones on the diagonal wherever the column has variance
+    diag = np.diag(out).copy()
+    np.fill_diagonal(out, np.where(np.isfinite(diag), 1.0, np.nan))
+
+    if frame is not None:
+        return pd.DataFrame(out, index=frame.columns, columns=frame.columns)
+    return out
+
+
+def rolling_correlation(returns, pairs, window, min_periods=None):
+    """Rolling pairwise-complete correlation for (a, b) column pairs, from cumulative sums.
+
+    returns is a dates x tickers DataFrame; pairs is a list of (a, b) column names. Returns a
+    dates x pairs DataFrame (columns "a/b"), NaN until min_periods common observations.
+    """
+    min_periods = window if min_periods is None else min_periods
+    x = returns.to_numpy(dtype=np.float64)
+    cols = {c: i for i, c in enumerate(returns.columns)}
+    a = x[:, [cols[p[0]] for p in pairs]]
+    b = x[:, [cols[p[1]] for p in pairs]]
+    both = np.isfinite(a) & np.isfinite(b)
+    a, b = np.where(both, a, 0.0), np.where(both, b, 0.0)
+
+    def window_sums(v):
+        c = np.zeros((len(v) + 1, v.shape[1]))
+        np.cumsum(v, axis=0, out=c[1:])
+        # Partial windows at the start, as pandas does when min_periods < window
+        out = c[1:].copy()
+        if len(v) > window:
+            out[window:] -= c[1:-window]
+        return out
+
+    n = window_sums(both.astype(np.float64))
+    sa, sb = window_sums(a), window_sums(b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = window_sums(a * b) - sa * sb / n
+        var_a = window_sums(a * a) - sa * sa / n
+        var_b = window_sums(b * b) - sb * sb / n
+        corr = np.clip(cov / np.sqrt(var_a * var_b), -1.0, 1.0)
+    corr[~(n >= max(min_periods, 2))] = np.nan
+    return pd.DataFrame(corr, index=returns.index, columns=[f"{p[0]}/{p[1]}" for p in pairs])
+
+
+def cluster_order(corr):
+    """Leaf order of an average-linkage clustering on sqrt((1 - rho) / 2), so correlated names sit together.
+
+    Falls back to the original order if scipy is unavailable or there is nothing to cluster.
+    """
+    values = np.asarray(corr, dtype=np.float64)
+    k = len(values)
+    if k < 3:
+        return np.arange(k)
+    try:
+        from scipy.cluster.hierarchy import linkage, leaves_list
+        from scipy.spatial.distance import squareform
+    except ImportError:
+        return np.arange(k)
+    # Undefined correlations are treated as unrelated
+    dist = np.sqrt(np.clip((1.0 - np.nan_to_num(values, nan=0.0)) / 2.0, 0.0, 1.0))
+    np.fill_diagonal(dist, 0.0)
+    dist = (dist + dist.T) / 2
+    return leaves_list(linkage(squareform(dist, checks=False), method="average"))
+
+
+def get_correlation(closes, cluster=True, min_periods=2):
+    """Cached correlation DataFrame for a close matrix, optionally in clustering order.
+
+    Cached per universe (column set) and last bar date, so repeated views of the same
+    watchlist on the same day reuse the matrix.
+    """
+    key = (tuple(sorted(map(str, closes.columns))), closes.index[-1] if len(closes) else None,
+           len(closes), cluster, min_periods)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            telemetry.cache_event("correlation", "hits")
+            return _cache[key]
+
+    telemetry.cache_event("correlation", "misses")
+    closes = closes[sorted(closes.columns, key=str)]
+    corr = correlation_matrix(pd.DataFrame(returns_matrix(closes), index=closes.index, columns=closes.columns),
+                              min_periods=min_periods)
+    if cluster:
+        order = cluster_order(corr.to_numpy())
+        corr = corr.iloc[order, order]
+
+    with _cache_lock:
+        _cache[key] = corr
+        while len(_cache) > MAX_CACHED_MATRICES:
+            _cache.popitem(last=False)
+    return corr
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
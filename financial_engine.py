@@ -1,116 +1,312 @@
+import os
 import re
-import yfinance as yf
-try:
-    from ddgs import DDGS
-except ImportError:
-    from duckduckgo_search import DDGS
+import math
+import time
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from quant_utils import FinancialAnalyzer
+import market_data
+import bars
+import symbol_index
+import portfolio_risk
+from sentiment import get_scorer
+import screener
+import telemetry
+import rate_limit
+
+# News search client class, imported on first use (see _search_client) to keep engine imports cheap
+DDGS = None
+
+def _search_client():
+    global DDGS
+    if DDGS is None:
+        try:
+            from ddgs import DDGS as client
+        except ImportError:
+            from duckduckgo_search import DDGS as client
+        DDGS = client
+    return DDGS
+
+def _plain(value):
+    """JSON-safe copy of a frozen payload (NaN/inf become None, numpy scalars become Python ones)."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def _freeze(value):
+    """Read-only deep copy: dicts become mappingproxies, lists become tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+@dataclass(frozen=True)
+class AnalysisResult:
+    """Immutable outcome of one run_analysis call.
+    
+    Every request gets its own instance, so concurrent sessions can never see each
+    other's signals, fundamentals or figures.
+    """
+    query: str
+    tickers: tuple = ()
+    response: str = ""
+    fig: object = None
+    signals: tuple = ()
+    fundamentals: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    whale_data: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    corr_fig: object = None
+    sentiment: float = 0.0
+    headlines: tuple = ()
+    missed_sources: tuple = ()
+    risk: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    timings: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, **kwargs):
+        """Creates a result, freezing any dict/list payloads."""
+        return cls(**{k: v if k in ("fig", "corr_fig") else _freeze(v) for k, v in kwargs.items()})
+
+    def with_timings(self, timings):
+        """Copy of this result carrying per-stage seconds from a telemetry trace."""
+        return replace(self, timings=_freeze(dict(timings)))
+
+    @property
+    def ticker(self):
+        """Primary ticker (first resolved), or None."""
+        return self.tickers[0] if self.tickers else None
+
+    @property
+    def is_comparison(self):
+        return len(self.tickers) > 1
+
+    def to_dict(self, include_charts=True):
+        """JSON-ready view of the result; charts are emitted as downsampled Plotly JSON specs."""
+        data = {
+            "query": self.query,
+            "tickers": list(self.tickers),
+            "response": self.response,
+            "signals": _plain(self.signals),
+            "fundamentals": _plain(self.fundamentals),
+            "whale_data": _plain(self.whale_data),
+            "sentiment": _plain(self.sentiment),
+            "headlines": list(self.headlines),
+            "missed_sources": list(self.missed_sources),
+            "risk": _plain(self.risk),
+            "timings": _plain(self.timings),
+        }
+        if include_charts:
+            # Figures are built (and downsampled) only here, on demand
+            data["chart"] = self.fig.to_json_dict() if self.fig is not None else None
+            data["chart_stats"] = self.fig.stats() if self.fig is not None else None
+            data["corr_chart"] = self.corr_fig.to_json_dict() if self.corr_fig is not None else None
+        return data
+
+_source_pool = None
+
+def _get_source_pool():
+    """Shared worker pool for per-source fan-out (never shut down, so late sources can't block a request)."""
+    global _source_pool
+    if _source_pool is None:
+        _source_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="quant-source")
+    return _source_pool
+
+def _reset_source_pool():
+    # A forked worker (batch reports, screener chunks) inherits the pool object but none of its threads
+    global _source_pool
+    _source_pool = None
+
+os.register_at_fork(after_in_child=_reset_source_pool)
 
 class FinancialEngine:
     """Deterministic engine for market analysis (No LLM required)."""
     
+    # "concurrent" fans the single-ticker sources out in parallel, "sequential" runs them one by one
+    EXECUTION_MODE = "concurrent"
+    
+    # Per-source deadlines in seconds (measured from fan-out start) and what to use when one is missed
+    SOURCE_TIMEOUTS = {"sentiment": 8, "prices": 30, "fundamentals": 10, "whale": 10}
+    SOURCE_FALLBACKS = {
+        "sentiment": (0, ["News currently unavailable"]),
+        "prices": ("Price history unavailable (source timed out).", None, [], {}, {}),
+        "fundamentals": {},
+        "whale": (None, None),
+    }
+    
+    # Uppercase words in a query that are conversation, not tickers (2026 stopwords)
+    TICKER_STOP_WORDS = frozenset({
+        "THE", "AND", "FOR", "WHAT", "NEWS", "STOCK", "QUERY", "PLOT",
+        "LAST", "MONTH", "NEXT", "DAYS", "ABOUT", "PRICE", "TREND", "INFO",
+        "SHOW", "TELL", "ME", "QUANT", "THIS", "THAT", "CHECK", "ERROR",
+        "STARTUP", "HOW", "WHY", "VIEW", "DONE", "DO", "IT", "IS", "PRO",
+        "USER", "TERMINAL", "PROCESS", "WHERE"
+    })
+
     @staticmethod
     def resolve_tickers(query):
         """Extracts valid stock tickers with surgical precision, ignoring conversational query filler."""
-        # 1. Map common names and handle typos
-        mappings = {
-            "nvidia": "NVDA", "nvda": "NVDA",
-            "apple": "AAPL", "aapl": "AAPL",
-            "tesla": "TSLA", "tsla": "TSLA", "telsa": "TSLA", 
-            "microsoft": "MSFT", "msft": "MSFT",
-            "google": "GOOGL", "googl": "GOOGL",
-            "amazon": "AMZN", "amzn": "AMZN",
-            "meta": "META", "meta": "META",
-            "bitcoin": "BTC-USD", "btc": "BTC-USD",
-            "ethereum": "ETH-USD", "eth": "ETH-USD"
-        }
-        
-        extracted = []
-        q_lower = query.lower()
-        for name, ticker in mappings.items():
-            # Match word boundaries for better accuracy
-            if re.search(r'\b' + name + r'\b', q_lower):
-                extracted.append(ticker)
-
-        # 2. Look for explicit uppercase tickers, excluding 2026 conversational stopwords
-        STOP_WORDS = {
-            "THE", "AND", "FOR", "WHAT", "NEWS", "STOCK", "QUERY", "PLOT", 
-            "LAST", "MONTH", "NEXT", "DAYS", "ABOUT", "PRICE", "TREND", "INFO",
-            "SHOW", "TELL", "ME", "QUANT", "THIS", "THAT", "CHECK", "ERROR", 
-            "STARTUP", "HOW", "WHY", "VIEW", "DONE", "DO", "IT", "IS", "PRO",
-            "USER", "TERMINAL", "PROCESS", "WHERE"
-        }
-        
-        # Only look for standalone uppercase words 2-5 chars long
-        potential_tickers = re.findall(r'\b([A-Z]{2,5})\b', query)
-        
-        for t in potential_tickers:
-            if t not in STOP_WORDS:
-                extracted.append(t)
-        
-        # Return unique list
-        return list(set(extracted))
+        with telemetry.span("engine.resolve"):
+            # 1. Company names, aliases and typos via the symbol-master index
+            index = symbol_index.get_index()
+            extracted = index.scan(query)
+
+            # 2. Look for explicit uppercase tickers, excluding conversational stopwords.
+            # Only standalone uppercase words 2-5 chars long; aliases such as BTC map to their symbol
+            for t in re.findall(r'\b([A-Z]{2,5}(?:-[A-Z]{1,3})?)\b', query):
+                if t not in FinancialEngine.TICKER_STOP_WORDS:
+                    extracted.append(index.lookup(t) or t)
+
+        # Unique, in order of first mention
+        return list(dict.fromkeys(extracted))
     
     @staticmethod
     def get_sentiment(ticker):
-        """Fetches news and calculates a simple sentiment score (-1 to 1)."""
-        score = 0
-        news_count = 0
-        headlines = []
-        
+        """Fetches news and calculates a lexicon sentiment score (-1 to 1)."""
         try:
-            with DDGS() as ddgs:
+            client = _search_client()
+            rate_limit.throttle("ddgs")
+            with telemetry.span("sentiment.search"), client() as ddgs:
                 results = list(ddgs.text(f"{ticker} stock price news sentiment", max_results=5))
-                for r in results:
-                    text = (r['title'] + " " + r['body']).lower()
-                    headlines.append(r['title'])
-                    
-                    # Very simple keyword sentiment (Local, no LLM)
-                    pos = ["bullish", "growth", "buy", "up", "high", "positive", "beat", "profit"]
-                    neg = ["bearish", "fall", "sell", "down", "low", "negative", "miss", "loss"]
-                    
-                    for p in pos:
-                        if p in text: score += 1
-                    for n in neg:
-                        if n in text: score -= 1
-                    news_count += 1
             
-            final_sentiment = max(-1, min(1, score / (news_count * 2) if news_count > 0 else 0))
+            headlines = [r['title'] for r in results]
+            # Local compiled-lexicon scoring (no LLM), one batch for all results
+            with telemetry.span("sentiment.score"):
+                _, final_sentiment = get_scorer().score_batch([r['title'] + " " + r['body'] for r in results])
             return final_sentiment, headlines
         except:
             return 0, ["News currently unavailable"]
 
     @staticmethod
-    def run_analysis(query):
-        """Main entry point for the No-LLM pipeline."""
-        tickers = FinancialEngine.resolve_tickers(query)
-        SharedState.latest_tickers = tickers
+    def gather_sources(ticker, forecaster=None, interval="1d"):
+        """Runs sentiment, prices, fundamentals and whale fetches concurrently.
+        
+        Each source gets its own deadline; a late or failing source is replaced by its
+        fallback so the caller can still build a partial report. Time a source spends waiting
+        on a rate limit (rate_limit.throttle) extends its deadline. Returns (results, missed).
+        """
+        pool = _get_source_pool()
+        started = time.monotonic()
+        sources = {
+            "sentiment": (FinancialEngine.get_sentiment, (ticker,), {}),
+            "prices": (FinancialAnalyzer.get_analysis, (ticker,),
+                       {"include_extras": False, "forecaster": forecaster, "interval": interval}),
+            "fundamentals": (FinancialAnalyzer.get_fundamentals, (ticker,), {}),
+            "whale": (FinancialAnalyzer.fetch_whale_frames, (ticker,), {}),
+        }
+        # telemetry.submit carries the request's trace into the worker threads
+        futures, waits = {}, {}
+        for name, (fn, args, kwargs) in sources.items():
+            waits[name] = rate_limit.Waits()
+            futures[name] = telemetry.submit(pool, rate_limit.counting_waits, waits[name], fn, *args, **kwargs)
+        
+        results, missed = {}, []
+        for name, future in futures.items():
+            try:
+                results[name] = FinancialEngine._await_source(
+                    future, FinancialEngine.SOURCE_TIMEOUTS[name], started, waits[name])
+            except FutureTimeout:
+                future.cancel()
+                results[name] = FinancialEngine.SOURCE_FALLBACKS[name]
+                missed.append(f"{name} (timed out)")
+                telemetry.count("source_missed_total", source=name, reason="timeout")
+            except Exception:
+                results[name] = FinancialEngine.SOURCE_FALLBACKS[name]
+                missed.append(f"{name} (failed)")
+                telemetry.count("source_missed_total", source=name, reason="error")
+        return results, missed
+
+    @staticmethod
+    def _await_source(future, timeout, started, waits):
+        """future.result() with a deadline of timeout seconds after started, plus the source's rate-limit waits."""
+        while True:
+            remaining = timeout + waits.seconds - (time.monotonic() - started)
+            try:
+                return future.result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                # A throttle wait recorded meanwhile moves the deadline; otherwise it has passed
+                if timeout + waits.seconds - (time.monotonic() - started) <= 0:
+                    raise
+
+    @staticmethod
+    def run_single_pipeline(ticker, forecaster=None, interval="1d"):
+        """Single-ticker analysis in the configured execution mode. Returns (sentiment, news, analysis_tuple, missed)."""
+        if FinancialEngine.EXECUTION_MODE == "sequential":
+            sentiment, news = FinancialEngine.get_sentiment(ticker)
+            return sentiment, news, FinancialAnalyzer.get_analysis(ticker, forecaster=forecaster, interval=interval), []
+        
+        results, missed = FinancialEngine.gather_sources(ticker, forecaster=forecaster, interval=interval)
+        sentiment, news = results["sentiment"]
+        summary, fig, signals, _, _ = results["prices"]
+        fundamentals = results["fundamentals"]
+        
+        # Whale ownership fallback needs the market cap, so formatting waits for fundamentals
+        m_cap = fundamentals.get("Market Cap", 0)
+        if not isinstance(m_cap, (int, float)): m_cap = 0
+        holders_df, insiders_df = results["whale"]
+        try:
+            with telemetry.span("engine.whale_store"):
+                whale_data = FinancialAnalyzer.store_whale_data(ticker, holders_df, insiders_df, market_cap=m_cap)
+        except Exception as e:
+            whale_data = {"holders": [], "insiders": [], "error": str(e)}
+        
+        return sentiment, news, (summary, fig, signals, fundamentals, whale_data), missed
+
+    @staticmethod
+    def run_analysis(query, forecaster=None, interval="1d"):
+        """Main entry point for the No-LLM pipeline. Returns an immutable AnalysisResult.
         
-        if not tickers:
-            return "I couldn't find a valid stock ticker in your query. Please provide a symbol (e.g., AAPL) or a company name (e.g., Nvidia).", None
+        Per-stage seconds of the request are attached as result.timings. forecaster picks the
+        model from forecasting.FORECASTERS (default: forecasting.default_forecaster()); interval
+        is the bar size from bars.INTERVALS (default daily).
+        """
+        with telemetry.trace() as trace:
+            tickers = FinancialEngine.resolve_tickers(query)
+            
+            if not tickers:
+                result = AnalysisResult.build(
+                    query=query,
+                    response="I couldn't find a valid stock ticker in your query. Please provide a symbol (e.g., AAPL) or a company name (e.g., Nvidia).",
+                )
+                return result.with_timings(trace.timings())
+
+            return FinancialEngine.run_for_tickers(tickers, query=query, forecaster=forecaster, interval=interval)
+
+    @staticmethod
+    def run_for_tickers(tickers, query="", forecaster=None, interval="1d"):
+        """Runs comparison (several tickers) or single-ticker analysis on already-resolved tickers."""
+        mode = "comparison" if len(tickers) > 1 else "single"
+        with telemetry.trace() as trace:
+            result = FinancialEngine._run_for_tickers(tickers, query, forecaster, interval)
+        timings = trace.timings()
+        telemetry.observe("request_seconds", timings["total"], mode=mode)
+        return result.with_timings(timings)
 
+    @staticmethod
+    def _run_for_tickers(tickers, query, forecaster=None, interval="1d"):
         if len(tickers) > 1:
             # Comparison Mode
-            return FinancialEngine.run_comparison_pipeline(tickers)
+            return FinancialEngine.run_comparison_pipeline(tickers, query=query, interval=interval)
         else:
             # Single Analysis Mode
             ticker = tickers[0]
-            sentiment, news = FinancialEngine.get_sentiment(ticker)
+            sentiment, news, analysis, missed = FinancialEngine.run_single_pipeline(ticker, forecaster=forecaster, interval=interval)
             
             # Unpack the 5-tuple (Summary, Fig, Signals, Fundamentals, WhaleData)
-            summary, fig, signals, fundamentals, whale_data = FinancialAnalyzer.get_analysis(ticker)
-            
-            # Store in shared state for UI access
-            SharedState.latest_signals = signals
-            SharedState.latest_fundamentals = fundamentals
-            SharedState.latest_whale_data = whale_data
-            SharedState.latest_corr_fig = None # Reset
+            summary, fig, signals, fundamentals, whale_data = analysis
             
             sentiment_label = "POSITIVE" if sentiment > 0.1 else ("NEGATIVE" if sentiment < -0.1 else "NEUTRAL")
+            bars_line = f"  \n**Bars:** {interval}" if interval != "1d" else ""
             
             response = f"""### 🧬 QUANT REPORT: {ticker}
 **Ticker:** {ticker}  
-**Market Sentiment:** {sentiment_label} ({sentiment:+.2f})
+**Market Sentiment:** {sentiment_label} ({sentiment:+.2f}){bars_line}
 
 **Technical Analysis:**
 {summary}
@@ -119,44 +315,51 @@ class FinancialEngine:
 """
             for h in news[:3]:
                 response += f"- {h}\n"
+            
+            if missed:
+                response += f"\n_Partial report: {', '.join(missed)}._\n"
                 
-            return response, fig
+            return AnalysisResult.build(
+                query=query, tickers=tickers, response=response, fig=fig, signals=signals,
+                fundamentals=fundamentals, whale_data=whale_data, sentiment=sentiment,
+                headlines=news, missed_sources=missed,
+            )
 
     @staticmethod
-    def run_comparison_pipeline(tickers):
+    def run_comparison_pipeline(tickers, query="", interval="1d"):
         """Handles multi-stock comparison logic."""
-        response, fig = FinancialAnalyzer.get_comparison_analysis(tickers)
+        # One batched download feeds the performance chart, the correlation matrix and the risk panel
+        benchmark = portfolio_risk.BENCHMARK
+        with telemetry.span("engine.close_matrix"):
+            fetched = market_data.get_close_matrix(list(tickers) + [benchmark], bars.default_period(interval), interval)
+        closes = fetched[[t for t in fetched.columns if t in tickers]]
+        response, fig = FinancialAnalyzer.get_comparison_analysis(tickers, closes=closes)
         
         # Phase 2: Add Correlation Heatmap
-        corr_fig = FinancialAnalyzer.get_correlation_heatmap(tickers)
-        SharedState.latest_corr_fig = corr_fig
+        corr_fig = FinancialAnalyzer.get_correlation_heatmap(tickers, closes=closes)
         
-        # Reset signals/fundamentals for multi-view to avoid confusion
-        SharedState.latest_signals = []
-        SharedState.latest_fundamentals = {}
-        SharedState.latest_whale_data = {}
+        # Phase 3: Portfolio risk (equal weight), beta against the benchmark; annualized from daily bars only
+        risk = {}
+        if interval == "1d":
+            try:
+                with telemetry.span("engine.risk"):
+                    risk = portfolio_risk.comparison_risk(closes, fetched[benchmark] if benchmark in fetched.columns else None)
+                response += portfolio_risk.format_risk_markdown(risk)
+            except Exception:
+                risk = {}
         
-        return response, fig
+        # Signals/fundamentals stay empty for multi-view to avoid confusion
+        return AnalysisResult.build(query=query, tickers=tickers, response=response, fig=fig, corr_fig=corr_fig, risk=risk)
 
-class SharedState:
-    latest_fig = None
-    latest_signals = []
-    latest_fundamentals = {}
-    latest_whale_data = {}
-    latest_corr_fig = None
-    latest_tickers = []
+    @staticmethod
+    def run_screener(watchlist, period="1y"):
+        """Universe-wide scan_signals screen; returns a ranked table of tickers that fired."""
+        return screener.screen_universe(watchlist, period=period)
 
 def run_deterministic_analysis(query):
-    SharedState.latest_fig = None
-    SharedState.latest_signals = []
-    SharedState.latest_fundamentals = {}
-    SharedState.latest_whale_data = {}
-    SharedState.latest_corr_fig = None
-    
-    response, fig = FinancialEngine.run_analysis(query)
-    SharedState.latest_fig = fig
-    return response
+    """Convenience wrapper kept for scripts; equivalent to FinancialEngine.run_analysis."""
+    return FinancialEngine.run_analysis(query)
 
 if __name__ == "__main__":
     res = run_deterministic_analysis("Tell me about Tesla")
-    print(res)
+    print(res.response)
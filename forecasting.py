@@ -0,0 +1,220 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import telemetry
+
+# Registry of forecaster classes by name (see register_forecaster)
+FORECASTERS = {}
+DEFAULT_FORECASTER = "random_forest"
+
+# Fitted models kept in memory, keyed by (ticker, first bar, last bar, model, params)
+MAX_CACHED_MODELS = 256
+
+
+def register_forecaster(name):
+    """Class decorator that makes a Forecaster available by name."""
+    def wrap(cls):
+        cls.name = name
+        FORECASTERS[name] = cls
+        return cls
+    return wrap
+
+
+class Forecaster:
+    """Fits on a close-price history and predicts on bar indices (0 = first bar)."""
+
+    defaults = {}
+    # Registry name get_fitted() uses instead when fit() rejects the history (ValueError) or its artifact is missing
+    fallback = None
+
+    def __init__(self, **params):
+        self.params = {**self.defaults, **params}
+
+    def fit(self, close):
+        raise NotImplementedError
+
+    def predict(self, idx):
+        raise NotImplementedError
+
+
+@register_forecaster("linear")
+class LinearTrendForecaster(Forecaster):
+    """Least-squares straight line through the closes."""
+
+    def fit(self, close):
+        x = np.arange(len(close), dtype=float)
+        self.slope, self.intercept = np.polyfit(x, close, 1)
+        return self
+
+    def predict(self, idx):
+        return self.intercept + self.slope * np.asarray(idx, dtype=float)
+
+
+@register_forecaster("log_linear")
+class LogLinearTrendForecaster(Forecaster):
+    """Constant-growth trend: a straight line through log prices."""
+
+    def fit(self, close):
+        x = np.arange(len(close), dtype=float)
+        self.slope, self.intercept = np.polyfit(x, np.log(close), 1)
+        return self
+
+    def predict(self, idx):
+        return np.exp(self.intercept + self.slope * np.asarray(idx, dtype=float))
+
+
+@register_forecaster("ewma_drift")
+class EWMADriftForecaster(Forecaster):
+    """Exponentially smoothed level, extrapolated with the smoothed per-bar drift."""
+
+    defaults = {"span": 20}
+
+    def fit(self, close):
+        span = self.params["span"]
+        series = pd.Series(close, dtype=float)
+        self.level = series.ewm(span=span, adjust=False).mean().to_numpy()
+        self.drift = float(series.diff().ewm(span=span, adjust=False).mean().iloc[-1])
+        return self
+
+    def predict(self, idx):
+        idx = np.asarray(idx)
+        last = len(self.level) - 1
+        in_sample = self.level[np.clip(idx, 0, last)]
+        projected = self.level[-1] + self.drift * (idx - last)
+        return np.where(idx <= last, in_sample, projected)
+
+
+@register_forecaster("random_forest")
+class RandomForestForecaster(Forecaster):
+    """Random forest on the bar index, trained on next-bar closes after the SMA200 warm-up."""
+
+    defaults = {"n_estimators": 100, "random_state": 42, "n_jobs": -1, "warmup": 199}
+
+    def fit(self, close):
+        from sklearn.ensemble import RandomForestRegressor
+        params = dict(self.params)
+        warmup = min(params.pop("warmup"), max(len(close) - 2, 0))
+        # Features are the real bar indices, so in-sample and future predictions share one axis
+        X = np.arange(warmup, len(close) - 1).reshape(-1, 1)
+        y = np.asarray(close[warmup + 1:], dtype=float)
+        self.model = RandomForestRegressor(**params)
+        self.model.fit(X, y)
+        return self
+
+    def predict(self, idx):
+        return self.model.predict(np.asarray(idx).reshape(-1, 1))
+
+
+@register_forecaster("pooled")
+class PooledForecaster(Forecaster):
+    """Ridge model trained offline across a universe (pooled_model.py); fit only loads it and predicts.
+
+    In-sample values are the one-bar-ahead predictions; the projection covers the model's horizon
+    and continues at its last-horizon growth rate beyond that.
+    """
+
+    defaults = {"path": None}
+    fallback = DEFAULT_FORECASTER
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        import pooled_model
+        # Part of the fit-cache key, so fits from a replaced artifact are never reused; the
+        # weights themselves are only mapped on the first fit (cache hits never touch them)
+        self.params["artifact"] = pooled_model.version(self.params["path"])
+        self.model = None
+
+    def fit(self, close):
+        if self.model is None:
+            import pooled_model
+            self.model = pooled_model.load(self.params["path"])
+        close = np.asarray(close, dtype=float)
+        X = self.model.features(close)
+        valid = np.isfinite(X).all(axis=1)
+        if not valid[-1]:
+            raise ValueError(f"The pooled model needs at least {self.model.warmup + 1} bars")
+        rows = np.flatnonzero(valid[:-1])
+        self.trend = close.copy()
+        self.trend[rows + 1] = close[rows] * np.exp(self.model.predict_log_returns(X[rows], horizon=1))
+        self.growth = np.asarray(self.model.predict_log_returns(X[-1:])[0])
+        self.last_close = close[-1]
+        return self
+
+    def predict(self, idx):
+        idx = np.asarray(idx)
+        last, horizon = len(self.trend) - 1, len(self.growth)
+        ahead = idx - last
+        growth = np.where(ahead <= horizon, self.growth[np.clip(ahead - 1, 0, horizon - 1)],
+                          self.growth[-1] * ahead / horizon)
+        return np.where(ahead <= 0, self.trend[np.clip(idx, 0, last)], self.last_close * np.exp(growth))
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_fit_locks = {}
+
+
+def default_forecaster(interval="1d"):
+    """The pooled model when a trained artifact exists (it is trained on daily bars), else DEFAULT_FORECASTER."""
+    if interval == "1d":
+        import pooled_model
+        if pooled_model.available():
+            return "pooled"
+    return DEFAULT_FORECASTER
+
+
+def get_forecaster(name, **params):
+    """Unfitted forecaster instance by registry name."""
+    if name not in FORECASTERS:
+        raise ValueError(f"Unknown forecaster '{name}'. Available: {', '.join(sorted(FORECASTERS))}")
+    return FORECASTERS[name](**params)
+
+
+def get_fitted(name, ticker, close, first_bar, last_bar, **params):
+    """Returns a fitted model, fitting at most once per (ticker, bar range, model, params).
+
+    Concurrent callers asking for the same key wait on the first fit instead of refitting. A
+    model with a fallback that cannot fit this history (e.g. pooled on a short one) is replaced
+    by its fallback, fitted with that model's defaults.
+    """
+    forecaster = get_forecaster(name, **params)
+    key = (ticker, str(first_bar), str(last_bar), name, tuple(sorted(forecaster.params.items())))
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            telemetry.cache_event("forecast", "hits")
+            return _cache[key]
+        fit_lock = _fit_locks.setdefault(key, threading.Lock())
+
+    with fit_lock:
+        with _cache_lock:
+            if key in _cache:
+                telemetry.cache_event("forecast", "hits")
+                return _cache[key]
+        telemetry.cache_event("forecast", "misses")
+        model = None
+        try:
+            with telemetry.span("forecast.fit", model=name):
+                model = forecaster.fit(np.asarray(close, dtype=float))
+        except (ValueError, FileNotFoundError):
+            if forecaster.fallback is None:
+                raise
+        finally:
+            # Whatever fit() raised, the key's lock must not outlive this attempt
+            with _cache_lock:
+                if model is not None:
+                    _cache[key] = model
+                    while len(_cache) > MAX_CACHED_MODELS:
+                        _cache.popitem(last=False)
+                _fit_locks.pop(key, None)
+    if model is None:
+        telemetry.count("forecast_fallbacks_total", model=name)
+        return get_fitted(forecaster.fallback, ticker, close, first_bar, last_bar)
+    return model
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
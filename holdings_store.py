@@ -0,0 +1,416 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Persisted store (two Parquet files: holders + insiders)
+HOLDINGS_DIR = os.environ.get(
+    "QUANT_HOLDINGS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "holdings")
+)
+
+# Normalized columns; pct columns are fractions (0.05 == 5%)
+HOLDER_COLUMNS = ["Ticker", "Holder", "Rank", "pctHeld", "Shares", "Value", "pctChange", "Date Reported"]
+INSIDER_COLUMNS = ["Ticker", "Insider", "Position", "Text", "Shares", "Value", "Start Date", "Rank"]
+_TEXT_COLUMNS = {"Ticker", "Holder", "Insider", "Position", "Text"}
+_DATE_COLUMNS = {"Date Reported", "Start Date"}
+
+
+def _find_column(cols, keys, exclude=()):
+    return next((c for c in cols if any(k in c.lower() for k in keys) and c not in exclude), None)
+
+
+def _dates(df, col):
+    if col is None:
+        return np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+    # Mixed or tz-aware stamps become naive UTC
+    return pd.to_datetime(df[col], errors="coerce", utc=True).dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+
+def _empty(columns):
+    return {c: np.empty(0, dtype=object if c in _TEXT_COLUMNS else
+                        ("datetime64[ns]" if c in _DATE_COLUMNS else np.float64)) for c in columns}
+
+
+def _numeric(df, col):
+    if col is None:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def normalize_holders(ticker, df, market_cap=0):
+    """Institutional-holder frame -> HOLDER_COLUMNS arrays, whatever yfinance named the columns this release."""
+    if df is None or df.empty:
+        return _empty(HOLDER_COLUMNS)
+    cols = list(df.columns)
+    holder_col = _find_column(cols, ['holder', 'entity', 'institution'])
+    change_col = _find_column(cols, ['change'])
+    own_col = _find_column(cols, ['%', 'pct', 'held', 'out'], exclude={change_col})
+    val_col = _find_column(cols, ['value'])
+    shares_col = _find_column(cols, ['shares', 'position'])
+    date_col = _find_column(cols, ['date'])
+
+    pct = _numeric(df, own_col)
+    # Values of 1 or more are already percentages
+    pct = np.where(pct >= 1.0, pct / 100, pct)
+    value = _numeric(df, val_col)
+    if market_cap and market_cap > 0:
+        # Ownership fallback: position value over market cap
+        pct = np.where(np.isnan(pct), value / market_cap, pct)
+
+    n = len(df)
+    return {
+        "Ticker": np.full(n, ticker, dtype=object),
+        "Holder": df[holder_col].astype(str).to_numpy(dtype=object) if holder_col else np.full(n, "Unknown Holder", dtype=object),
+        "Rank": np.arange(n, dtype=np.float64),
+        "pctHeld": pct,
+        "Shares": _numeric(df, shares_col),
+        "Value": value,
+        "pctChange": _numeric(df, change_col),
+        "Date Reported": _dates(df, date_col),
+    }
+
+
+def normalize_insiders(ticker, df):
+    """Insider-transaction frame -> INSIDER_COLUMNS arrays."""
+    if df is None or df.empty:
+        return _empty(INSIDER_COLUMNS)
+    n = len(df)
+
+    def text(col, default):
+        if col not in df.columns:
+            return np.full(n, default, dtype=object)
+        return df[col].fillna(default).astype(str).to_numpy(dtype=object)
+
+    return {
+        "Ticker": np.full(n, ticker, dtype=object),
+        "Insider": text("Insider", "Insider"),
+        "Position": text("Position", "Insider"),
+        "Text": text("Text", "Trade"),
+        "Shares": _numeric(df, "Shares" if "Shares" in df.columns else None),
+        "Value": _numeric(df, "Value" if "Value" in df.columns else None),
+        "Start Date": _dates(df, "Start Date" if "Start Date" in df.columns else None),
+        "Rank": np.arange(n, dtype=np.float64),
+    }
+
+
+def format_ownership(pct):
+    return f"{pct * 100:.2f}%" if pct == pct else "N/A"
+
+
+def _group(codes, rows):
+    """code -> the given row positions holding it (ascending), via one sorted split."""
+    order = np.argsort(codes[rows], kind="stable")
+    uniq, starts = np.unique(codes[rows][order], return_index=True)
+    return dict(zip(uniq.tolist(), np.split(rows[order], starts[1:])))
+
+
+class _Table:
+    """Dict of equal-length numpy columns; text columns are stored as int32 codes into one shared vocabulary.
+
+    Replaced rows are only marked dead (and compacted away once they outnumber the live ones),
+    so row positions stay put and the group indexes can be patched instead of rebuilt.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.data = {c: np.empty(0, dtype=np.int32 if c in _TEXT_COLUMNS else
+                                 ("datetime64[ns]" if c in _DATE_COLUMNS else np.float64)) for c in columns}
+        self.live = np.empty(0, dtype=bool)
+        self._dead = 0
+        self._groups = {}
+
+    def __len__(self):
+        return len(self.live) - self._dead
+
+    def rows(self):
+        """Positions of every live row."""
+        return np.flatnonzero(self.live)
+
+    def replace(self, ticker_codes, columns, encode):
+        """Drops every row of the given tickers and appends the normalized column arrays."""
+        by_ticker = self.rows_by("Ticker")
+        parts = [by_ticker[c] for c in np.asarray(ticker_codes).tolist() if c in by_ticker]
+        old = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        start = len(self.live)
+        for c in self.columns:
+            new = encode(columns[c]) if c in _TEXT_COLUMNS else np.asarray(columns[c], dtype=self.data[c].dtype)
+            self.data[c] = np.concatenate([self.data[c], new])
+        self.live = np.concatenate([self.live, np.ones(len(self.data["Ticker"]) - start, dtype=bool)])
+        self.live[old] = False
+        self._dead += len(old)
+
+        if self._dead > len(self):
+            for c in self.columns:
+                self.data[c] = self.data[c][self.live]
+            self.live = np.ones(len(self), dtype=bool)
+            self._dead = 0
+            self._groups = {}
+            return
+        # Patch only the groups the dropped and appended rows belong to
+        added = np.arange(start, len(self.live))
+        for column, groups in self._groups.items():
+            for code in np.unique(self.data[column][old]).tolist():
+                rows = groups[code][self.live[groups[code]]]
+                if len(rows):
+                    groups[code] = rows
+                else:
+                    del groups[code]
+            for code, rows in _group(self.data[column], added).items():
+                groups[code] = np.concatenate([groups[code], rows]) if code in groups else rows
+
+    def rows_by(self, column):
+        """code -> live row positions, built once and then patched by replace()."""
+        if column not in self._groups:
+            self._groups[column] = _group(self.data[column], self.rows())
+        return self._groups[column]
+
+    def frame(self, rows, decode):
+        return pd.DataFrame({c: decode(self.data[c][rows]) if c in _TEXT_COLUMNS else self.data[c][rows]
+                             for c in self.columns})
+
+
+class HoldingsStore:
+    """Columnar holders/insider store for a whole universe, indexed by ticker and by holder.
+
+    Each ingest replaces the ticker's previous snapshot, unless it is handed the very frames
+    (and market cap) that snapshot came from, e.g. a TTL-cache hit. Strings are interned once, so
+    cross-ticker queries are integer group-bys (np.bincount) over the index instead of
+    per-ticker refetches and iterrows.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._strings = []
+        self._codes = {}
+        self.holders = _Table(HOLDER_COLUMNS)
+        self.insiders = _Table(INSIDER_COLUMNS)
+        # ticker -> (holders_df, insiders_df, market_cap) of its current snapshot
+        self._sources = {}
+
+    # --- strings ---
+    def _encode(self, values):
+        codes = self._codes
+        out = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            code = codes.get(v)
+            if code is None:
+                code = codes[v] = len(self._strings)
+                self._strings.append(v)
+            out[i] = code
+        return out
+
+    def _decode(self, codes):
+        strings = self._strings
+        return np.array([strings[c] for c in codes.tolist()], dtype=object)
+
+    # --- ingest ---
+    def ingest(self, ticker, holders_df, insiders_df, market_cap=0):
+        self.ingest_many({ticker: (holders_df, insiders_df)}, {ticker: market_cap})
+
+    def ingest_many(self, frames, market_caps=None):
+        """frames maps ticker -> (institutional_holders, insider_transactions) as yfinance returns them."""
+        market_caps = {t.upper(): cap for t, cap in (market_caps or {}).items()}
+        sources = {}
+        for ticker, (holders_df, insiders_df) in frames.items():
+            cap = market_caps.get(ticker.upper(), 0)
+            sources[ticker.upper()] = (holders_df, insiders_df, cap if isinstance(cap, (int, float)) else 0)
+        with self._lock:
+            sources = {t: src for t, src in sources.items() if not self._unchanged(t, src)}
+        if not sources:
+            return
+        holders, insiders = [], []
+        for ticker, (holders_df, insiders_df, cap) in sources.items():
+            holders.append(normalize_holders(ticker, holders_df, cap))
+            insiders.append(normalize_insiders(ticker, insiders_df))
+        holders = {c: np.concatenate([h[c] for h in holders]) for c in HOLDER_COLUMNS} if holders else _empty(HOLDER_COLUMNS)
+        insiders = {c: np.concatenate([i[c] for i in insiders]) for c in INSIDER_COLUMNS} if insiders else _empty(INSIDER_COLUMNS)
+        with self._lock:
+            tickers = self._encode(list(sources))
+            self.holders.replace(tickers, holders, self._encode)
+            self.insiders.replace(tickers, insiders, self._encode)
+            self._sources.update(sources)
+
+    def _unchanged(self, ticker, source):
+        current = self._sources.get(ticker)
+        return (current is not None and current[0] is source[0] and current[1] is source[1]
+                and current[2] == source[2])
+
+    # --- per-ticker ---
+    def _rows(self, table, column, name):
+        code = self._codes.get(name)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return table.rows_by(column).get(code, np.empty(0, dtype=np.int64))
+
+    def holders_of(self, ticker):
+        with self._lock:
+            rows = self._rows(self.holders, "Ticker", ticker.upper())
+            rows = rows[np.argsort(self.holders.data["Rank"][rows], kind="stable")]
+            return self.holders.frame(rows, self._decode).reset_index(drop=True)
+
+    def has_ticker(self, ticker):
+        with self._lock:
+            code = self._codes.get(ticker.upper())
+            return code is not None and (code in self.holders.rows_by("Ticker") or code in self.insiders.rows_by("Ticker"))
+
+    def whale_panel(self, ticker, limit=5):
+        """Rows for the whale panel: top holders (in reported order) and the latest insider trades."""
+        with self._lock:
+            ticker = ticker.upper()
+            h_rows = self._rows(self.holders, "Ticker", ticker)
+            h_rows = h_rows[np.argsort(self.holders.data["Rank"][h_rows], kind="stable")][:limit]
+            i_rows = self._rows(self.insiders, "Ticker", ticker)
+            i_rows = i_rows[np.argsort(self.insiders.data["Rank"][i_rows], kind="stable")][:limit]
+            names = self._decode(self.holders.data["Holder"][h_rows])
+            pct = self.holders.data["pctHeld"][h_rows]
+            texts = self._decode(self.insiders.data["Text"][i_rows])
+            positions = self._decode(self.insiders.data["Position"][i_rows])
+        return {
+            "holders": [{"Holder": n, "Ownership": format_ownership(p)} for n, p in zip(names, pct)],
+            "insiders": [{"Text": f"{t} ({p})"} for t, p in zip(texts, positions)],
+        }
+
+    # --- cross-ticker ---
+    def top_holders(self, n=10, tickers=None):
+        """Holders ranked by total reported value across the universe (or a subset of tickers)."""
+        with self._lock:
+            data = self.holders.data
+            rows = self.holders.rows()
+            if tickers is not None:
+                codes = [self._codes[t.upper()] for t in tickers if t.upper() in self._codes]
+                rows = rows[np.isin(data["Ticker"], codes)]
+            if not len(rows):
+                return pd.DataFrame(columns=["Holder", "Positions", "Total Value", "Avg pctHeld"])
+            holder = data["Holder"][rows]
+            uniq, inverse = np.unique(holder, return_inverse=True)
+            value = np.nan_to_num(data["Value"][rows])
+            pct = data["pctHeld"][rows]
+            has_pct = ~np.isnan(pct)
+            positions = np.bincount(inverse)
+            total = np.bincount(inverse, weights=value)
+            pct_sum = np.bincount(inverse, weights=np.where(has_pct, pct, 0.0))
+            pct_n = np.bincount(inverse, weights=has_pct)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                avg_pct = pct_sum / pct_n
+            order = np.lexsort((-positions, -total))[:n]
+            return pd.DataFrame({
+                "Holder": self._decode(uniq[order]),
+                "Positions": positions[order],
+                "Total Value": total[order],
+                "Avg pctHeld": avg_pct[order],
+            })
+
+    def _holder_codes(self, holder):
+        """Exact (case-insensitive) holder name, else every holder whose name contains the text."""
+        needle = holder.lower()
+        names = {self._strings[c]: c for c in self.holders.rows_by("Holder")}
+        exact = [c for name, c in names.items() if name.lower() == needle]
+        return exact or [c for name, c in names.items() if needle in name.lower()]
+
+    def positions_of(self, holder):
+        """Every position of a holder across the universe, largest value first."""
+        with self._lock:
+            groups = self.holders.rows_by("Holder")
+            parts = [groups[c] for c in self._holder_codes(holder)]
+            rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            rows = rows[np.argsort(-np.nan_to_num(self.holders.data["Value"][rows]), kind="stable")]
+            return self.holders.frame(rows, self._decode).reset_index(drop=True)
+
+    def increased_by(self, holder, min_change=0.0):
+        """Tickers where a holder's last reported change in position is above min_change (a fraction)."""
+        positions = self.positions_of(holder)
+        increased = positions[positions["pctChange"] > min_change]
+        return increased.sort_values("pctChange", ascending=False).reset_index(drop=True)
+
+    # --- persistence ---
+    def save(self, directory=HOLDINGS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tables = {"holders": self.holders, "insiders": self.insiders}
+            for name, table in tables.items():
+                frame = table.frame(table.rows(), self._decode)
+                path = os.path.join(directory, f"{name}.parquet")
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                frame.to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, directory=HOLDINGS_DIR):
+        store = cls()
+        frames = {}
+        for name, columns in (("holders", HOLDER_COLUMNS), ("insiders", INSIDER_COLUMNS)):
+            path = os.path.join(directory, f"{name}.parquet")
+            if os.path.exists(path):
+                frame = pd.read_parquet(path)
+                frames[name] = {c: frame[c].to_numpy(dtype=object if c in _TEXT_COLUMNS else None) for c in columns}
+            else:
+                frames[name] = _empty(columns)
+        tickers = list(dict.fromkeys(frames["holders"]["Ticker"].tolist() + frames["insiders"]["Ticker"].tolist()))
+        with store._lock:
+            codes = store._encode(tickers)
+            store.holders.replace(codes, frames["holders"], store._encode)
+            store.insiders.replace(codes, frames["insiders"], store._encode)
+        return store
+
+
+def ingest_universe(store, tickers, fetch, market_caps=None, workers=8):
+    """Fetches holder/insider frames for every ticker concurrently and ingests them in one batch.
+
+    fetch(ticker) -> (institutional_holders, insider_transactions). Tickers whose fetch fails are
+    skipped and returned, so one bad symbol does not sink the watchlist.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    frames, failed = {}, []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tickers)))) as pool:
+        futures = {t: pool.submit(fetch, t) for t in tickers}
+        for t, future in futures.items():
+            try:
+                frames[t] = future.result()
+            except Exception:
+                failed.append(t)
+    store.ingest_many(frames, market_caps)
+    return failed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store, starting from the persisted snapshot if there is one."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = HoldingsStore.load()
+            except Exception:
+                _store = HoldingsStore()
+        return _store
+
+
+def set_store(store):
+    global _store
+    with _store_lock:
+        _store = store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python holdings_store.py <watchlist.txt> [holder name]")
+        sys.exit(1)
+    import screener
+    from quant_utils import FinancialAnalyzer
+
+    store = get_store()
+    failed = ingest_universe(store, screener.load_watchlist(sys.argv[1]), FinancialAnalyzer.fetch_whale_frames)
+    store.save()
+    if failed:
+        print(f"Skipped (fetch failed): {', '.join(failed)}")
+    if len(sys.argv) > 2:
+        table = store.increased_by(sys.argv[2])
+        print(table.to_string(index=False) if not table.empty else f"No increased positions for {sys.argv[2]}.")
+    else:
+        print(store.top_holders(20).to_string(index=False))
@@ -0,0 +1,330 @@
+import math
+from array import array
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Rule table shared by scan_signals, the screener and the backtester
+SIGNAL_RULES = [
+    {"key": "golden_cross", "type": "BULLISH", "label": "Golden Cross", "desc": "50-day average crossed above 200-day."},
+    {"key": "death_cross", "type": "BEARISH", "label": "Death Cross", "desc": "50-day average crossed below 200-day."},
+    {"key": "overbought", "type": "WARNING", "label": "Overbought (RSI)", "desc": "Market momentum may be over-extended."},
+    {"key": "oversold", "type": "BULLISH", "label": "Oversold (RSI)", "desc": "Price may be undervalued in the short term."},
+]
+
+# Upper bound for the temporary window stack built by rolling_std, in bytes
+_STD_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def as_matrix(values, dtype=np.float64):
+    """Contiguous dates x tickers array; 1-D input becomes a single column."""
+    arr = np.ascontiguousarray(values, dtype=dtype)
+    if arr.ndim == 1:
+        arr = arr[:, None]
+    return arr
+
+
+def _rolling_sums(arr, window):
+    """Window sums and valid-value counts via cumulative sums (accumulated in float64)."""
+    valid = np.isfinite(arr)
+    csum = np.zeros((arr.shape[0] + 1, arr.shape[1]), dtype=np.float64)
+    np.cumsum(np.where(valid, arr, 0.0), axis=0, out=csum[1:])
+    ccount = np.zeros((arr.shape[0] + 1, arr.shape[1]), dtype=np.int64)
+    np.cumsum(valid, axis=0, out=ccount[1:])
+    return csum[window:] - csum[:-window], ccount[window:] - ccount[:-window]
+
+
+def sma(values, window, dtype=np.float64):
+    """Simple moving average per column; NaN until a full window of valid values (pandas min_periods=window)."""
+    arr = as_matrix(values, dtype)
+    out = np.full(arr.shape, np.nan, dtype=dtype)
+    if arr.shape[0] < window:
+        return out
+    sums, counts = _rolling_sums(arr, window)
+    out[window - 1:] = np.where(counts == window, sums / window, np.nan)
+    return out
+
+
+def rolling_std(values, window, ddof=1, dtype=np.float64):
+    """Rolling sample standard deviation per column from strided windows, processed in column blocks."""
+    arr = as_matrix(values, dtype)
+    n, k = arr.shape
+    out = np.full(arr.shape, np.nan, dtype=dtype)
+    if n < window:
+        return out
+
+    rows = n - window + 1
+    block = max(1, _STD_BLOCK_BYTES // max(rows * window * 8, 1))
+    for c0 in range(0, k, block):
+        cols = arr[:, c0:c0 + block]
+        # View of shape (rows, cols, window) without copying the data
+        windows = sliding_window_view(cols, window, axis=0)
+        with np.errstate(invalid="ignore"):
+            out[window - 1:, c0:c0 + block] = windows.std(axis=-1, ddof=ddof, dtype=np.float64)
+    # NaN anywhere in the window already propagates through std()
+    return out
+
+
+def rsi(values, window=14, dtype=np.float64):
+    """Relative Strength Index with simple (not Wilder) averages of gains and losses."""
+    arr = as_matrix(values, dtype)
+    delta = np.full(arr.shape, np.nan, dtype=np.float64)
+    delta[1:] = arr[1:] - arr[:-1]
+    # Like Series.where(delta > 0, 0): the leading NaN counts as a zero move
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = sma(gain, window)
+    avg_loss = sma(loss, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out = 100 - (100 / (1 + rs))
+    return out.astype(dtype, copy=False)
+
+
+def compute_indicators(close, sma_fast=50, sma_slow=200, bb_window=20, rsi_window=14, dtype=np.float64):
+    """All dashboard indicators for a dates x tickers close matrix in one pass.
+
+    Bollinger bands are centred on the fast SMA, matching the chart.
+    """
+    arr = as_matrix(close, dtype)
+    fast = sma(arr, sma_fast, dtype)
+    slow = sma(arr, sma_slow, dtype)
+    std = rolling_std(arr, bb_window, dtype=dtype)
+    return {
+        "sma_fast": fast,
+        "sma_slow": slow,
+        "std": std,
+        "bb_upper": fast + std * 2,
+        "bb_lower": fast - std * 2,
+        "rsi": rsi(arr, rsi_window, dtype),
+    }
+
+
+def signal_masks(sma_fast, sma_slow, rsi_values, overbought=70.0, oversold=30.0):
+    """Boolean dates x tickers masks, one per SIGNAL_RULES key, for every bar."""
+    f, s, r = as_matrix(sma_fast), as_matrix(sma_slow), as_matrix(rsi_values)
+    golden = np.zeros(f.shape, dtype=bool)
+    death = np.zeros(f.shape, dtype=bool)
+    golden[1:] = (f[:-1] < s[:-1]) & (f[1:] > s[1:])
+    death[1:] = (f[:-1] > s[:-1]) & (f[1:] < s[1:])
+    return {
+        "golden_cross": golden,
+        "death_cross": death,
+        "overbought": r > overbought,
+        "oversold": r < oversold,
+    }
+
+
+def latest_signal_flags(sma_fast, sma_slow, rsi_values, overbought=70.0, oversold=30.0):
+    """Rule flags on the last bar only (one boolean per ticker), using just the last two rows."""
+    masks = signal_masks(as_matrix(sma_fast)[-2:], as_matrix(sma_slow)[-2:], as_matrix(rsi_values)[-2:],
+                         overbought, oversold)
+    return {key: mask[-1] for key, mask in masks.items()}
+
+
+def signals_for_column(flags, col=0):
+    """Turns latest_signal_flags output into scan_signals-style dicts for one ticker column."""
+    return [
+        {"type": rule["type"], "label": rule["label"], "desc": rule["desc"]}
+        for rule in SIGNAL_RULES if flags[rule["key"]][col]
+    ]
+
+
+def evaluate_rules(prev_fast, prev_slow, fast, slow, rsi_value, overbought=70.0, oversold=30.0):
+    """Scalar form of signal_masks for a single bar; NaN inputs never fire."""
+    return {
+        "golden_cross": prev_fast < prev_slow and fast > slow,
+        "death_cross": prev_fast > prev_slow and fast < slow,
+        "overbought": rsi_value > overbought,
+        "oversold": rsi_value < oversold,
+    }
+
+
+class IndicatorState:
+    """Constant-time indicator state for one ticker, updated bar by bar.
+
+    Keeps the last closes in a ring buffer plus running sums for both SMAs,
+    the Bollinger std and the RSI gain/loss averages. Values match
+    compute_indicators on the same history; to_dict/from_dict round-trip
+    through JSON so the state survives restarts.
+    """
+
+    __slots__ = (
+        "sma_fast_window", "sma_slow_window", "bb_window", "rsi_window",
+        "overbought", "oversold",
+        "_closes", "_gains", "_losses", "_count", "_last_close",
+        "_sum_fast", "_sum_slow", "_anchor", "_sum_bb", "_sumsq_bb",
+        "_sum_gain", "_sum_loss", "_prev_fast", "_prev_slow", "_since_resync",
+    )
+
+    # Running sums are rebuilt from the ring buffers this often to stop float drift
+    RESYNC_EVERY = 1024
+
+    def __init__(self, sma_fast=50, sma_slow=200, bb_window=20, rsi_window=14, overbought=70.0, oversold=30.0):
+        self.sma_fast_window = sma_fast
+        self.sma_slow_window = sma_slow
+        self.bb_window = bb_window
+        self.rsi_window = rsi_window
+        self.overbought = overbought
+        self.oversold = oversold
+        size = max(sma_fast, sma_slow, bb_window)
+        self._closes = array("d", [0.0]) * size
+        self._gains = array("d", [0.0]) * rsi_window
+        self._losses = array("d", [0.0]) * rsi_window
+        self._count = 0
+        self._last_close = math.nan
+        self._sum_fast = self._sum_slow = 0.0
+        self._anchor = self._sum_bb = self._sumsq_bb = 0.0
+        self._sum_gain = self._sum_loss = 0.0
+        self._prev_fast = self._prev_slow = math.nan
+        self._since_resync = 0
+
+    @classmethod
+    def from_history(cls, closes, **params):
+        """Seeds a state by replaying an existing close history."""
+        state = cls(**params)
+        for close in closes:
+            state.update(close)
+        return state
+
+    def _close_ago(self, lag):
+        """Close from `lag` bars before the newest one (0 = newest)."""
+        return self._closes[(self._count - 1 - lag) % len(self._closes)]
+
+    def update(self, close):
+        """Applies one new bar and returns the scan_signals-style signals that fire on it."""
+        close = float(close)
+        if not math.isfinite(close):
+            raise ValueError(f"Close must be finite, got {close}")
+
+        self._prev_fast, self._prev_slow = self.sma_fast, self.sma_slow
+        n = self._count
+        size = len(self._closes)
+
+        # 1. Values leaving each window (read before the ring slot is overwritten)
+        if n >= self.sma_fast_window:
+            self._sum_fast -= self._close_ago(self.sma_fast_window - 1)
+        if n >= self.sma_slow_window:
+            self._sum_slow -= self._close_ago(self.sma_slow_window - 1)
+        if n >= self.bb_window:
+            old = self._close_ago(self.bb_window - 1) - self._anchor
+            self._sum_bb -= old
+            self._sumsq_bb -= old * old
+        if n == 0:
+            self._anchor = close
+
+        # 2. Gain/loss ring (the first bar counts as a zero move, as in rsi())
+        delta = close - self._last_close if n else 0.0
+        slot = n % self.rsi_window
+        if n >= self.rsi_window:
+            self._sum_gain -= self._gains[slot]
+            self._sum_loss -= self._losses[slot]
+        self._gains[slot] = delta if delta > 0 else 0.0
+        self._losses[slot] = -delta if delta < 0 else 0.0
+        self._sum_gain += self._gains[slot]
+        self._sum_loss += self._losses[slot]
+
+        # 3. New close enters every window
+        self._closes[n % size] = close
+        self._count = n + 1
+        self._last_close = close
+        self._sum_fast += close
+        self._sum_slow += close
+        centred = close - self._anchor
+        self._sum_bb += centred
+        self._sumsq_bb += centred * centred
+
+        self._since_resync += 1
+        if self._since_resync >= self.RESYNC_EVERY:
+            self._resync()
+
+        return self.signals()
+
+    def _resync(self):
+        """Recomputes every running sum from the buffers (O(window), amortised O(1) per bar)."""
+        recent = [self._close_ago(i) for i in range(min(self._count, len(self._closes)))]
+        self._sum_fast = math.fsum(recent[:self.sma_fast_window])
+        self._sum_slow = math.fsum(recent[:self.sma_slow_window])
+        self._anchor = recent[0] if recent else 0.0
+        bb = [c - self._anchor for c in recent[:self.bb_window]]
+        self._sum_bb = math.fsum(bb)
+        self._sumsq_bb = math.fsum(c * c for c in bb)
+        filled = min(self._count, self.rsi_window)
+        self._sum_gain = math.fsum(self._gains[:filled])
+        self._sum_loss = math.fsum(self._losses[:filled])
+        self._since_resync = 0
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sma_fast(self):
+        return self._sum_fast / self.sma_fast_window if self._count >= self.sma_fast_window else math.nan
+
+    @property
+    def sma_slow(self):
+        return self._sum_slow / self.sma_slow_window if self._count >= self.sma_slow_window else math.nan
+
+    @property
+    def std(self):
+        w = self.bb_window
+        if self._count < w:
+            return math.nan
+        var = (self._sumsq_bb - self._sum_bb * self._sum_bb / w) / (w - 1)
+        return math.sqrt(max(var, 0.0))
+
+    @property
+    def bb_upper(self):
+        return self.sma_fast + self.std * 2
+
+    @property
+    def bb_lower(self):
+        return self.sma_fast - self.std * 2
+
+    @property
+    def rsi(self):
+        if self._count < self.rsi_window:
+            return math.nan
+        gain, loss = self._sum_gain, self._sum_loss
+        if loss == 0:
+            return 100.0 if gain > 0 else math.nan
+        return 100 - (100 / (1 + gain / loss))
+
+    def signals(self):
+        """scan_signals rules on the newest bar (needs a full slow-SMA history, like scan_signals)."""
+        if self._count < self.sma_slow_window:
+            return []
+        flags = evaluate_rules(self._prev_fast, self._prev_slow, self.sma_fast, self.sma_slow, self.rsi,
+                               self.overbought, self.oversold)
+        return signals_for_column({k: [v] for k, v in flags.items()})
+
+    def to_dict(self):
+        """JSON-serializable snapshot of the full state."""
+        return {
+            "params": {
+                "sma_fast": self.sma_fast_window, "sma_slow": self.sma_slow_window,
+                "bb_window": self.bb_window, "rsi_window": self.rsi_window,
+                "overbought": self.overbought, "oversold": self.oversold,
+            },
+            "count": self._count,
+            "last_close": None if math.isnan(self._last_close) else self._last_close,
+            "closes": list(self._closes),
+            "gains": list(self._gains),
+            "losses": list(self._losses),
+            "prev_fast": None if math.isnan(self._prev_fast) else self._prev_fast,
+            "prev_slow": None if math.isnan(self._prev_slow) else self._prev_slow,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restores a state written by to_dict; running sums are rebuilt from the buffers."""
+        state = cls(**data["params"])
+        state._closes = array("d", data["closes"])
+        state._gains = array("d", data["gains"])
+        state._losses = array("d", data["losses"])
+        state._count = data["count"]
+        state._last_close = math.nan if data["last_close"] is None else data["last_close"]
+        state._prev_fast = math.nan if data["prev_fast"] is None else data["prev_fast"]
+        state._prev_slow = math.nan if data["prev_slow"] is None else data["prev_slow"]
+        state._resync()
+        return state
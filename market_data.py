@@ -0,0 +1,387 @@
+import os
+import re
+import json
+import time
+import threading
+import pandas as pd
+import telemetry
+import rate_limit
+import bars
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Local columnar cache (one Parquet file + one small JSON sidecar per ticker)
+CACHE_DIR = os.environ.get(
+    "QUANT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ohlcv")
+)
+# How long a cached file is trusted before we ask upstream for newer bars
+CACHE_MAX_AGE = int(os.environ.get("QUANT_CACHE_MAX_AGE", 15 * 60))
+
+
+def period_start(period, now=None):
+    """Converts a yfinance-style period ('5d', '6mo', '1y', 'ytd', 'max') into a start date."""
+    now = pd.Timestamp(now or pd.Timestamp.now()).normalize()
+    period = str(period).strip().lower()
+    if period == "max":
+        return pd.Timestamp("1970-01-01")
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        "d": pd.DateOffset(days=n),
+        "wk": pd.DateOffset(weeks=n),
+        "mo": pd.DateOffset(months=n),
+        "y": pd.DateOffset(years=n),
+    }
+    return now - offsets[unit]
+
+
+def trading_day(now=None):
+    """Current US trading session date (New York time, weekends roll back to Friday)."""
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="America/New_York")
+    day = now.normalize().tz_localize(None) if now.tzinfo else now.normalize()
+    while day.weekday() >= 5:
+        day -= pd.Timedelta(days=1)
+    return day.date()
+
+
+def normalize_ohlcv(df):
+    """Flattens yfinance output into a tz-naive, Date-indexed OHLCV frame."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+    df = df.copy()
+    # Flatten MultiIndex columns if present (common in newer yfinance)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    if "Date" in df.columns:
+        df = df.set_index("Date")
+
+    df.index = pd.DatetimeIndex(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+
+    df = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df
+
+
+def _slice(df, start, end=None):
+    mask = df.index >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df.index < pd.Timestamp(end)
+    return df.loc[mask]
+
+
+class MarketDataProvider:
+    """Interface for anything that can serve OHLCV bars (daily unless another interval is asked for)."""
+
+    def fetch(self, ticker, start, end=None, interval="1d"):
+        """Returns a Date-indexed OHLCV frame covering [start, end)."""
+        raise NotImplementedError
+
+    def fetch_many(self, tickers, start, end=None, interval="1d"):
+        """Returns {ticker: frame}; sources with a native batch call should override this."""
+        return {t: self.fetch(t, start, end, interval) for t in tickers}
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live Yahoo Finance source."""
+
+    def fetch(self, ticker, start, end=None, interval="1d"):
+        import yfinance as yf
+        rate_limit.throttle("yfinance")
+        with telemetry.span("yfinance.download", batch="single"):
+            df = yf.download(ticker, start=start, end=end, interval=interval, threads=False, auto_adjust=True,
+                             progress=False)
+        return normalize_ohlcv(df)
+
+    def fetch_many(self, tickers, start, end=None, interval="1d"):
+        import yfinance as yf
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        # One batched request; yfinance fans out internally with threads=True
+        rate_limit.throttle("yfinance")
+        with telemetry.span("yfinance.download", batch="many"):
+            df = yf.download(tickers, start=start, end=end, interval=interval, threads=True, auto_adjust=True,
+                             progress=False, group_by="ticker")
+        frames = {}
+        for t in tickers:
+            if df is None or df.empty or not isinstance(df.columns, pd.MultiIndex) \
+                    or t not in df.columns.get_level_values(0):
+                frames[t] = normalize_ohlcv(None)
+                continue
+            # Union calendar: drop the rows that belong to other tickers only
+            frames[t] = normalize_ohlcv(df[t].dropna(how="all"))
+        return frames
+
+
+class FixtureProvider(MarketDataProvider):
+    """Offline stand-in for yfinance backed by in-memory frames or a folder of <TICKER>.csv/.parquet files.
+
+    Intraday bars live under "<TICKER>@<interval>" (e.g. AAPL@1m.csv).
+    """
+
+    def __init__(self, directory=None, frames=None):
+        self.directory = directory
+        self.frames = {self._key(*k.split("@")): normalize_ohlcv(v) for k, v in (frames or {}).items()}
+
+    @staticmethod
+    def _key(ticker, interval="1d"):
+        return ticker.upper() if interval == "1d" else f"{ticker.upper()}@{interval}"
+
+    def _load(self, ticker, interval="1d"):
+        key = self._key(ticker, interval)
+        if key in self.frames:
+            return self.frames[key]
+        if self.directory:
+            for ext, reader in ((".parquet", pd.read_parquet), (".csv", pd.read_csv)):
+                path = os.path.join(self.directory, key + ext)
+                if os.path.exists(path):
+                    self.frames[key] = normalize_ohlcv(reader(path))
+                    return self.frames[key]
+        return normalize_ohlcv(None)
+
+    def fetch(self, ticker, start, end=None, interval="1d"):
+        return _slice(self._load(ticker, interval), start, end)
+
+
+class CachedProvider(MarketDataProvider):
+    """Wraps another provider with an incremental on-disk Parquet cache.
+
+    Only the missing date range is requested upstream and merged into the
+    ticker's file; fresh cache files are served straight from disk. Each interval has
+    its own files, and intraday files go stale after one bar at most.
+    """
+
+    def __init__(self, upstream, cache_dir=CACHE_DIR, max_age=CACHE_MAX_AGE):
+        self.upstream = upstream
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _paths(self, ticker, interval="1d"):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker.upper())
+        base = os.path.join(self.cache_dir, safe if interval == "1d" else f"{safe}@{interval}")
+        return base + ".parquet", base + ".json"
+
+    def _max_age(self, interval):
+        return self.max_age if interval == "1d" else min(self.max_age, bars.INTERVALS[interval])
+
+    def _load(self, ticker, interval="1d"):
+        data_path, meta_path = self._paths(ticker, interval)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            return pd.read_parquet(data_path), meta
+        except Exception:
+            # Corrupt or half-written cache entry: treat as a miss
+            return None, None
+
+    def _store(self, ticker, df, covered_from, interval="1d"):
+        data_path, meta_path = self._paths(ticker, interval)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Unique temp names so concurrent writers never clobber each other's half-written file
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(data_path + suffix)
+        os.replace(data_path + suffix, data_path)
+        with open(meta_path + suffix, "w") as fh:
+            json.dump({"start": covered_from.isoformat(), "fetched_at": time.time()}, fh)
+        os.replace(meta_path + suffix, meta_path)
+
+    @staticmethod
+    def _adjustment_changed(cached, tail):
+        """True when a split/dividend re-based history (an already-complete bar changed)."""
+        if len(cached) < 2:
+            return False
+        ref_date = cached.index[-2]
+        if ref_date not in tail.index:
+            return False
+        old, new = float(cached.at[ref_date, "Close"]), float(tail.at[ref_date, "Close"])
+        return abs(new - old) > 1e-6 * max(abs(old), 1.0)
+
+    def fetch(self, ticker, start, end=None, interval="1d"):
+        start = pd.Timestamp(start).normalize()
+        with self._lock(f"{ticker.upper()}@{interval}"):
+            cached, meta = self._load(ticker, interval)
+
+            if cached is None or cached.empty:
+                telemetry.cache_event("ohlcv", "misses")
+                merged = self.upstream.fetch(ticker, start, interval=interval)
+                covered_from = start
+            else:
+                covered_from = pd.Timestamp(meta["start"])
+                fresh = time.time() - meta["fetched_at"] < self._max_age(interval)
+                closed_range = end is not None and pd.Timestamp(end) <= cached.index[-1]
+                if start >= covered_from and (fresh or closed_range):
+                    telemetry.cache_event("ohlcv", "hits")
+                    return _slice(cached, start, end)
+                telemetry.cache_event("ohlcv", "stale")
+
+                try:
+                    frames = [cached]
+                    # 1. Head gap: caller wants history older than what we hold
+                    if start < covered_from:
+                        frames.insert(0, self.upstream.fetch(ticker, start, covered_from, interval))
+                        covered_from = start
+                    # 2. Tail gap: re-request from the last complete bar onwards
+                    if not fresh:
+                        tail_start = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+                        tail = self.upstream.fetch(ticker, tail_start, interval=interval)
+                        if self._adjustment_changed(cached, tail):
+                            frames = [self.upstream.fetch(ticker, covered_from, interval=interval)]
+                        else:
+                            frames.append(tail)
+                    merged = normalize_ohlcv(pd.concat([f for f in frames if not f.empty]))
+                except Exception:
+                    # Upstream unavailable: serve what we already have
+                    return _slice(cached, start, end)
+
+            if merged.empty:
+                return merged
+            self._store(ticker, merged, covered_from, interval)
+            return _slice(merged, start, end)
+
+    def fetch_many(self, tickers, start, end=None, interval="1d"):
+        """Serves fresh tickers from disk and fetches the rest in (at most) two batched upstream calls."""
+        start = pd.Timestamp(start).normalize()
+        results, missing, stale = {}, [], {}
+
+        for t in tickers:
+            cached, meta = self._load(t, interval)
+            if cached is None or cached.empty:
+                telemetry.cache_event("ohlcv", "misses")
+                missing.append(t)
+                continue
+            covered_from = pd.Timestamp(meta["start"])
+            fresh = time.time() - meta["fetched_at"] < self._max_age(interval)
+            closed_range = end is not None and pd.Timestamp(end) <= cached.index[-1]
+            if start < covered_from:
+                # Rare head gap: take the single-ticker path
+                results[t] = self.fetch(t, start, end, interval)
+            elif fresh or closed_range:
+                telemetry.cache_event("ohlcv", "hits")
+                results[t] = _slice(cached, start, end)
+            else:
+                telemetry.cache_event("ohlcv", "stale")
+                stale[t] = (cached, covered_from)
+
+        # 1. Tickers we have never seen: one batch over the full range
+        if missing:
+            try:
+                fetched = self.upstream.fetch_many(missing, start, interval=interval)
+            except Exception:
+                fetched = {}
+            for t in missing:
+                df = fetched.get(t)
+                if df is None or df.empty:
+                    results[t] = normalize_ohlcv(None)
+                    continue
+                self._store(t, df, start, interval)
+                results[t] = _slice(df, start, end)
+
+        # 2. Stale tickers: one batch from the oldest "last complete bar" onwards
+        if stale:
+            tail_start = min(c.index[-2] if len(c) > 1 else c.index[-1] for c, _ in stale.values())
+            try:
+                tails = self.upstream.fetch_many(list(stale), tail_start, interval=interval)
+            except Exception:
+                tails = {}
+            for t, (cached, covered_from) in stale.items():
+                tail = tails.get(t)
+                if tail is None or tail.empty:
+                    results[t] = _slice(cached, start, end)
+                    continue
+                if self._adjustment_changed(cached, tail):
+                    try:
+                        merged = self.upstream.fetch(t, covered_from, interval=interval)
+                    except Exception:
+                        merged = None
+                    if merged is None or merged.empty:
+                        # Re-based history unavailable for this ticker: serve what we have, like fetch()
+                        results[t] = _slice(cached, start, end)
+                        continue
+                else:
+                    merged = normalize_ohlcv(pd.concat([cached, tail]))
+                self._store(t, merged, covered_from, interval)
+                results[t] = _slice(merged, start, end)
+
+        return {t: results[t] for t in tickers}
+
+
+_provider = None
+
+
+def get_provider():
+    """Returns the process-wide provider (fixture folder if QUANT_FIXTURE_DIR is set, else cached yfinance)."""
+    global _provider
+    if _provider is None:
+        fixture_dir = os.environ.get("QUANT_FIXTURE_DIR")
+        if fixture_dir:
+            _provider = FixtureProvider(fixture_dir)
+        else:
+            _provider = CachedProvider(YFinanceProvider())
+    return _provider
+
+
+def set_provider(provider):
+    """Swaps the process-wide provider (e.g. a FixtureProvider for offline runs)."""
+    global _provider
+    _provider = provider
+    if _bar_store is not None:
+        _bar_store.clear()
+
+
+_bar_store = None
+
+
+def get_bar_store():
+    """Process-wide store of compact intraday bars, filled through the current provider."""
+    global _bar_store
+    if _bar_store is None:
+        _bar_store = bars.BarStore(get_provider)
+    return _bar_store
+
+
+def get_history(ticker, period="1y", interval="1d"):
+    """OHLCV bars for one ticker over a yfinance-style period (daily by default).
+
+    Intraday intervals come from the bar store, resampled from the finest stored resolution.
+    """
+    if bars.check_interval(interval) == "1d":
+        return get_provider().fetch(ticker, period_start(period))
+    return get_bar_store().get(ticker, interval, period_start(period)).to_frame()
+
+
+def get_close_matrix(tickers, period="1y", interval="1d"):
+    """Aligned close prices (dates x tickers) from a single batched fetch.
+
+    Columns keep the caller's ticker order; tickers without data are dropped and
+    calendar gaps (e.g. crypto weekends next to equities) are left as NaN.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if bars.check_interval(interval) == "1d":
+        frames = get_provider().fetch_many(tickers, period_start(period))
+        closes = {t: df["Close"] for t, df in frames.items() if not df.empty}
+    else:
+        stored = get_bar_store().get_many(tickers, interval, period_start(period))
+        closes = {t: pd.Series(b.close.astype("float64"), index=b.index()) for t, b in stored.items() if len(b)}
+    if not closes:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))
+    matrix = pd.DataFrame(closes).sort_index()
+    matrix.index.name = "Date"
+    return matrix
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+import numpy as np
+
+# Artifact prefix: <prefix>.npy holds the coefficients, <prefix>.json the feature spec and training stats
+MODEL_PATH = os.environ.get(
+    "QUANT_POOLED_MODEL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "models", "pooled_ridge")
+)
+
+# Feature spec: trailing log returns over LAGS bars, realized volatility and the gap to the SMA
+LAGS = (1, 2, 3, 5, 10, 20, 60)
+VOL_WINDOW = 20
+SMA_WINDOW = 50
+HORIZON = 30
+ALPHA = 10.0
+FORMAT_VERSION = 1
+
+
+def warmup(lags=LAGS, vol_window=VOL_WINDOW, sma_window=SMA_WINDOW):
+    """Bars needed before the first complete feature row."""
+    return max(max(lags), vol_window, sma_window - 1)
+
+
+def features(close, lags=LAGS, vol_window=VOL_WINDOW, sma_window=SMA_WINDOW):
+    """Feature matrix (bars x features) for one close series; rows before warmup() are NaN."""
+    logp = np.log(np.asarray(close, dtype=np.float64))
+    n = len(logp)
+    out = np.full((n, len(lags) + 2), np.nan)
+    for j, k in enumerate(lags):
+        if n > k:
+            out[k:, j] = logp[k:] - logp[:-k]
+    if n > vol_window:
+        returns = np.diff(logp)
+        out[vol_window:, -2] = np.lib.stride_tricks.sliding_window_view(returns, vol_window).std(axis=1)
+    if n >= sma_window:
+        csum = np.cumsum(np.r_[0.0, np.exp(logp)])
+        sma = (csum[sma_window:] - csum[:-sma_window]) / sma_window
+        out[sma_window - 1:, -1] = logp[sma_window - 1:] - np.log(sma)
+    return out
+
+
+def targets(close, horizon=HORIZON):
+    """Forward log returns over 1..horizon bars (bars x horizon); the last horizon rows have none."""
+    logp = np.log(np.asarray(close, dtype=np.float64))
+    n = len(logp)
+    out = np.full((n, horizon), np.nan)
+    if n > horizon:
+        out[:n - horizon] = np.lib.stride_tricks.sliding_window_view(logp[1:], horizon)[:n - horizon] \
+            - logp[:n - horizon, None]
+    return out
+
+
+class _Moments:
+    """Running sums for a ridge fit: only (features + horizons)^2 numbers, whatever the universe size."""
+
+    def __init__(self, n_features, horizon):
+        self.n = 0
+        self.sx = np.zeros(n_features)
+        self.sy = np.zeros(horizon)
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros((n_features, horizon))
+        self.yy = np.zeros(horizon)
+
+    def add(self, X, Y):
+        self.n += len(X)
+        self.sx += X.sum(axis=0)
+        self.sy += Y.sum(axis=0)
+        self.xx += X.T @ X
+        self.xy += X.T @ Y
+        self.yy += (Y * Y).sum(axis=0)
+
+    def solve(self, alpha):
+        """Ridge on standardized features with an intercept; returns (coef, intercept, r2 per horizon)."""
+        mx, my = self.sx / self.n, self.sy / self.n
+        sxx = self.xx - self.n * np.outer(mx, mx)
+        sxy = self.xy - self.n * np.outer(mx, my)
+        syy = self.yy - self.n * my * my
+        scale = np.sqrt(np.maximum(np.diag(sxx) / self.n, 1e-12))
+        w = np.linalg.solve(sxx / np.outer(scale, scale) + alpha * np.eye(len(scale)), sxy / scale[:, None])
+        coef = w / scale[:, None]
+        sse = syy - 2 * (coef * sxy).sum(axis=0) + np.einsum("fh,fg,gh->h", coef, sxx, coef)
+        return coef, my - mx @ coef, 1.0 - sse / np.maximum(syy, 1e-12)
+
+
+def train(closes, horizon=HORIZON, alpha=ALPHA, lags=LAGS, vol_window=VOL_WINDOW, sma_window=SMA_WINDOW):
+    """Fits one ridge model across every column of a close matrix (dates x tickers).
+
+    Each ticker contributes the rows where its features and all horizon targets exist, on its
+    own calendar; only running sums are kept, so the universe never has to fit in one array.
+    Returns a PooledModel (save() writes it to disk).
+    """
+    stats = _Moments(len(lags) + 2, horizon)
+    used = 0
+    for ticker in closes.columns:
+        close = closes[ticker].dropna().to_numpy(dtype=np.float64)
+        close = close[close > 0]
+        if len(close) <= warmup(lags, vol_window, sma_window) + horizon:
+            continue
+        X, Y = features(close, lags, vol_window, sma_window), targets(close, horizon)
+        keep = np.isfinite(X).all(axis=1) & np.isfinite(Y).all(axis=1)
+        stats.add(X[keep], Y[keep])
+        used += 1
+    if stats.n == 0:
+        raise ValueError("Not enough history to train the pooled model")
+    coef, intercept, r2 = stats.solve(alpha)
+    meta = {
+        "version": FORMAT_VERSION, "lags": list(lags), "vol_window": vol_window, "sma_window": sma_window,
+        "horizon": horizon, "alpha": alpha, "tickers": used, "samples": stats.n,
+        "trained_at": datetime.now().isoformat(), "r2": [round(float(v), 6) for v in r2],
+    }
+    return PooledModel(np.vstack([coef, intercept]), meta)
+
+
+class PooledModel:
+    """Coefficients ((features + 1) x horizon, intercept last) plus the feature spec they were trained with."""
+
+    def __init__(self, weights, meta):
+        self.weights = weights
+        self.meta = meta
+
+    @property
+    def horizon(self):
+        return self.meta["horizon"]
+
+    @property
+    def warmup(self):
+        return warmup(self.meta["lags"], self.meta["vol_window"], self.meta["sma_window"])
+
+    def features(self, close):
+        return features(close, self.meta["lags"], self.meta["vol_window"], self.meta["sma_window"])
+
+    def predict_log_returns(self, X, horizon=None):
+        """Forward log returns from feature rows: every horizon (rows x horizon), or just the given one (rows)."""
+        if horizon is not None:
+            return X @ self.weights[:-1, horizon - 1] + self.weights[-1, horizon - 1]
+        return X @ self.weights[:-1] + self.weights[-1]
+
+    def save(self, path=None):
+        """Writes <path>.npy and <path>.json (via temp files, so readers never see half an artifact)."""
+        path = path or MODEL_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        with open(path + ".npy" + suffix, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(self.weights, dtype=np.float64))
+        with open(path + ".json" + suffix, "w") as fh:
+            json.dump(self.meta, fh, indent=2)
+        os.replace(path + ".npy" + suffix, path + ".npy")
+        os.replace(path + ".json" + suffix, path + ".json")
+
+
+_loaded = {}  # path -> (npy mtime, PooledModel)
+_lock = threading.Lock()
+
+
+def available(path=None):
+    return os.path.exists((path or MODEL_PATH) + ".npy") and os.path.exists((path or MODEL_PATH) + ".json")
+
+
+def version(path=None):
+    """Cheap identity of the saved artifact (its .npy mtime), or None when there is none."""
+    try:
+        return os.stat((path or MODEL_PATH) + ".npy").st_mtime_ns
+    except OSError:
+        return None
+
+
+def load(path=None):
+    """The saved model, memory-mapped and kept per process; reloaded when the artifact is replaced."""
+    path = path or MODEL_PATH
+    if not available(path):
+        raise FileNotFoundError(f"No pooled model at {path}.npy; train one with: python pooled_model.py <watchlist.txt>")
+    mtime = os.stat(path + ".npy").st_mtime_ns
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path + ".json") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Pooled model at {path} has format {meta.get('version')}, expected {FORMAT_VERSION}")
+        model = PooledModel(np.load(path + ".npy", mmap_mode="r"), meta)
+        _loaded[path] = (mtime, model)
+        return model
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python pooled_model.py <watchlist.txt> [period] [--alpha A] [--horizon H] [--output PREFIX]")
+        sys.exit(1)
+    import market_data
+    import screener
+
+    def option(name, default, cast):
+        return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+    period = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith("--") else "10y"
+    tickers = screener.load_watchlist(sys.argv[1])
+    started = time.perf_counter()
+    closes = market_data.get_close_matrix(tickers, period)
+    model = train(closes, horizon=option("--horizon", HORIZON, int), alpha=option("--alpha", ALPHA, float))
+    output = option("--output", None, str) or MODEL_PATH
+    model.save(output)
+    r2 = model.meta["r2"]
+    print(f"Trained on {model.meta['samples']} rows from {model.meta['tickers']} tickers in "
+          f"{time.perf_counter() - started:.1f}s -> {output}.npy")
+    print(f"In-sample R^2: 1 bar {r2[0]:.4f} | {len(r2)} bars {r2[-1]:.4f}")
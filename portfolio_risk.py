@@ -0,0 +1,175 @@
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+# Daily bars per year on a calendar that includes weekends (crypto only)
+CALENDAR_DAYS = 365
+BENCHMARK = "SPY"
+CONFIDENCE = 0.95
+# Portfolios evaluated per pass (bounds the dates x portfolios working arrays)
+PORTFOLIO_CHUNK = 2048
+
+METRIC_COLUMNS = ["Ann. Return", "Ann. Volatility", "Beta", "VaR (hist)", "CVaR (hist)",
+                  "VaR (param)", "CVaR (param)", "Max Drawdown"]
+
+
+def aligned_returns(closes, calendar=None):
+    """Dates x tickers return matrix on the dates every calendar column (default: all) has a bar.
+
+    Mixed with equities, crypto is measured Friday -> Monday (its weekend move lands on Monday)
+    instead of padding the equities with zero weekend returns. Columns outside calendar (e.g. a
+    benchmark) are carried forward onto it. Starts once every column has traded.
+    """
+    calendar = list(closes.columns) if calendar is None else list(calendar)
+    shared = closes.ffill().loc[np.isfinite(closes[calendar].to_numpy(dtype=np.float64)).all(axis=1)]
+    values = shared.to_numpy(dtype=np.float64)
+    started = np.isfinite(values).all(axis=1)
+    first = int(np.argmax(started)) if started.any() else len(values)
+    values = values[first:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rets = values[1:] / values[:-1] - 1.0
+    return pd.DataFrame(np.nan_to_num(rets), index=shared.index[first + 1:], columns=closes.columns)
+
+
+def periods_per_year(index):
+    """Daily bars per year of a return calendar: CALENDAR_DAYS when it trades on weekends, else TRADING_DAYS."""
+    return CALENDAR_DAYS if (pd.DatetimeIndex(index).dayofweek >= 5).any() else TRADING_DAYS
+
+
+def as_weights(weights, n_assets):
+    """(P, N) float matrix from a single weight vector or a matrix of portfolios."""
+    w = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    if w.shape[1] != n_assets:
+        raise ValueError(f"Expected weights for {n_assets} assets, got {w.shape[1]}")
+    return w
+
+
+def risk_metrics(returns, weights, benchmark=None, confidence=CONFIDENCE, periods_per_year=TRADING_DAYS):
+    """Risk numbers for every portfolio (row of weights) at once.
+
+    returns: dates x assets array/DataFrame without NaNs (see aligned_returns).
+    benchmark: returns of the beta benchmark on the same dates (optional).
+    VaR/CVaR are one-period losses, reported as positive fractions. Returns a DataFrame
+    with one row per portfolio and METRIC_COLUMNS.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    w = as_weights(weights, x.shape[1])
+    t = len(x)
+    alpha = 1.0 - confidence
+    z = NormalDist().inv_cdf(alpha)
+    tail_density = NormalDist().pdf(z) / alpha
+    k = max(int(np.floor(alpha * t)) - 1, 0)  # order statistic used as the historical VaR
+
+    out = np.full((len(w), len(METRIC_COLUMNS)), np.nan)
+    if t < 2:
+        return pd.DataFrame(out, columns=METRIC_COLUMNS)
+
+    bench = None
+    if benchmark is not None:
+        bench = np.asarray(benchmark, dtype=np.float64)
+        bench = bench - bench.mean()
+        bench_var = bench @ bench / (t - 1)
+
+    for start in range(0, len(w), PORTFOLIO_CHUNK):
+        block = slice(start, start + PORTFOLIO_CHUNK)
+        r = x @ w[block].T                                    # dates x portfolios
+        mu = r.mean(axis=0)
+        sigma = r.std(axis=0, ddof=1)
+
+        worst = np.partition(r, k, axis=0)[:k + 1]          # the alpha tail, unsorted
+        var_hist = -worst.max(axis=0)
+        cvar_hist = -worst.mean(axis=0)
+
+        wealth = np.cumprod(1.0 + r, axis=0)
+        drawdown = wealth / np.maximum.accumulate(wealth, axis=0) - 1.0
+
+        beta = np.full(r.shape[1], np.nan)
+        if bench is not None and bench_var > 0:
+            beta = bench @ (r - mu) / (t - 1) / bench_var
+
+        out[block] = np.column_stack([
+            mu * periods_per_year,
+            sigma * np.sqrt(periods_per_year),
+            beta,
+            var_hist,
+            cvar_hist,
+            -(mu + z * sigma),
+            -(mu - sigma * tail_density),
+            drawdown.min(axis=0),
+        ])
+    return pd.DataFrame(out, columns=METRIC_COLUMNS)
+
+
+def risk_contributions(returns, weights):
+    """Share of each portfolio's variance coming from each asset, w_i (Sigma w)_i / w' Sigma w (rows sum to 1)."""
+    x = np.asarray(returns, dtype=np.float64)
+    w = as_weights(weights, x.shape[1])
+    cov = np.atleast_2d(np.cov(x, rowvar=False))
+    marginal = w @ cov
+    total = np.einsum("pn,pn->p", w, marginal)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return w * marginal / total[:, None]
+
+
+def random_portfolios(n_assets, n_portfolios, seed=None):
+    """Long-only weight sweep: uniform draws from the simplex (Dirichlet(1))."""
+    return np.random.default_rng(seed).dirichlet(np.ones(n_assets), size=n_portfolios)
+
+
+def comparison_risk(closes, benchmark_close=None, weights=None, confidence=CONFIDENCE):
+    """Risk panel for comparison mode: the (equal-weight by default) portfolio plus each asset on its own.
+
+    Per-asset numbers come from the same vectorized pass, using the identity matrix as N
+    single-asset portfolios. Returns a plain dict (ready for AnalysisResult).
+    """
+    tickers = list(closes.columns)
+    if benchmark_close is not None:
+        joined = closes.join(benchmark_close.rename("__benchmark__"), how="outer")
+        rets = aligned_returns(joined, calendar=tickers)
+        bench = rets.pop("__benchmark__")
+    else:
+        rets, bench = aligned_returns(closes), None
+    if len(rets) < 2:
+        return {}
+
+    n = len(tickers)
+    w = np.full(n, 1.0 / n) if weights is None else as_weights(weights, n)[0]
+    per_year = periods_per_year(rets.index)
+    metrics = risk_metrics(rets, np.vstack([w, np.eye(n)]), benchmark=bench, confidence=confidence,
+                           periods_per_year=per_year)
+    contrib = risk_contributions(rets, w)[0]
+
+    def row(values):
+        return {k: float(v) for k, v in zip(METRIC_COLUMNS, values)}
+
+    return {
+        "confidence": confidence,
+        "benchmark": BENCHMARK if bench is not None else None,
+        "observations": len(rets),
+        "periods_per_year": per_year,
+        "weights": {t: float(v) for t, v in zip(tickers, w)},
+        "portfolio": row(metrics.iloc[0]),
+        "assets": {t: {**row(metrics.iloc[i + 1]), "Risk Contribution": float(contrib[i])}
+                   for i, t in enumerate(tickers)},
+    }
+
+
+def format_risk_markdown(risk):
+    """Short report section for comparison responses."""
+    if not risk:
+        return ""
+    p = risk["portfolio"]
+    pct = int(round(risk["confidence"] * 100))
+    days = "days" if risk.get("periods_per_year") == CALENDAR_DAYS else "trading days"
+    lines = [
+        f"\n\n### 🛡️ Portfolio Risk (equal weight, {risk['observations']} {days})",
+        f"- **Volatility:** {p['Ann. Volatility']:.1%} annualized"
+        + (f" · **Beta vs {risk['benchmark']}:** {p['Beta']:.2f}" if risk["benchmark"] else ""),
+        f"- **1-day VaR {pct}%:** {p['VaR (hist)']:.2%} historical / {p['VaR (param)']:.2%} parametric",
+        f"- **1-day CVaR {pct}%:** {p['CVaR (hist)']:.2%} historical / {p['CVaR (param)']:.2%} parametric",
+        f"- **Max Drawdown:** {p['Max Drawdown']:.1%}",
+    ]
+    top = max(risk["assets"].items(), key=lambda kv: kv[1]["Risk Contribution"])
+    lines.append(f"- **Largest risk contributor:** {top[0]} ({top[1]['Risk Contribution']:.0%} of variance)")
+    return "\n".join(lines) + "\n"
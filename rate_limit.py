@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+import contextvars
+import telemetry
+
+# Requests per second per data source, e.g. QUANT_RATE_LIMITS="yfinance=4,ddgs=1"; unset means unlimited
+ENV_LIMITS = "QUANT_RATE_LIMITS"
+
+
+def parse_limits(text):
+    """'yfinance=4,ddgs=0.5' -> {"yfinance": 4.0, "ddgs": 0.5}."""
+    limits = {}
+    for part in (text or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        source, _, rate = part.partition("=")
+        try:
+            limits[source] = float(rate)
+        except ValueError:
+            raise ValueError(f"Bad rate limit '{part}' (expected source=requests_per_second)")
+    return limits
+
+
+class TokenBucket:
+    """Allows rate calls per second on average with bursts of up to burst calls."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until one is available; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def reserve(self):
+        """Takes one token without sleeping; returns how long the caller must wait before using it."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (possibly going negative) so waiters queue up in order
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class Waits:
+    """Seconds one task has been told to wait in throttle() (recorded before the sleep starts)."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+
+def counting_waits(waits, fn, *args, **kwargs):
+    """Runs fn, adding every throttle() wait inside it to waits.seconds (so deadlines can exclude them)."""
+    token = _waits.set(waits)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _waits.reset(token)
+
+
+_lock = threading.Lock()
+_buckets = {}
+_waits = contextvars.ContextVar("rate_limit_waits", default=None)
+
+
+def configure(limits=None, share=1):
+    """Installs one bucket per source; share splits each rate between that many processes.
+
+    limits defaults to QUANT_RATE_LIMITS. A rate of 0 (or a source that is not listed) is unlimited.
+    """
+    if limits is None:
+        limits = parse_limits(os.environ.get(ENV_LIMITS, ""))
+    with _lock:
+        _buckets.clear()
+        for source, rate in limits.items():
+            if rate and rate > 0:
+                _buckets[source] = TokenBucket(rate / max(1, share))
+
+
+def limits():
+    """{source: requests per second} currently enforced in this process."""
+    with _lock:
+        return {source: bucket.rate for source, bucket in _buckets.items()}
+
+
+def throttle(source):
+    """Called right before a network request to source; blocks while the source is over its rate."""
+    bucket = _buckets.get(source)
+    if bucket is None:
+        return
+    wait = bucket.reserve()
+    if wait > 0:
+        waits = _waits.get()
+        if waits is not None:
+            waits.seconds += wait
+        telemetry.observe("rate_limit_wait_seconds", wait, source=source)
+        bucket.sleep(wait)
+
+
+configure()
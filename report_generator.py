@@ -1,5 +1,16 @@
 from fpdf import FPDF
+import io
 import datetime
+import threading
+
+# Embedded chart: figure size in inches at CHART_DPI, points drawn per series (LTTB-thinned)
+CHART_SIZE = (8, 4.5)
+CHART_DPI = 110
+CHART_MAX_POINTS = 800
+CHART_WIDTH_MM = 190
+
+_chart_template = None
+_chart_lock = threading.Lock()
 
 class AnalystReport(FPDF):
     def header(self):
@@ -12,7 +23,58 @@ class AnalystReport(FPDF):
         self.set_font('helvetica', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()} | Generated on {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")}', align='C')
 
-def generate_pdf_report(ticker, result_text, signals, fundamentals):
+def _get_chart_template():
+    """One Agg-backed matplotlib Figure per process, reused for every chart (no pyplot, no browser).
+
+    Axes, tick and line artists are created once; each chart only swaps in new data.
+    """
+    global _chart_template
+    if _chart_template is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=CHART_SIZE, dpi=CHART_DPI)
+        FigureCanvasAgg(fig)
+        # Fixed margins: a tight/constrained layout pass would cost more than drawing the chart
+        price, rsi = fig.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [3, 1], "hspace": 0.08})
+        fig.subplots_adjust(left=0.08, right=0.98, top=0.93, bottom=0.08)
+        lines = {
+            "Close": price.plot([], [], color="#0077aa", linewidth=1.2, label="Close")[0],
+            "SMA50": price.plot([], [], color="#cc2255", linewidth=0.8, label="50 MA")[0],
+            "Forecast": price.plot([], [], color="#cc9900", linestyle="--", linewidth=1.2, label="Forecast")[0],
+            "RSI": rsi.plot([], [], color="#009955", linewidth=0.9)[0],
+        }
+        price.legend(loc="upper left", fontsize=7, frameon=False)
+        rsi.axhline(70, color="#cc0000", linestyle=":", linewidth=0.8)
+        rsi.axhline(30, color="#008800", linestyle=":", linewidth=0.8)
+        rsi.set_ylim(0, 100)
+        rsi.set_ylabel("RSI", fontsize=8)
+        for ax in (price, rsi):
+            ax.tick_params(labelsize=7)
+            ax.grid(alpha=0.25, linewidth=0.5)
+        _chart_template = {"fig": fig, "price": price, "lines": lines, "band": None}
+    return _chart_template
+
+def render_chart_png(data, max_points=CHART_MAX_POINTS):
+    """PNG of the price (Close, SMA50, Bollinger band, forecast) and RSI panels from get_analysis chart data."""
+    import charts
+    d = charts._thin(data, ["Date", "Close", "SMA50", "BB_Upper", "BB_Lower", "RSI"], max_points)
+    with _chart_lock:
+        t = _get_chart_template()
+        price, lines = t["price"], t["lines"]
+        for key in ("Close", "SMA50", "RSI"):
+            lines[key].set_data(d["Date"], d[key])
+        lines["Forecast"].set_data(data["ForecastDate"], data["Forecast"])
+        if t["band"] is not None:
+            t["band"].remove()
+        t["band"] = price.fill_between(d["Date"], d["BB_Lower"], d["BB_Upper"], color="#adccff", alpha=0.35, linewidth=0)
+        price.set_title(f"{data['ticker']} Analysis", fontsize=10)
+        price.relim()
+        price.autoscale_view()
+        buf = io.BytesIO()
+        t["fig"].savefig(buf, format="png")
+    return buf.getvalue()
+
+def generate_pdf_report(ticker, result_text, signals, fundamentals, chart_png=None):
     pdf = AnalystReport()
     pdf.add_page()
     
@@ -22,6 +84,11 @@ def generate_pdf_report(ticker, result_text, signals, fundamentals):
     pdf.cell(0, 10, f'ANALYSIS FOR: {ticker}', new_x="LMARGIN", new_y="NEXT")
     pdf.ln(2)
     
+    # Chart image (PNG bytes from render_chart_png)
+    if chart_png:
+        pdf.image(io.BytesIO(chart_png), w=CHART_WIDTH_MM)
+        pdf.ln(2)
+    
     # 2. Fundamentals Table
     pdf.set_font('helvetica', 'B', 12)
     pdf.set_text_color(0)
@@ -65,3 +132,10 @@ def generate_pdf_report(ticker, result_text, signals, fundamentals):
     pdf.multi_cell(0, 7, clean_text)
     
     return bytes(pdf.output()) # Returns bytes directly in modern fpdf2
+
+def generate_result_report(result, include_chart=False):
+    """PDF for a financial_engine.AnalysisResult; include_chart embeds the single-ticker price/RSI chart."""
+    chart_png = None
+    if include_chart and result.fig is not None and not result.is_comparison:
+        chart_png = render_chart_png(result.fig.data)
+    return generate_pdf_report(result.ticker or "REPORT", result.response, result.signals, result.fundamentals, chart_png)
@@ -0,0 +1,110 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import market_data
+import indicators
+
+# Universes larger than this are split into chunks and screened in a process pool
+PROCESS_POOL_THRESHOLD = 400
+CHUNK_SIZE = 250
+
+RESULT_COLUMNS = ["Ticker", "Signals", "Types", "Score", "Close", "RSI", "SMA50", "SMA200", "Last Bar"]
+
+
+def load_watchlist(path):
+    """Reads tickers from a text file (one per line and/or comma separated, '#' comments allowed)."""
+    tickers = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0]
+            tickers.extend(t.strip().upper() for t in line.replace(",", " ").split() if t.strip())
+    return list(dict.fromkeys(tickers))
+
+
+def _right_align(closes):
+    """Moves each column's valid bars to the bottom, so every ticker is evaluated on its own calendar."""
+    values = closes.to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    # Stable sort on the valid flag: NaN rows first, then the real bars in date order
+    order = np.argsort(valid, axis=0, kind="stable")
+    aligned = np.take_along_axis(values, order, axis=0)
+    last_dates = closes.index.to_numpy()[order[-1]] if len(closes) else np.array([])
+    return aligned, valid.sum(axis=0), last_dates
+
+
+def screen_matrix(closes, overbought=70.0, oversold=30.0, include_quiet=False):
+    """Evaluates the scan_signals rules for every column of a dates x tickers close matrix."""
+    if closes.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    aligned, n_bars, last_dates = _right_align(closes)
+    ind = indicators.compute_indicators(aligned)
+    flags = indicators.latest_signal_flags(ind["sma_fast"], ind["sma_slow"], ind["rsi"], overbought, oversold)
+    # Same minimum history as scan_signals
+    enough = n_bars >= 200
+    fired = np.zeros(len(closes.columns), dtype=np.int64)
+    for key in flags:
+        flags[key] = flags[key] & enough
+        fired += flags[key]
+
+    rows = []
+    for col in np.flatnonzero(fired > 0) if not include_quiet else range(len(closes.columns)):
+        sigs = indicators.signals_for_column(flags, col)
+        rows.append({
+            "Ticker": closes.columns[col],
+            "Signals": [s["label"] for s in sigs],
+            "Types": [s["type"] for s in sigs],
+            "Score": int(fired[col]),
+            "Close": float(aligned[-1, col]),
+            "RSI": float(ind["rsi"][-1, col]),
+            "SMA50": float(ind["sma_fast"][-1, col]),
+            "SMA200": float(ind["sma_slow"][-1, col]),
+            "Last Bar": pd.Timestamp(last_dates[col]) if n_bars[col] else pd.NaT,
+        })
+    return rank_results(pd.DataFrame(rows, columns=RESULT_COLUMNS))
+
+
+def rank_results(table):
+    """Most signals first, then the most extreme RSI."""
+    if table.empty:
+        return table.reset_index(drop=True)
+    extremity = (table["RSI"] - 50).abs().fillna(0)
+    order = np.lexsort((-extremity.to_numpy(), -table["Score"].to_numpy()))
+    return table.iloc[order].reset_index(drop=True)
+
+
+def _screen_chunk(tickers, period, overbought, oversold, include_quiet):
+    closes = market_data.get_close_matrix(tickers, period)
+    return screen_matrix(closes, overbought, oversold, include_quiet)
+
+
+def screen_universe(tickers, period="1y", overbought=70.0, oversold=30.0, processes=None,
+                    chunk_size=CHUNK_SIZE, include_quiet=False):
+    """Ranked table of which tickers in a watchlist fired which scan_signals rules.
+
+    Only prices are fetched (one batched download per chunk); no figures or fundamentals.
+    Universes above PROCESS_POOL_THRESHOLD are chunked across a process pool.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if len(tickers) <= PROCESS_POOL_THRESHOLD and not processes:
+        return _screen_chunk(tickers, period, overbought, oversold, include_quiet)
+
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    workers = min(processes or os.cpu_count() or 1, len(chunks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_screen_chunk, chunks, [period] * len(chunks), [overbought] * len(chunks),
+                              [oversold] * len(chunks), [include_quiet] * len(chunks)))
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return rank_results(pd.concat(parts, ignore_index=True))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python screener.py <watchlist.txt> [period]")
+        sys.exit(1)
+    table = screen_universe(load_watchlist(sys.argv[1]), period=sys.argv[2] if len(sys.argv) > 2 else "1y")
+    print(table.to_string(index=False) if not table.empty else "No signals fired.")
@@ -0,0 +1,150 @@
+import re
+from itertools import compress
+
+# Token weights (whole words only, so "up" no longer matches "support" and "low" no longer matches "follow")
+DEFAULT_LEXICON = {
+    # Positive
+    "bullish": 1.0, "growth": 1.0, "grow": 0.8, "grows": 0.8, "growing": 0.8,
+    "buy": 1.0, "buys": 1.0, "up": 1.0, "high": 1.0, "higher": 1.0, "highs": 1.0,
+    "positive": 1.0, "beat": 1.0, "beats": 1.0, "profit": 1.0, "profits": 1.0, "profitable": 1.0,
+    "gain": 1.0, "gains": 1.0, "rise": 1.0, "rises": 1.0, "rising": 1.0, "rose": 1.0,
+    "rally": 1.2, "rallies": 1.2, "surge": 1.5, "surges": 1.5, "soar": 1.5, "soars": 1.5,
+    "jump": 1.2, "jumps": 1.2, "strong": 1.0, "stronger": 1.0, "record": 0.5,
+    "upgrade": 1.2, "upgraded": 1.2, "upgrades": 1.2, "outperform": 1.0, "outperforms": 1.0,
+    "optimistic": 1.0, "optimism": 1.0, "boost": 1.0, "boosts": 1.0,
+    # Negative
+    "bearish": -1.0, "fall": -1.0, "falls": -1.0, "falling": -1.0, "fell": -1.0,
+    "sell": -1.0, "selloff": -1.2, "down": -1.0, "low": -1.0, "lower": -1.0, "lows": -1.0,
+    "negative": -1.0, "miss": -1.0, "misses": -1.0, "missed": -1.0, "loss": -1.0, "losses": -1.0,
+    "drop": -1.0, "drops": -1.0, "dropped": -1.0, "decline": -1.0, "declines": -1.0,
+    "plunge": -1.5, "plunges": -1.5, "tumble": -1.5, "tumbles": -1.5, "slump": -1.2, "slumps": -1.2,
+    "crash": -1.5, "weak": -1.0, "weaker": -1.0, "downgrade": -1.2, "downgraded": -1.2,
+    "underperform": -1.0, "lawsuit": -0.8, "probe": -0.8, "layoffs": -0.8, "warning": -0.8,
+    "pessimistic": -1.0, "fears": -0.8, "recall": -0.8,
+}
+
+# Multi-word entries, matched before single tokens (longest first)
+DEFAULT_PHRASES = {
+    ("all", "time", "high"): 1.5,
+    ("beat", "estimates"): 1.5,
+    ("beats", "estimates"): 1.5,
+    ("price", "target", "raised"): 1.2,
+    ("price", "target", "cut"): -1.2,
+    ("missed", "estimates"): -1.5,
+    ("misses", "estimates"): -1.5,
+    ("guidance", "cut"): -1.5,
+    ("short", "seller"): -1.0,
+}
+
+DEFAULT_NEGATIONS = frozenset({
+    "not", "no", "never", "without", "hardly", "barely", "neither", "nor",
+    "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't",
+    "won't", "wouldn't", "can't", "cannot", "couldn't", "shouldn't", "fails", "failed",
+})
+
+# One tokenizer pass over the whole batch; "\n" survives as the headline separator and
+# punctuation as a clause break that ends a negation's scope
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[\n.,;:!?]")
+_CLAUSE_BREAKS = ".,;:!?"
+_NEGATION = "neg"
+_BOUNDARY = "doc"
+_CLAUSE = "clause"
+
+
+class _PhraseStart:
+    """Lookup-table entry for a token that can open a phrase."""
+    __slots__ = ("weight", "phrases")
+
+    def __init__(self, weight, phrases):
+        self.weight = weight
+        self.phrases = phrases
+
+
+class SentimentScorer:
+    """Compiled lexicon scorer.
+
+    Lexicon words, phrase openers, negations and the headline separator are compiled into
+    one hash table. A batch is tokenized with a single regex pass, every token is looked up
+    in C (map + compress), and Python only walks the hits. A negation flips the weight of
+    hits within the next few tokens of the same clause.
+    """
+
+    def __init__(self, lexicon=None, phrases=None, negations=None, negation_window=3):
+        self.lexicon = dict(DEFAULT_LEXICON if lexicon is None else lexicon)
+        self.phrases = dict(DEFAULT_PHRASES if phrases is None else phrases)
+        self.negations = DEFAULT_NEGATIONS if negations is None else frozenset(negations)
+        self.negation_window = negation_window
+
+        table = dict(self.lexicon)
+        for word in self.negations:
+            table[word] = _NEGATION
+        grouped = {}
+        for words, weight in self.phrases.items():
+            grouped.setdefault(words[0], []).append((tuple(words), weight))
+        for first, entries in grouped.items():
+            entries.sort(key=lambda e: -len(e[0]))
+            table[first] = _PhraseStart(self.lexicon.get(first), entries)
+        for mark in _CLAUSE_BREAKS:
+            table[mark] = _CLAUSE
+        table["\n"] = _BOUNDARY
+        self._table = table
+
+    def _raw_scores(self, texts):
+        """Raw weighted sums for each text."""
+        raw = [0.0] * len(texts)
+        if not texts:
+            return raw
+        joined = "\n".join(texts if not any("\n" in t for t in texts) else [t.replace("\n", " ") for t in texts])
+        tokens = _TOKEN_RE.findall(joined.lower().replace("’", "'"))
+        entries = list(map(self._table.get, tokens))
+        # Indices of tokens that hit the table; every entry value is truthy
+        hits = list(compress(range(len(entries)), entries))
+
+        window = self.negation_window
+        doc, negated_until, skip_until = 0, -1, -1
+        for i in hits:
+            entry = entries[i]
+            if entry is _BOUNDARY:
+                doc, negated_until = doc + 1, -1
+                continue
+            if entry is _CLAUSE:
+                negated_until = -1
+                continue
+            if i < skip_until:
+                continue
+            if entry is _NEGATION:
+                negated_until = i + window
+                continue
+            if entry.__class__ is _PhraseStart:
+                weight = entry.weight
+                for words, phrase_weight in entry.phrases:
+                    if tuple(tokens[i:i + len(words)]) == words:
+                        weight, skip_until = phrase_weight, i + len(words)
+                        break
+                if weight is None:
+                    continue
+            else:
+                weight = entry
+            raw[doc] += -weight if i <= negated_until else weight
+        return raw
+
+    def score(self, text):
+        """Per-headline score in [-1, 1] (two net keyword hits saturate, as in the original scale)."""
+        return self.score_batch([text])[0][0]
+
+    def score_batch(self, texts):
+        """Scores many headlines in one call. Returns (per_headline_scores, aggregate_score)."""
+        scores = [max(-1.0, min(1.0, r / 2)) for r in self._raw_scores(texts)]
+        aggregate = sum(scores) / len(scores) if scores else 0.0
+        return scores, aggregate
+
+
+_default_scorer = None
+
+
+def get_scorer():
+    """Process-wide scorer built from the default lexicon."""
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = SentimentScorer()
+    return _default_scorer
@@ -0,0 +1,234 @@
+import os
+import re
+import csv
+import threading
+
+# Symbol master: CSV with symbol,name,aliases (aliases separated by "|"); rows earlier in the file win ties
+SYMBOLS_FILE = os.environ.get(
+    "QUANT_SYMBOLS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.csv")
+)
+
+# Used when no symbol master is available, so the classic names keep resolving
+BUILTIN_SYMBOLS = [
+    ("NVDA", "NVIDIA Corporation", ["nvda"]),
+    ("AAPL", "Apple Inc.", ["aapl"]),
+    ("TSLA", "Tesla Inc.", ["tsla"]),
+    ("MSFT", "Microsoft Corporation", ["msft"]),
+    ("GOOGL", "Alphabet Inc. Class A", ["google", "googl"]),
+    ("AMZN", "Amazon.com Inc.", ["amazon", "amzn"]),
+    ("META", "Meta Platforms Inc.", ["meta"]),
+    ("BTC-USD", "Bitcoin USD", ["bitcoin", "btc"]),
+    ("ETH-USD", "Ethereum USD", ["ethereum", "eth"]),
+]
+
+# Trailing words dropped from company names ("Apple Inc." -> "apple")
+NAME_SUFFIXES = frozenset({
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "plc", "llc", "lp", "holdings", "holding", "group", "sa", "nv", "ag", "se", "com", "trust",
+    "class", "and", "the", "usd", "a", "b", "c", "n", "v", "s",
+})
+
+# Everyday words: never typo-corrected, and a company whose whole name is one of these
+# ("Target", "Block", "Arm") only matches when written capitalized
+COMMON_WORDS = frozenset({
+    "the", "and", "for", "what", "news", "stock", "stocks", "share", "shares", "query", "plot",
+    "last", "month", "months", "next", "days", "about", "price", "prices", "trend", "trends",
+    "info", "show", "tell", "quant", "this", "that", "check", "error", "startup", "view", "done",
+    "user", "terminal", "process", "where", "which", "there", "their", "these", "those", "should",
+    "could", "would", "analyze", "analysis", "compare", "comparison", "versus", "against", "today",
+    "forecast", "target", "block", "square", "chase", "arm", "gold", "lucid", "sol", "ether",
+    "with", "from", "into", "over", "under", "after", "before", "week", "weeks", "year", "years",
+    "chart", "charts", "market", "markets", "report", "signal", "signals", "sector", "buy", "sell",
+    "hold", "long", "short", "performance", "outlook", "earnings", "guidance",
+})
+
+# Typo tolerance: tokens shorter than this are never corrected
+MIN_FUZZY_LENGTH = 5
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+_END = ""  # trie terminal key (tokens are never empty)
+
+
+def tokenize(text):
+    """Normalized word tokens: apostrophes dropped, every other non-alphanumeric is a separator."""
+    return [t.lower() for t in _TOKEN_RE.findall(text.replace("'", "").replace("’", ""))]
+
+
+def name_keys(name):
+    """Match keys for a company name: the full name plus the name without legal suffixes."""
+    tokens = tokenize(name)
+    keys = [tuple(tokens)] if tokens else []
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    if len(tokens) > 1 and tokens[0] == "the":
+        tokens.pop(0)
+    if tokens and tuple(tokens) not in keys:
+        keys.append(tuple(tokens))
+    return keys
+
+
+def max_distance(word):
+    """Edits allowed when correcting towards a known word of this length."""
+    if len(word) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(word) < 9 else 2
+
+
+def _deletes(word, depth):
+    """All strings reachable from word by removing up to depth characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def osa_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent transpositions count as one edit); > limit means 'too far'."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SymbolIndex:
+    """Company names and aliases compiled for query scanning.
+
+    Names are stored in a token trie, so a query is resolved in one left-to-right pass taking the
+    longest name at each position. Words that are not in the vocabulary are corrected through a
+    SymSpell-style deletion index: every known word is indexed under its single/double-character
+    deletions once, and a query word only generates its own deletions and verifies the few
+    candidates that share one.
+    """
+
+    def __init__(self, rows=()):
+        self.trie = {}
+        self.symbols = []
+        self.vocabulary = {}   # word -> rank (first row that uses it)
+        self.deletions = {}    # deletion -> [known words]
+        self.ambiguous = set()  # single-word keys that need a capitalized mention
+        for symbol, name, aliases in rows:
+            self.add(symbol, name, aliases)
+
+    @classmethod
+    def from_csv(cls, path):
+        rows = []
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                symbol = (row.get("symbol") or "").strip().upper()
+                if not symbol:
+                    continue
+                aliases = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+                rows.append((symbol, (row.get("name") or "").strip(), aliases))
+        return cls(rows)
+
+    def add(self, symbol, name, aliases=()):
+        self.symbols.append(symbol)
+        keys = name_keys(name) if name else []
+        for alias in aliases:
+            key = tuple(tokenize(alias))
+            if key and key not in keys:
+                keys.append(key)
+
+        for key in keys:
+            node = self.trie
+            for token in key:
+                node = node.setdefault(token, {})
+            # First symbol registered under a key keeps it (GOOGL before GOOG)
+            node.setdefault(_END, symbol)
+            if len(key) == 1 and key[0] in COMMON_WORDS:
+                self.ambiguous.add(key[0])
+            for token in key:
+                self._add_word(token)
+
+    def _add_word(self, word):
+        if word in self.vocabulary:
+            return
+        self.vocabulary[word] = len(self.vocabulary)
+        depth = max_distance(word)
+        if depth:
+            for d in _deletes(word, depth):
+                self.deletions.setdefault(d, []).append(word)
+
+    def correct(self, word):
+        """Closest known word within its edit budget, or None. Exact words are returned as-is."""
+        if word in self.vocabulary:
+            return word
+        if len(word) < MIN_FUZZY_LENGTH or word in COMMON_WORDS or word.isdigit():
+            return None
+        best, best_key = None, None
+        seen = set()
+        for d in _deletes(word, 2):
+            for candidate in self.deletions.get(d, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                limit = max_distance(candidate)
+                dist = osa_distance(word, candidate, limit)
+                if dist <= limit and (best_key is None or (dist, self.vocabulary[candidate]) < best_key):
+                    best, best_key = candidate, (dist, self.vocabulary[candidate])
+        return best
+
+    def lookup(self, word):
+        """Symbol for a single-word name or alias, matched exactly."""
+        node = self.trie.get(word.lower())
+        return node.get(_END) if node else None
+
+    def scan(self, query):
+        """Symbols named in free text, in order of first mention."""
+        raw = _TOKEN_RE.findall(query.replace("'", "").replace("’", ""))
+        tokens = [self.correct(t.lower()) for t in raw]
+
+        found = []
+        i = 0
+        while i < len(tokens):
+            node, match, end = self.trie, None, i
+            j = i
+            while j < len(tokens) and tokens[j] is not None and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    match, end = node[_END], j
+            if match is not None and end - i == 1 and tokens[i] in self.ambiguous and not raw[i][:1].isupper():
+                match = None
+            if match is None:
+                i += 1
+                continue
+            found.append(match)
+            i = end
+        return list(dict.fromkeys(found))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide index, loaded once from SYMBOLS_FILE (or the built-in names if it is missing)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if os.path.exists(SYMBOLS_FILE):
+                    _index = SymbolIndex.from_csv(SYMBOLS_FILE)
+                else:
+                    _index = SymbolIndex(BUILTIN_SYMBOLS)
+    return _index
+
+
+def set_index(index):
+    """Swaps the process-wide index (tests, custom symbol masters)."""
+    global _index
+    _index = index
@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# Set QUANT_TELEMETRY=0 to turn spans and counters into no-ops
+ENABLED = os.environ.get("QUANT_TELEMETRY", "1") != "0"
+
+# Upper bounds (seconds) of the stage-duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SAMPLE_INTERVAL = 0.005
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum, max]
+_current = contextvars.ContextVar("quant_trace", default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def count(name, value=1, **labels):
+    """Adds value to a labelled counter."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def cache_event(cache, event):
+    """Counts a hit / miss / stale read on one of the in-process caches."""
+    count("cache_events_total", cache=cache, event=event)
+
+
+def observe(name, seconds, **labels):
+    """Records one duration in a labelled histogram."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h[i] += 1
+                break
+        else:
+            h[len(BUCKETS)] += 1
+        h[-2] += seconds
+        h[-1] = max(h[-1], seconds)
+
+
+class Trace:
+    """Spans recorded for one request, as (name, start offset, seconds, error) tuples."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name, started, seconds, error):
+        with self._lock:
+            self.spans.append((name, started - self.started, seconds, error))
+
+    def timings(self):
+        """Seconds per stage (repeated stages are summed) plus the request total."""
+        out = {}
+        with self._lock:
+            for name, _, seconds, _ in self.spans:
+                out[name] = out.get(name, 0.0) + seconds
+        out["total"] = time.perf_counter() - self.started
+        return {k: round(v, 6) for k, v in out.items()}
+
+
+@contextmanager
+def trace():
+    """Collects the spans of one request. Nested calls share the outermost trace."""
+    current = _current.get()
+    if current is not None:
+        yield current
+        return
+    t = Trace()
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, **labels):
+    """Times a stage into the stage_seconds histogram and the active trace; exceptions are counted and re-raised."""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        observe("stage_seconds", seconds, stage=name, **labels)
+        if error:
+            count("stage_errors_total", stage=name, **labels)
+        t = _current.get()
+        if t is not None:
+            t.add(name, started, seconds, error)
+
+
+def submit(pool, fn, *args, **kwargs):
+    """pool.submit that carries the caller's trace into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def metrics():
+    """Snapshot of every counter and histogram as a plain dict."""
+    with _lock:
+        counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()]
+        histograms = [{
+            "name": n, "labels": dict(l), "count": sum(h[:-2]), "sum": round(h[-2], 6),
+            "max": round(h[-1], 6), "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], h[:-2])),
+        } for (n, l), h in _histograms.items()]
+    return {"counters": counters, "histograms": histograms}
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text(prefix="quant_"):
+    """Counters and histograms in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(h)) for k, h in _histograms.items())
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {prefix}{name} counter")
+            typed.add(name)
+        lines.append(f"{prefix}{name}{_labels(labels)} {value}")
+    for (name, labels), h in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, n in zip([*map(str, BUCKETS), "+Inf"], h[:-2]):
+            cumulative += n
+            lines.append(f"{prefix}{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{prefix}{name}_sum{_labels(labels)} {h[-2]:.6f}")
+        lines.append(f"{prefix}{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class _Sampler(threading.Thread):
+    """Polls every thread's stack; counts self and cumulative samples per function."""
+
+    # Leaf frames of threads that are only waiting (pool workers, futures, the event loop)
+    IDLE = ("threading.py", "queue.py", "selectors.py")
+
+    def __init__(self, interval):
+        super().__init__(name="quant-sampler", daemon=True)
+        self.interval = interval
+        self.samples = 0
+        self.own = Counter()
+        self.cumulative = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me or frame.f_code.co_filename.endswith(self.IDLE):
+                    continue
+                self.samples += 1
+                leaf = True
+                seen = set()
+                while frame is not None:
+                    code = frame.f_code
+                    where = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    if leaf:
+                        self.own[where] += 1
+                        leaf = False
+                    if where not in seen:
+                        self.cumulative[where] += 1
+                        seen.add(where)
+                    frame = frame.f_back
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def report(self, limit):
+        lines = [f"{self.samples} samples every {self.interval * 1000:.0f} ms (all busy threads)",
+                 f"{'cumulative':>10} {'self':>6}  function"]
+        for where, n in self.cumulative.most_common(limit):
+            lines.append(f"{n:>10} {self.own[where]:>6}  {where}")
+        return "\n".join(lines)
+
+
+class Profile:
+    """Result holder for profile(); report is filled in when the block exits."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.report = ""
+
+
+@contextmanager
+def profile(mode="cprofile", limit=30, interval=SAMPLE_INTERVAL):
+    """Opt-in profiler around one request; read .report after the block.
+
+    "cprofile" is deterministic but only sees the calling thread (run the engine with
+    EXECUTION_MODE = "sequential" to keep every stage on it). "sample" polls all threads'
+    stacks every interval seconds, so it also covers the concurrent source workers.
+    """
+    result = Profile(mode)
+    if mode == "sample":
+        sampler = _Sampler(interval)
+        sampler.start()
+        try:
+            yield result
+        finally:
+            sampler.stop()
+            result.report = sampler.report(limit)
+        return
+    if mode != "cprofile":
+        raise ValueError(f"Unknown profile mode '{mode}' (use 'cprofile' or 'sample')")
+
+    import io
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        result.report = out.getvalue()
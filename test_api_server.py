@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from starlette.requests import Request
+
+import api_server
+from api_server import SingleFlight
+
+
+def call(handler, path, query="", method="GET", body=None):
+    """Runs a route handler on a hand-built request; returns (status, JSON body)."""
+    raw = body if isinstance(body, bytes) else (json.dumps(body).encode() if body is not None else b"")
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode(),
+             "headers": [(b"content-type", b"application/json")]}
+
+    async def receive():
+        return {"type": "http.request", "body": raw, "more_body": False}
+
+    response = asyncio.run(handler(Request(scope, receive)))
+    return response.status_code, json.loads(response.body)
+
+
+def test_single_flight_coalesces_identical_requests():
+    calls = []
+    lock = threading.Lock()
+
+    def slow_compute(ticker):
+        with lock:
+            calls.append(ticker)
+        time.sleep(0.2)
+        return {"ticker": ticker}
+
+    async def scenario():
+        flight = SingleFlight()
+        same = [flight.run(("analyze", ("NVDA",)), slow_compute, "NVDA") for _ in range(25)]
+        other = flight.run(("analyze", ("AAPL",)), slow_compute, "AAPL")
+        results = await asyncio.gather(*same, other)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert sorted(calls) == ["AAPL", "NVDA"]
+    assert all(r is results[0] for r in results[:25])
+    assert results[-1] == {"ticker": "AAPL"}
+    assert flight.stats == {"started": 2, "coalesced": 24}
+    assert flight.in_flight == 0
+
+
+def test_analyze_and_compare_handlers(offline_engine):
+    status, body = call(api_server.analyze, "/analyze", "q=Analyze+BBB")
+    assert status == 200 and body["tickers"] == ["BBB"] and "QUANT REPORT: BBB" in body["response"]
+
+    status, body = call(api_server.compare, "/compare", "tickers=CCC,AAA")
+    assert status == 200 and body["tickers"] == ["AAA", "CCC"] and body["risk"]["weights"] == {"AAA": 0.5, "CCC": 0.5}
+
+    assert call(api_server.analyze, "/analyze")[0] == 400
+    assert call(api_server.analyze, "/analyze", "q=hello+there")[0] == 404
+    assert call(api_server.analyze, "/analyze", "q=AAA&interval=3m")[0] == 400
+    assert call(api_server.analyze, "/analyze", "q=AAA&profile=perf")[0] == 400
+    assert call(api_server.compare, "/compare", "tickers=AAA")[0] == 400
+
+
+def test_screen_handler_get_and_post(offline_engine):
+    status, body = call(api_server.screen, "/screen", "tickers=AAA,BBB,CCC")
+    assert status == 200 and body["period"] == "1y" and body["count"] == len(body["results"])
+
+    status, posted = call(api_server.screen, "/screen", method="POST", body={"tickers": ["ccc", "AAA", "BBB"]})
+    assert status == 200 and posted == body
+
+
+@pytest.mark.parametrize("body", [["AAA"], "AAA", 3, None, {"tickers": "AAA"}, {"tickers": ["AAA", 1]},
+                                  {"tickers": ["AAA"], "period": 5}, {}, b"{not json"])
+def test_screen_rejects_malformed_bodies(body):
+    status, payload = call(api_server.screen, "/screen", method="POST", body=body if body is not None else b"null")
+    assert status == 400 and "error" in payload
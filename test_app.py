@@ -0,0 +1,55 @@
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from financial_engine import FinancialEngine
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+@pytest.fixture
+def engine_calls(offline_engine, monkeypatch):
+    calls = []
+    run = FinancialEngine.run_analysis
+
+    def counted(query, forecaster=None):
+        calls.append(query)
+        return run(query, forecaster)
+
+    monkeypatch.setattr(FinancialEngine, "run_analysis", staticmethod(counted))
+    st.cache_resource.clear()
+    yield calls
+    st.cache_resource.clear()
+
+
+def ask(at, query):
+    at.text_input[0].input(query)
+    at.button[0].click()  # EXECUTE ENGINE
+    return at.run()
+
+
+def test_history_replays_from_cache_and_stays_bounded(engine_calls, offline_engine):
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    ask(at, "Analyze AAA")
+    ask(at, "Analyze BBB")
+    assert engine_calls == ["Analyze AAA", "Analyze BBB"]
+    assert not at.exception
+
+    # Newest first: hist_1 is the older AAA report; replaying it does not touch the engine
+    at.button(key="hist_1").click().run()
+    assert at.session_state["active"] == "Analyze AAA"
+    assert engine_calls == ["Analyze AAA", "Analyze BBB"]
+    assert any("QUANT REPORT: AAA" in m.value for m in at.markdown)
+
+    for t in list(offline_engine)[2:]:
+        ask(at, f"Analyze {t}")
+    ask(at, "Compare AAA and BBB")
+    queries = [h["q"] for h in at.session_state["history"]]
+    assert len(queries) == 8 and "Analyze BBB" not in queries  # oldest evicted
+    ask(at, "Analyze AAA")
+    queries = [h["q"] for h in at.session_state["history"]]
+    assert queries[-1] == "Analyze AAA" and len(set(queries)) == len(queries) == 8  # moved, not duplicated
+    # Compact references only: no results or figures kept in the session
+    assert all(set(h) == {"q", "day", "tickers"} for h in at.session_state["history"])
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+import backtest
+import indicators
+import screener
+
+
+def sample_closes(seed=5, days=900):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=days)
+    closes = pd.DataFrame(50 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, (days, 4)), axis=0)),
+                          index=dates, columns=["AAA", "BBB", "CCC", "DDD"])
+    closes.loc[closes.index[:300], "DDD"] = np.nan  # listed later
+    return closes
+
+
+def naive_events(close, rule_key, horizon):
+    """Per-bar loop over one ticker with the scalar rule, as a reference."""
+    close = close.dropna().to_numpy()
+    ind = indicators.compute_indicators(close)
+    f, s, r = ind["sma_fast"][:, 0], ind["sma_slow"][:, 0], ind["rsi"][:, 0]
+    fired, prev = [], False
+    for t in range(1, len(close)):
+        now = t + 1 >= 200 and indicators.evaluate_rules(f[t - 1], s[t - 1], f[t], s[t], r[t])[rule_key]
+        if now and not prev and t + horizon < len(close):
+            fired.append(close[t + horizon] / close[t] - 1)
+        prev = now
+    return fired
+
+
+def test_matches_per_bar_loop():
+    closes = sample_closes()
+    table = backtest.backtest_matrix(closes, horizons=(20,)).set_index("Rule")
+    for rule in indicators.SIGNAL_RULES:
+        fwd = [x for t in closes.columns for x in naive_events(closes[t], rule["key"], 20)]
+        row = table.loc[rule["label"]]
+        if fwd:
+            assert np.isclose(row["Fwd 20d"], np.mean(fwd))
+            sign = backtest.DIRECTIONS[rule["type"]]
+            assert np.isclose(row["Hit 20d"], np.mean([sign * x > 0 for x in fwd]))
+            assert row["Worst Drawdown 20d"] <= row["Avg Drawdown 20d"] <= 0
+
+
+def test_last_bar_agrees_with_screener_and_sweep_runs():
+    closes = sample_closes()
+    fired = screener.screen_matrix(closes, include_quiet=True).set_index("Ticker")["Signals"]
+    aligned, n_bars, _ = screener._right_align(closes)
+    ind = indicators.compute_indicators(aligned)
+    masks = indicators.signal_masks(ind["sma_fast"], ind["sma_slow"], ind["rsi"])
+    for col, ticker in enumerate(closes.columns):
+        last = [r["label"] for r in indicators.SIGNAL_RULES if masks[r["key"]][-1, col]]
+        assert last == list(fired[ticker])
+
+    grid = backtest.parameter_grid(sma_fast=[20], sma_slow=[100], overbought=[70.0, 80.0], oversold=[30.0])
+    result = backtest.sweep(closes, grid, processes=2)
+    assert len(result) == len(grid) * len(indicators.SIGNAL_RULES)
+    assert set(result["overbought"]) == {70.0, 80.0}
+
+
+def test_intraday_columns_count_bars_of_the_interval():
+    closes = sample_closes(days=400)
+    closes.index = pd.date_range("2026-09-01 09:30", periods=len(closes), freq="5min")
+    table = backtest.backtest_matrix(closes, horizons=(5, 20), interval="5m")
+    assert {"Fwd 5x5m", "Hit 20x5m", "Worst Drawdown 20x5m"} <= set(table.columns)
+    assert "Fwd 20d" not in table.columns
+    daily = backtest.backtest_matrix(sample_closes(days=400), horizons=(5, 20))
+    np.testing.assert_allclose(table["Fwd 20x5m"], daily["Fwd 20d"], equal_nan=True)
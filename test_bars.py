@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bars
+import market_data
+from financial_engine import FinancialEngine
+
+
+def minute_frame(days=3, end=None):
+    """Regular-session 1m bars (9:30-15:59) for the last few business days."""
+    rng = np.random.default_rng(7)
+    sessions = pd.bdate_range(end=pd.Timestamp(end or pd.Timestamp.now()).normalize(), periods=days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(d + pd.Timedelta(hours=9, minutes=30), periods=390, freq="min") for d in sessions
+    ]), name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "Open": open_, "High": np.maximum(open_, close) + 0.05, "Low": np.minimum(open_, close) - 0.05,
+        "Close": close, "Volume": rng.integers(100, 10_000, len(index)),
+    }, index=index)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    frames = {"AAA@1m": minute_frame(), "BBB@1m": minute_frame()}
+    monkeypatch.setattr(market_data, "_provider", market_data.FixtureProvider(frames=frames))
+    monkeypatch.setattr(market_data, "_bar_store", bars.BarStore(market_data.get_provider))
+    return market_data.get_bar_store()
+
+
+def test_compact_layout_round_trips():
+    df = minute_frame(days=1)
+    b = bars.Bars.from_frame(df, "AAA", "1m")
+    assert (b.open.dtype, b.close.dtype, b.volume.dtype, b.ts.dtype) == (np.float32, np.float32, np.int64, np.int64)
+    assert b.nbytes == 32 * len(df)
+    back = b.to_frame()
+    assert back.index.equals(df.index)
+    np.testing.assert_allclose(back["Close"], df["Close"], rtol=1e-6)
+    assert len(b.slice(df.index[10], df.index[20])) == 10
+
+
+@pytest.mark.parametrize("interval", list(bars.INTERVALS))
+def test_default_period_is_servable(interval):
+    # Late in the day, so the lookback from the normalized period start is as long as it gets
+    now = pd.Timestamp("2026-10-16 23:59")
+    start = market_data.period_start(bars.default_period(interval), now=now)
+    base = bars.base_interval(interval, start, now=now)
+    assert bars.INTERVALS[interval] % bars.INTERVALS[base] == 0
+
+
+@pytest.mark.parametrize("interval,minutes", [("5m", 5), ("1h", 60)])
+def test_resample_matches_pandas(interval, minutes):
+    df = minute_frame()
+    day = df.index.normalize()
+    offset = df.index - day - pd.Timedelta(hours=9, minutes=30)
+    expected = df.groupby([day, offset // pd.Timedelta(minutes=minutes)]).agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+
+    out = bars.resample(bars.Bars.from_frame(df, "AAA", "1m"), interval).to_frame()
+    assert len(out) == len(expected) == 3 * -(-390 // minutes)
+    assert out.index[1] - out.index[0] == pd.Timedelta(minutes=minutes)
+    assert (out.index.time == pd.Timestamp("09:30").time()).sum() == 3
+    for col in ("Open", "High", "Low", "Close"):
+        np.testing.assert_allclose(out[col], expected[col], rtol=1e-6)
+    np.testing.assert_array_equal(out["Volume"], expected["Volume"])
+
+    daily = bars.resample(bars.Bars.from_frame(df, "AAA", "1m"), "1d").to_frame()
+    assert list(daily.index) == list(df.index.normalize().unique())
+    with pytest.raises(ValueError):
+        bars.resample(bars.resample(bars.Bars.from_frame(df, "AAA", "1m"), "2m"), "5m")
+
+
+def test_forecast_dates_follow_the_trading_calendar():
+    # Christmas Eve 2025 is a Wednesday: Christmas is skipped, then the weekend
+    equity = pd.bdate_range(end="2025-12-24", periods=30)
+    assert [str(d.date()) for d in bars.future_timestamps(equity, 3)] == ["2025-12-26", "2025-12-29", "2025-12-30"]
+    # Good Friday 2026 (April 3) and the Juneteenth holiday
+    assert bars.future_timestamps(pd.bdate_range(end="2026-04-02", periods=5), 1)[0] == pd.Timestamp("2026-04-06")
+    assert bars.future_timestamps(pd.bdate_range(end="2026-06-18", periods=5), 1)[0] == pd.Timestamp("2026-06-22")
+
+    crypto = pd.date_range(end="2025-12-24", periods=30)
+    assert list(bars.future_timestamps(crypto, 3)) == list(pd.date_range("2025-12-25", periods=3))
+
+    intraday = bars.resample(bars.Bars.from_frame(minute_frame(end="2025-12-24"), "X", "1m"), "1h").index()
+    ahead = bars.future_timestamps(intraday, 8, "1h")
+    assert ahead[0] == pd.Timestamp("2025-12-26 09:30")
+    assert ahead[7] == pd.Timestamp("2025-12-29 09:30")
+    assert all(d.dayofweek < 5 for d in ahead)
+
+
+def test_store_derives_coarser_bars_from_one_fetch(store):
+    start = pd.Timestamp.now().normalize() - pd.Timedelta(days=6)
+    five = store.get_many(["AAA", "BBB"], "5m", start)
+    assert store.fetches == 1
+    fifteen = store.get("AAA", "15m", start)
+    hourly = store.get("BBB", "1h", start)
+    assert store.fetches == 1
+    assert len(five["AAA"]) == 3 * 78 and len(fifteen) == 3 * 26 and len(hourly) == 3 * 7
+    assert fifteen.close[-1] == five["AAA"].close[-1]
+    assert store.get("AAA", "15m", start) is not fifteen  # sliced view of the memoized bars
+    assert store.nbytes < 5 * 32 * 3 * 390
+
+    store.max_bytes = 0
+    store.get("AAA", "5m", start)
+    assert len(store._bases) == 1
+
+
+def test_intraday_analysis(offline_engine, monkeypatch):
+    frames = dict(offline_engine, **{"AAA@5m": bars.resample(bars.Bars.from_frame(minute_frame(), "AAA", "1m"),
+                                                                "5m").to_frame()})
+    monkeypatch.setattr(market_data, "_provider", market_data.FixtureProvider(frames=frames))
+    monkeypatch.setattr(market_data, "_bar_store", bars.BarStore(market_data.get_provider))
+
+    result = FinancialEngine.run_analysis("Analyze AAA", forecaster="linear", interval="15m")
+    assert "**Bars:** 15m" in result.response and result.fig is not None
+    forecast = pd.DatetimeIndex(result.fig.data["ForecastDate"])
+    assert (forecast[1:] > forecast[:-1]).all()
+    assert forecast.time.min() >= pd.Timestamp("09:30").time() and forecast.time.max() <= pd.Timestamp("15:45").time()
+
+    daily = FinancialEngine.run_analysis("Analyze AAA", forecaster="linear")
+    assert "**Bars:**" not in daily.response
+    assert all(d.dayofweek < 5 for d in pd.DatetimeIndex(daily.fig.data["ForecastDate"]))
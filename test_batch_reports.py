@@ -0,0 +1,30 @@
+import io
+import zipfile
+import multiprocessing
+
+import pytest
+
+import batch_reports
+
+# Workers inherit the monkeypatched offline sources only when forked
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs fork start method")
+
+
+def test_batch_streams_reports_into_zip(offline_engine, tmp_path):
+    seen = []
+    out = str(tmp_path / "reports.zip")
+    summary = batch_reports.generate_batch(["AAA", "BBB", "CCC", "NOPE"], out, processes=2, prefetch=False,
+                                           progress=lambda done, total, t, err: seen.append(done))
+    assert summary["written"] == 3 and list(summary["failed"]) == ["NOPE"]
+    assert sorted(seen) == [1, 2, 3, 4]
+    with zipfile.ZipFile(out) as zf:
+        assert sorted(zf.namelist()) == ["AAA.pdf", "BBB.pdf", "CCC.pdf"]
+        pdf = zf.read("AAA.pdf")
+    assert pdf.startswith(b"%PDF") and b"/Subtype /Image" in pdf
+
+
+def test_directory_output_without_charts(offline_engine, tmp_path):
+    summary = batch_reports.generate_batch(["AAA"], str(tmp_path / "out"), processes=1, include_chart=False)
+    assert summary["written"] == 1
+    data = (tmp_path / "out" / "AAA.pdf").read_bytes()
+    assert data.startswith(b"%PDF") and b"/Subtype /Image" not in data
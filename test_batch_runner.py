@@ -0,0 +1,112 @@
+import json
+import time
+import multiprocessing
+
+import pytest
+
+import batch_runner
+import rate_limit
+from financial_engine import FinancialEngine
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs fork start method")
+def test_batch_streams_jsonl_and_resumes(offline_engine, tmp_path):
+    out = tmp_path / "results.jsonl"
+    queries = ["Analyze AAA", "BBB", "Compare CCC and DDD", "hello there"]
+    summary = batch_runner.run_batch(queries, str(out), processes=2, limits={})
+    assert summary["written"] == 3 and list(summary["failed"]) == ["hello there"]
+
+    records = {r["query"]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert set(records) == set(queries)
+    assert records["Analyze AAA"]["tickers"] == ["AAA"] and "QUANT REPORT: AAA" in records["Analyze AAA"]["summary"]
+    assert records["Compare CCC and DDD"]["tickers"] == ["CCC", "DDD"]
+    assert "total" in records["BBB"]["timings"] and records["BBB"]["fundamentals"]["Name"] == "BBB"
+
+    # A killed run leaves a torn last line: it is cut off and only unfinished queries run again
+    with open(out, "a") as fh:
+        fh.write('{"query": "EEE", "summ')
+    summary = batch_runner.run_batch(queries + ["EEE"], str(out), processes=1, limits={})
+    assert summary["skipped"] == 3 and summary["written"] == 1 and list(summary["failed"]) == ["hello there"]
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["query"] for r in lines].count("EEE") == 1 and len(lines) == 6
+
+
+def test_token_bucket_spaces_calls():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = rate_limit.TokenBucket(2.0, burst=2, clock=lambda: now[0], sleep=sleep)
+    waits = [bucket.acquire() for _ in range(6)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.5] * 4)
+    assert now[0] == pytest.approx(2.0)
+
+
+def test_limits_are_shared_between_workers():
+    assert rate_limit.parse_limits("yfinance=4, ddgs=0.5") == {"yfinance": 4.0, "ddgs": 0.5}
+    with pytest.raises(ValueError):
+        rate_limit.parse_limits("yfinance=fast")
+    try:
+        rate_limit.configure({"yfinance": 4.0, "ddgs": 0}, share=4)
+        assert rate_limit.limits() == {"yfinance": 1.0}
+    finally:
+        rate_limit.configure()
+
+
+def test_rate_limit_waits_do_not_count_against_source_deadlines(offline_engine, monkeypatch):
+    # 16 workers sharing 32 searches/s: once the token is spent a search waits 0.5 s, past the 0.1 s deadline
+    monkeypatch.setitem(FinancialEngine.SOURCE_TIMEOUTS, "sentiment", 0.1)
+
+    def searching_sentiment(ticker):
+        rate_limit.throttle("ddgs")
+        return 0.5, [f"headline for {ticker}"]
+
+    monkeypatch.setattr(FinancialEngine, "get_sentiment", staticmethod(searching_sentiment))
+    try:
+        rate_limit.configure({"ddgs": 32}, share=16)
+        rate_limit.throttle("ddgs")
+        started = time.monotonic()
+        result = FinancialEngine.run_analysis("Analyze BBB")
+    finally:
+        rate_limit.configure()
+    assert time.monotonic() - started >= 0.45
+    assert result.missed_sources == () and result.headlines == ("headline for BBB",)
+
+
+def test_partial_reports_are_retried_on_resume(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text("\n".join(json.dumps(r) for r in [
+        {"query": "AAA", "error": None, "missed_sources": []},
+        {"query": "BBB", "error": None, "missed_sources": ["sentiment (timed out)"]},
+        {"query": "CCC", "error": "no ticker found"},
+    ]) + "\n")
+    assert batch_runner.completed_queries(str(out)) == {"AAA"}
+
+
+def test_load_queries_keeps_hashes_inside_queries(tmp_path):
+    path = tmp_path / "queries.txt"
+    path.write_text("# morning coverage\nAnalyze #AAPL\n\n  # indented comment\nCompare BRK#B and MSFT\nAnalyze #AAPL\n")
+    assert batch_runner.load_queries(str(path)) == ["Analyze #AAPL", "Compare BRK#B and MSFT"]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs fork start method")
+def test_watchlist_symbols_skip_free_text_resolution(offline_engine, monkeypatch, tmp_path, capsys):
+    import market_data
+    from quant_utils import FinancialAnalyzer
+    symbols = ["V", "F", "IT", "BRK.B"]
+    for symbol in symbols:
+        market_data.get_provider().frames[symbol] = offline_engine["AAA"]
+    monkeypatch.setattr(FinancialAnalyzer, "get_fundamentals", staticmethod(lambda t: {"Market Cap": 1e9, "Name": t}))
+    watchlist = tmp_path / "watchlist.txt"
+    watchlist.write_text("V, F\nIT  # single letters and stopwords\nbrk.b\nZZZZ\n")
+    out = tmp_path / "results.jsonl"
+
+    assert batch_runner.main([str(watchlist), str(out), "--tickers", "--workers", "1", "--rate", ""]) == 1
+    records = {r["query"]: r for r in map(json.loads, out.read_text().splitlines())}
+    for symbol in symbols:
+        assert records[symbol]["error"] is None and records[symbol]["tickers"] == [symbol]
+        assert f"QUANT REPORT: {symbol}" in records[symbol]["summary"]
+    assert records["ZZZZ"]["error"] == "no price data"
+    assert "FAILED: no price data" in capsys.readouterr().out
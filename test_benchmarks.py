@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks import run_benchmarks, synthetic
+import market_data
+
+
+def test_fake_download_matches_yfinance_layout():
+    market = synthetic.FakeMarket(["QAAA", "QAAB"], years=1)
+    by_column = market.download(["QAAA", "QAAB"])
+    assert list(by_column.columns.get_level_values(1).unique()) == ["QAAA", "QAAB"]
+    assert set(by_column.columns.get_level_values(0)) == {"Open", "High", "Low", "Close", "Volume"}
+    by_ticker = market.download(["QAAA", "QAAB"], group_by="ticker")
+    assert list(by_ticker.columns.get_level_values(0).unique()) == ["QAAA", "QAAB"]
+    # Deterministic per ticker
+    pd.testing.assert_frame_equal(synthetic.gbm_ohlcv("QAAA", end="2026-01-02"), synthetic.gbm_ohlcv("QAAA", end="2026-01-02"))
+
+
+def test_offline_restores_provider():
+    before = market_data._provider
+    with synthetic.offline(synthetic.FakeMarket(["QAAA"], years=1)):
+        bars = market_data.get_history("QAAA", "1y")
+        assert len(bars) > 200 and np.isfinite(bars["Close"]).all()
+    assert market_data._provider is before
+
+
+def test_single_ticker_case_runs_every_stage():
+    stages = run_benchmarks.run_case(1, 1, repeat=1)
+    assert set(stages) == {"resolve", "download", "indicators", "model_fit", "figure", "fundamentals",
+                           "whale", "sentiment", "pdf", "end_to_end"}
+    assert all(v >= 0 for v in stages.values())
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"1x1y": {"download": 0.010, "figure": 0.001}}
+    results = {"1x1y": {"download": 0.020, "figure": 0.003, "pdf": 1.0}}
+    rows = {(case, stage): regressed for case, stage, _, _, _, regressed in run_benchmarks.compare(results, baseline)}
+    # figure tripled but by under MIN_DELTA; pdf has no baseline
+    assert rows == {("1x1y", "download"): True, ("1x1y", "figure"): False}
+
+
+def test_check_fails_without_a_baseline(tmp_path, capsys):
+    missing = str(tmp_path / "baseline.json")
+    assert run_benchmarks.main(["--check", "--baseline", missing, "--output", str(tmp_path / "out.json")]) == 2
+    assert "--update-baseline" in capsys.readouterr().err
+    assert not (tmp_path / "out.json").exists()
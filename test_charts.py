@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+import charts
+
+
+def analysis_data(n=3000, interval="1d", forecast=30):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    dates = pd.date_range("2020-01-01", periods=n, freq="D" if interval == "1d" else "5min").to_numpy()
+    return {
+        "ticker": "AAA", "interval": interval, "Date": dates, "Close": close, "Volume": np.ones(n),
+        "Trendline": close, "SMA50": close, "SMA200": close, "BB_Upper": close + 1, "BB_Lower": close - 1,
+        "RSI": np.full(n, 50.0),
+        "ForecastDate": pd.date_range(dates[-1], periods=forecast + 1, freq="D")[1:].to_numpy(),
+        "Forecast": np.full(forecast, close[-1]),
+    }
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 25.0  # a single spike must survive the thinning
+    idx = charts.lttb_indices(x, y, 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == len(x) - 1
+    assert (np.diff(idx) > 0).all()
+    assert 4321 in idx
+    # Nothing to thin (or too few points asked for): every index, in order
+    np.testing.assert_array_equal(charts.lttb_indices(x[:100], y[:100], 500), np.arange(100))
+    np.testing.assert_array_equal(charts.lttb_indices(x[:100], y[:100], 2), np.arange(100))
+
+
+def test_lazy_figure_builds_once_per_option_set():
+    calls = []
+
+    def builder(data, max_points=None, webgl=None):
+        calls.append((max_points, webgl))
+        return charts.build_analysis_figure(data, max_points=max_points, webgl=webgl)
+
+    lazy = charts.LazyFigure(builder, analysis_data())
+    assert calls == []
+    fig = lazy.figure()
+    assert lazy.figure() is fig and calls == [(charts.DEFAULT_MAX_POINTS, None)]
+    assert len(fig.data[0].x) == charts.DEFAULT_MAX_POINTS
+
+    full = lazy.figure(max_points=None)
+    assert full is not fig and len(full.data[0].x) == 3000 and len(calls) == 2
+
+    stats = lazy.stats()
+    assert stats["points"] == charts.DEFAULT_MAX_POINTS * 7 + 30 and stats["traces"] == len(fig.data)
+    assert stats["payload_bytes"] > 0 and stats["build_ms"] >= 0
+    assert len(calls) == 2
+
+
+def test_forecast_label_counts_bars_of_the_interval():
+    daily = charts.build_analysis_figure(analysis_data(300), max_points=None)[0]
+    intraday = charts.build_analysis_figure(analysis_data(300, interval="5m", forecast=48), max_points=None)[0]
+    names = lambda fig: [t.name for t in fig.data]
+    assert "30D Forecast" in names(daily)
+    assert "48 x 5m Forecast" in names(intraday) and "48D Forecast" not in names(intraday)
@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+import cli
+
+HEAVY = ["plotly", "sklearn", "scipy", "matplotlib", "yfinance", "ddgs", "duckduckgo_search", "fpdf"]
+
+
+def test_entry_points_import_without_heavy_dependencies():
+    code = ("import sys, financial_engine, cli; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_cli_text_and_json(offline_engine, capsys):
+    assert cli.main(["Analyze", "AAA", "--timings"]) == 0
+    text = capsys.readouterr().out
+    assert "QUANT REPORT: AAA" in text and "Timings (ms):" in text
+
+    assert cli.main(["Analyze", "AAA", "--json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["tickers"] == ["AAA"] and "chart" not in data
+
+    assert cli.main(["hello", "there"]) == 1
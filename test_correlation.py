@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+import correlation
+
+
+def mixed_calendar_closes(seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=400, freq="D")
+    closes = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 6)), axis=0)),
+                          index=dates, columns=["AAA", "BBB", "CCC", "DDD", "BTC-USD", "ETH-USD"])
+    closes.loc[closes.index.dayofweek >= 5, ["AAA", "BBB", "CCC", "DDD"]] = np.nan
+    closes.loc[closes.index[:150], "DDD"] = np.nan  # late listing
+    return closes
+
+
+def test_matches_pandas_pairwise_corr():
+    closes = mixed_calendar_closes()
+    returns = pd.DataFrame(correlation.returns_matrix(closes), index=closes.index, columns=closes.columns)
+    # Equity Monday returns are measured from Friday, not left NaN
+    expected_returns = closes.apply(lambda s: s.dropna().pct_change()).reindex(closes.index)
+    np.testing.assert_allclose(returns.to_numpy(), expected_returns.to_numpy(), rtol=1e-5, atol=1e-7)
+
+    ours = correlation.correlation_matrix(returns, block=4)
+    ref = returns.astype(float).corr()
+    np.testing.assert_allclose(ours.to_numpy(), ref.to_numpy(), atol=1e-5)
+
+    rolling = correlation.rolling_correlation(returns, [("AAA", "BTC-USD")], window=60, min_periods=30)
+    ref = returns["AAA"].astype(float).rolling(60, min_periods=30).corr(returns["BTC-USD"].astype(float))
+    np.testing.assert_allclose(rolling["AAA/BTC-USD"].to_numpy(), ref.to_numpy(), atol=1e-9)
+
+
+def test_clustered_and_cached():
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range("2024-01-01", periods=300)
+    a, b = rng.normal(0, 0.01, (2, len(dates), 1))
+    rets = np.hstack([a + rng.normal(0, 0.002, (len(dates), 3)), b + rng.normal(0, 0.002, (len(dates), 3))])
+    # Alphabetical order interleaves the two factor groups; clustering must separate them
+    first, second = ["AA", "CC", "EE"], ["BB", "DD", "FF"]
+    closes = pd.DataFrame(100 * np.exp(np.cumsum(rets, axis=0)), index=dates, columns=first + second)
+    correlation.clear_cache()
+    corr = correlation.get_correlation(closes)
+    assert set(corr.columns[:3]) in (set(first), set(second))
+    assert correlation.get_correlation(closes) is corr
@@ -1,13 +1,10 @@
 import re
 import warnings
-import matplotlib
-import matplotlib.pyplot as plt
-from financial_engine import run_deterministic_analysis, SharedState
+from financial_engine import run_deterministic_analysis
 
 # Suppress Pydantic and Tcl/Tk noise
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", module="pydantic")
-matplotlib.use('Agg')
 
 def main():
     print("--- Starting Zero-Stress Predictive Analysis Test ---")
@@ -16,15 +13,15 @@ def main():
         query_comp = "Compare NVDA and TSLA"
         print(f"\n--- Testing Comparison: '{query_comp}' ---")
         result_comp = run_deterministic_analysis(query_comp)
-        print(result_comp)
+        print(result_comp.response)
         
         # Test Single Analysis
         query_single = "Analyze Apple"
         print(f"\n--- Testing Single: '{query_single}' ---")
         result_single = run_deterministic_analysis(query_single)
-        print(result_single)
+        print(result_single.response)
         
-        if SharedState.latest_fig:
+        if result_single.fig:
              print("\n[SUCCESS] Viz figure detected.")
         else:
              print("\n[WARNING] No visualization was generated.")
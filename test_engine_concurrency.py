@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from financial_engine import FinancialEngine, AnalysisResult
+from quant_utils import FinancialAnalyzer
+
+
+def test_results_are_immutable(offline_engine):
+    result = FinancialEngine.run_analysis("Analyze AAA")
+    assert isinstance(result, AnalysisResult)
+    with pytest.raises(Exception):
+        result.response = "tampered"
+    with pytest.raises(TypeError):
+        result.fundamentals["Name"] = "tampered"
+    assert isinstance(result.signals, tuple)
+
+
+def test_parallel_sessions_do_not_interfere(offline_engine):
+    # Sequential baseline per ticker
+    tickers = list(offline_engine)
+    expected = {t: FinancialEngine.run_analysis(f"Analyze {t}") for t in tickers}
+
+    queries = [tickers[i % len(tickers)] for i in range(64)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda t: (t, FinancialEngine.run_analysis(f"Analyze {t}")), queries))
+
+    for ticker, result in results:
+        base = expected[ticker]
+        assert result.tickers == (ticker,)
+        assert result.response == base.response
+        assert result.signals == base.signals
+        assert result.fundamentals["Name"] == ticker
+        assert result.whale_data["holders"][0]["Holder"] == f"Fund of {ticker}"
+        assert result.headlines == (f"headline for {ticker}",)
+        assert result.fig is not None and result.fig is not base.fig
+
+
+def test_late_and_failing_sources_fall_back(offline_engine, monkeypatch):
+    def slow_fundamentals(ticker):
+        time.sleep(1.0)
+        return {"Market Cap": 1e9}
+
+    def broken_whale(ticker):
+        raise ConnectionError("holders endpoint down")
+
+    monkeypatch.setattr(FinancialAnalyzer, "get_fundamentals", staticmethod(slow_fundamentals))
+    monkeypatch.setattr(FinancialAnalyzer, "fetch_whale_frames", staticmethod(broken_whale))
+    monkeypatch.setitem(FinancialEngine.SOURCE_TIMEOUTS, "fundamentals", 0.1)
+
+    started = time.perf_counter()
+    results, missed = FinancialEngine.gather_sources("AAA")
+    assert time.perf_counter() - started < 0.8
+    assert missed == ["fundamentals (timed out)", "whale (failed)"]
+    assert results["fundamentals"] == FinancialEngine.SOURCE_FALLBACKS["fundamentals"]
+    assert results["whale"] == FinancialEngine.SOURCE_FALLBACKS["whale"]
+    assert results["sentiment"] == (0.0, ["headline for AAA"])
+
+    result = FinancialEngine.run_analysis("Analyze AAA")
+    assert result.missed_sources == ("fundamentals (timed out)", "whale (failed)")
+    assert "Partial report: fundamentals (timed out), whale (failed)" in result.response
+    assert dict(result.fundamentals) == {} and result.fig is not None
@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import forecasting
+
+
+class CountingForecaster(forecasting.Forecaster):
+    """Straight line whose fits are counted (and slow enough for callers to overlap)."""
+
+    defaults = {"delay": 0.05}
+    fits = 0
+    lock = threading.Lock()
+
+    def fit(self, close):
+        with CountingForecaster.lock:
+            CountingForecaster.fits += 1
+        time.sleep(self.params["delay"])
+        self.last = float(close[-1])
+        return self
+
+    def predict(self, idx):
+        return np.full(len(idx), self.last)
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    monkeypatch.setitem(forecasting.FORECASTERS, "counting", CountingForecaster)
+    CountingForecaster.fits = 0
+    forecasting.clear_cache()
+    yield CountingForecaster
+    forecasting.clear_cache()
+
+
+def test_unknown_forecaster_names_the_registry():
+    with pytest.raises(ValueError, match="Unknown forecaster 'arima'.*ewma_drift.*random_forest"):
+        forecasting.get_forecaster("arima")
+    with pytest.raises(ValueError):
+        forecasting.get_fitted("arima", "AAA", np.arange(10.0), 0, 9)
+
+
+def test_fits_are_cached_per_ticker_bar_range_and_params(counting):
+    close = np.linspace(10, 20, 50)
+    first = forecasting.get_fitted("counting", "AAA", close, "2026-01-01", "2026-03-01")
+    assert forecasting.get_fitted("counting", "AAA", close, "2026-01-01", "2026-03-01") is first
+    assert counting.fits == 1
+
+    # A new bar, another ticker or other params each get their own fit
+    assert forecasting.get_fitted("counting", "AAA", close, "2026-01-01", "2026-03-02") is not first
+    assert forecasting.get_fitted("counting", "BBB", close, "2026-01-01", "2026-03-01") is not first
+    assert forecasting.get_fitted("counting", "AAA", close, "2026-01-01", "2026-03-01", delay=0.0) is not first
+    assert counting.fits == 4
+
+
+def test_cache_evicts_the_least_recently_used_fit(counting, monkeypatch):
+    monkeypatch.setattr(forecasting, "MAX_CACHED_MODELS", 2)
+    close = np.linspace(10, 20, 50)
+    a = forecasting.get_fitted("counting", "AAA", close, 0, 49, delay=0.0)
+    forecasting.get_fitted("counting", "BBB", close, 0, 49, delay=0.0)
+    assert forecasting.get_fitted("counting", "AAA", close, 0, 49, delay=0.0) is a
+    forecasting.get_fitted("counting", "CCC", close, 0, 49, delay=0.0)
+    assert len(forecasting._cache) == 2 and counting.fits == 3
+    assert forecasting.get_fitted("counting", "AAA", close, 0, 49, delay=0.0) is a
+    forecasting.get_fitted("counting", "BBB", close, 0, 49, delay=0.0)
+    assert counting.fits == 4
+
+
+def test_concurrent_callers_share_one_fit(counting):
+    close = np.linspace(10, 20, 50)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        models = list(pool.map(lambda _: forecasting.get_fitted("counting", "AAA", close, 0, 49), range(32)))
+    assert counting.fits == 1
+    assert all(m is models[0] for m in models)
+    assert forecasting._fit_locks == {}
+
+
+def test_failed_fits_release_their_lock(counting, monkeypatch):
+    def broken_fit(self, close):
+        raise RuntimeError("solver diverged")
+
+    monkeypatch.setattr(CountingForecaster, "fit", broken_fit)
+    for last_bar in range(5):
+        with pytest.raises(RuntimeError):
+            forecasting.get_fitted("counting", "AAA", np.arange(10.0), 0, last_bar)
+    assert forecasting._fit_locks == {} and len(forecasting._cache) == 0
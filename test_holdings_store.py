@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+import holdings_store
+from holdings_store import HoldingsStore
+
+
+def holders_frame(names, pct, change, value=None):
+    return pd.DataFrame({
+        "Date Reported": pd.Timestamp("2026-06-30"),
+        "Holder": names,
+        "pctHeld": pct,
+        "Shares": np.arange(len(names)) * 1000.0 + 1000,
+        "Value": value if value is not None else np.arange(len(names)) * 1e6 + 1e6,
+        "pctChange": change,
+    })
+
+
+def build_store():
+    store = HoldingsStore()
+    insiders = pd.DataFrame({"Insider": ["JANE DOE"], "Position": ["CEO"], "Text": ["Sale at price 100"],
+                             "Shares": [500], "Value": [50000], "Start Date": [pd.Timestamp("2026-07-01")]})
+    store.ingest_many({
+        "AAA": (holders_frame(["Vanguard Group Inc", "Blackrock Inc."], [0.08, 0.06], [0.02, -0.01]), insiders),
+        "BBB": (holders_frame(["Vanguard Group Inc", "State Street Corp"], [0.07, np.nan], [-0.03, 0.05],
+                              value=[4e6, 2e6]), None),
+        "CCC": (holders_frame(["Blackrock Inc.", "Vanguard Group Inc"], [5.5, 0.09], [0.10, 0.04]), None),
+    }, market_caps={"BBB": 1e8})
+    return store
+
+
+def test_whale_panel_reads_from_store():
+    store = build_store()
+    panel = store.whale_panel("AAA")
+    assert panel["holders"] == [{"Holder": "Vanguard Group Inc", "Ownership": "8.00%"},
+                                {"Holder": "Blackrock Inc.", "Ownership": "6.00%"}]
+    assert panel["insiders"] == [{"Text": "Sale at price 100 (CEO)"}]
+    # Percent-style values and the market-cap fallback
+    assert store.whale_panel("CCC")["holders"][0]["Ownership"] == "5.50%"
+    assert store.whale_panel("BBB")["holders"][1]["Ownership"] == "2.00%"
+
+    # Re-ingesting a ticker replaces its snapshot
+    store.ingest("aaa", holders_frame(["New Fund"], [0.01], [0.0]), None)
+    assert [h["Holder"] for h in store.whale_panel("AAA")["holders"]] == ["New Fund"]
+    assert store.whale_panel("AAA")["insiders"] == []
+
+
+def test_cross_ticker_queries(tmp_path):
+    store = build_store()
+    top = store.top_holders(2)
+    assert top["Holder"].tolist() == ["Vanguard Group Inc", "Blackrock Inc."]
+    assert top["Positions"].tolist() == [3, 2]
+
+    increased = store.increased_by("vanguard")
+    assert increased["Ticker"].tolist() == ["CCC", "AAA"]
+
+    store.save(str(tmp_path))
+    loaded = HoldingsStore.load(str(tmp_path))
+    assert loaded.whale_panel("BBB") == store.whale_panel("BBB")
+    pd.testing.assert_frame_equal(loaded.top_holders(5), store.top_holders(5))
+
+
+def test_unchanged_frames_are_not_reingested(monkeypatch):
+    store = HoldingsStore()
+    holders = holders_frame(["Vanguard Group Inc"], [0.08], [0.0])
+    calls = []
+    real = holdings_store.normalize_holders
+    monkeypatch.setattr(holdings_store, "normalize_holders", lambda *a: calls.append(a[0]) or real(*a))
+
+    store.ingest("AAA", holders, None, market_cap=1e9)
+    store.ingest("AAA", holders, None, market_cap=1e9)
+    assert calls == ["AAA"]
+    # A new frame (e.g. after the TTL cache refreshed) or another market cap re-ingests
+    store.ingest("AAA", holders.copy(), None, market_cap=1e9)
+    store.ingest("AAA", holders, None, market_cap=2e9)
+    assert calls == ["AAA"] * 3
+    assert len(store.holders) == 1
+
+
+def test_replace_patches_the_group_indexes():
+    store = build_store()
+    store.top_holders(1)
+    store.positions_of("vanguard")  # builds the Holder index before the replacements
+    for i in range(5):
+        store.ingest("BBB", holders_frame(["Vanguard Group Inc", f"Fund {i}"], [0.07, 0.01], [0.0, 0.0]), None)
+        for table in (store.holders, store.insiders):
+            for column, groups in table._groups.items():
+                rebuilt = holdings_store._group(table.data[column], table.rows())
+                assert groups.keys() == rebuilt.keys()
+                for code in groups:
+                    np.testing.assert_array_equal(groups[code], rebuilt[code])
+    assert len(store.holders) == 6 and store.holders._dead < len(store.holders)
+    assert [h["Holder"] for h in store.whale_panel("BBB")["holders"]] == ["Vanguard Group Inc", "Fund 4"]
+    assert store.top_holders(5)["Positions"].tolist()[0] == 3
+    assert store.positions_of("fund 3").empty
+
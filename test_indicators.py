@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from quant_utils import FinancialAnalyzer
+
+
+def pandas_reference(close):
+    """The original per-Series pandas implementation from get_analysis."""
+    sma50 = close.rolling(window=50).mean()
+    sma200 = close.rolling(window=200).mean()
+    std = close.rolling(window=20).std()
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    return pd.DataFrame({
+        "SMA50": sma50,
+        "SMA200": sma200,
+        "BB_Upper": sma50 + std * 2,
+        "BB_Lower": sma50 - std * 2,
+        "RSI": 100 - (100 / (1 + rs)),
+    })
+
+
+def pandas_scan_signals(df):
+    """The original scan_signals rule chain."""
+    signals = []
+    if len(df) < 200: return signals
+    last_sma50, last_sma200 = df['SMA50'].iloc[-1], df['SMA200'].iloc[-1]
+    prev_sma50, prev_sma200 = df['SMA50'].iloc[-2], df['SMA200'].iloc[-2]
+    if prev_sma50 < prev_sma200 and last_sma50 > last_sma200:
+        signals.append("Golden Cross")
+    elif prev_sma50 > prev_sma200 and last_sma50 < last_sma200:
+        signals.append("Death Cross")
+    last_rsi = df['RSI'].iloc[-1]
+    if last_rsi > 70:
+        signals.append("Overbought (RSI)")
+    elif last_rsi < 30:
+        signals.append("Oversold (RSI)")
+    return signals
+
+
+@pytest.fixture
+def close_matrix():
+    rng = np.random.default_rng(7)
+    steps = rng.normal(0, 0.02, size=(600, 40))
+    prices = 100 * np.exp(np.cumsum(steps, axis=0))
+    # Mixed calendars and late listings: gaps and leading NaNs in some columns
+    prices[::7, 3] = np.nan
+    prices[:120, 5] = np.nan
+    prices[300:305, 9] = np.nan
+    # Flat stretch so RSI hits the 0/0 and x/0 edge cases
+    prices[100:130, 11] = prices[99, 11]
+    return prices
+
+
+def test_indicators_match_pandas(close_matrix):
+    ind = indicators.compute_indicators(close_matrix)
+    names = {"SMA50": "sma_fast", "SMA200": "sma_slow", "BB_Upper": "bb_upper", "BB_Lower": "bb_lower", "RSI": "rsi"}
+    for col in range(close_matrix.shape[1]):
+        ref = pandas_reference(pd.Series(close_matrix[:, col]))
+        for ref_name, key in names.items():
+            np.testing.assert_allclose(ind[key][:, col], ref[ref_name].to_numpy(), rtol=1e-9, atol=1e-8,
+                                       err_msg=f"{ref_name} column {col}")
+
+
+def test_float32_stays_close(close_matrix):
+    ind64 = indicators.compute_indicators(close_matrix)
+    ind32 = indicators.compute_indicators(close_matrix, dtype=np.float32)
+    assert ind32["sma_fast"].dtype == np.float32
+    np.testing.assert_allclose(ind32["sma_slow"], ind64["sma_slow"], rtol=1e-5)
+
+
+def test_scan_signals_match_pandas(close_matrix):
+    ind = indicators.compute_indicators(close_matrix)
+    # Walk the end of the history so crossovers and RSI extremes actually occur
+    fired = 0
+    for end in range(200, close_matrix.shape[0], 5):
+        for col in range(0, close_matrix.shape[1], 6):
+            ref = pandas_reference(pd.Series(close_matrix[:end, col]))
+            expected = pandas_scan_signals(ref)
+            got = [s["label"] for s in FinancialAnalyzer.scan_signals(ref)]
+            got_arrays = [s["label"] for s in FinancialAnalyzer.scan_signal_arrays(
+                ind["sma_fast"][:end, col], ind["sma_slow"][:end, col], ind["rsi"][:end, col])]
+            assert got == expected
+            assert got_arrays == expected
+            fired += bool(expected)
+    assert fired > 0
+
+
+def test_incremental_state_matches_batch(monkeypatch):
+    rng = np.random.default_rng(11)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, size=1500)))
+    ind = indicators.compute_indicators(close)
+    monkeypatch.setattr(indicators.IndicatorState, "RESYNC_EVERY", 97)  # exercise the drift resync path
+    state = indicators.IndicatorState()
+    for i, price in enumerate(close):
+        fired = [s["label"] for s in state.update(price)]
+        expected = [s["label"] for s in FinancialAnalyzer.scan_signal_arrays(
+            ind["sma_fast"][:i + 1, 0], ind["sma_slow"][:i + 1, 0], ind["rsi"][:i + 1, 0])]
+        assert fired == expected
+        for key in ("sma_fast", "sma_slow", "bb_upper", "bb_lower", "rsi"):
+            np.testing.assert_allclose(getattr(state, key), ind[key][i, 0], rtol=1e-9, atol=1e-8)
+
+        if i == 700:
+            # Round-trip through JSON mid-stream, as a restart would
+            state = indicators.IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
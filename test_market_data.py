@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+import market_data
+
+
+class ScriptedProvider(market_data.FixtureProvider):
+    """FixtureProvider that records upstream calls and can fail single-ticker fetches on demand."""
+
+    def __init__(self, frames):
+        super().__init__(frames=frames)
+        self.calls = []
+        self.failing = set()
+
+    def fetch(self, ticker, start, end=None, interval="1d"):
+        self.calls.append((ticker, pd.Timestamp(start), end))
+        if ticker.upper() in self.failing:
+            raise ConnectionError(f"{ticker} unavailable")
+        return super().fetch(ticker, start, end, interval)
+
+    def fetch_many(self, tickers, start, end=None, interval="1d"):
+        self.calls.append((tuple(tickers), pd.Timestamp(start), end))
+        return {t: market_data._slice(self._load(t, interval), start, end) for t in tickers}
+
+
+def bars_frame(dates, scale=1.0):
+    close = scale * (100 + np.arange(len(dates), dtype=float))
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000},
+                        index=pd.DatetimeIndex(dates, name="Date"))
+
+
+def test_failed_rebase_refetch_serves_that_tickers_cache(tmp_path):
+    dates = pd.bdate_range("2026-01-05", periods=30)
+    upstream = ScriptedProvider({"AAA": bars_frame(dates[:20]), "BBB": bars_frame(dates[:20])})
+    cache = market_data.CachedProvider(upstream, cache_dir=str(tmp_path), max_age=0)
+    cache.fetch_many(["AAA", "BBB"], dates[0])
+
+    # A split re-bases AAA's history, but the full re-download for AAA fails
+    upstream.frames["AAA"] = bars_frame(dates[:25], scale=0.5)
+    upstream.frames["BBB"] = bars_frame(dates[:25])
+    upstream.failing.add("AAA")
+    frames = cache.fetch_many(["AAA", "BBB"], dates[0])
+
+    assert len(frames["AAA"]) == 20 and frames["AAA"]["Close"].iloc[0] == 100.0
+    assert len(frames["BBB"]) == 25
+
+
+def cached_provider(tmp_path, frames, max_age=0):
+    upstream = ScriptedProvider(frames)
+    return market_data.CachedProvider(upstream, cache_dir=str(tmp_path), max_age=max_age), upstream
+
+
+def test_fresh_cache_is_served_from_disk(tmp_path):
+    dates = pd.bdate_range("2026-01-05", periods=20)
+    cache, upstream = cached_provider(tmp_path, {"AAA": bars_frame(dates)}, max_age=3600)
+    first = cache.fetch("AAA", dates[0])
+    upstream.frames["AAA"] = bars_frame(dates, scale=2.0)
+    upstream.calls.clear()
+
+    pd.testing.assert_frame_equal(cache.fetch("AAA", dates[5]), first.loc[dates[5]:], check_freq=False)
+    assert upstream.calls == []
+
+
+def test_stale_cache_fetches_only_the_tail(tmp_path):
+    dates = pd.bdate_range("2026-01-05", periods=25)
+    cache, upstream = cached_provider(tmp_path, {"AAA": bars_frame(dates[:20])})
+    cache.fetch("AAA", dates[0])
+    upstream.frames["AAA"] = bars_frame(dates)
+    upstream.calls.clear()
+
+    df = cache.fetch("AAA", dates[0])
+    # Re-requested from the last complete bar, then merged onto the cached history
+    assert upstream.calls == [("AAA", dates[18], None)]
+    pd.testing.assert_frame_equal(df, bars_frame(dates), check_freq=False)
+    assert len(cache._load("AAA")[0]) == 25
+
+
+def test_head_gap_fetches_only_the_older_history(tmp_path):
+    dates = pd.bdate_range("2026-01-05", periods=20)
+    cache, upstream = cached_provider(tmp_path, {"AAA": bars_frame(dates)}, max_age=3600)
+    cache.fetch("AAA", dates[10])
+    upstream.calls.clear()
+
+    df = cache.fetch("AAA", dates[0])
+    assert upstream.calls == [("AAA", dates[0], dates[10])]
+    pd.testing.assert_frame_equal(df, bars_frame(dates), check_freq=False)
+    assert cache._load("AAA")[1]["start"] == dates[0].isoformat()
+
+
+def test_split_rebase_replaces_the_cached_history(tmp_path):
+    dates = pd.bdate_range("2026-01-05", periods=25)
+    cache, upstream = cached_provider(tmp_path, {"AAA": bars_frame(dates[:20])})
+    cache.fetch("AAA", dates[0])
+    # A 2:1 split halves every past close, so the overlapping bar no longer matches
+    upstream.frames["AAA"] = bars_frame(dates, scale=0.5)
+    upstream.calls.clear()
+
+    df = cache.fetch("AAA", dates[0])
+    assert upstream.calls[-1] == ("AAA", dates[0], None)
+    pd.testing.assert_frame_equal(df, bars_frame(dates, scale=0.5), check_freq=False)
+
+    # The batched path re-bases the same way
+    upstream.frames["AAA"] = bars_frame(dates, scale=0.25)
+    df = cache.fetch_many(["AAA"], dates[0])["AAA"]
+    pd.testing.assert_frame_equal(df, bars_frame(dates, scale=0.25), check_freq=False)
+
+
+def test_stale_cache_is_served_when_upstream_fails(tmp_path):
+    dates = pd.bdate_range("2026-01-05", periods=25)
+    cache, upstream = cached_provider(tmp_path, {"AAA": bars_frame(dates[:20])})
+    cached = cache.fetch("AAA", dates[0])
+    upstream.frames["AAA"] = bars_frame(dates)
+    upstream.failing.add("AAA")
+
+    pd.testing.assert_frame_equal(cache.fetch("AAA", dates[5]), cached.loc[dates[5]:], check_freq=False)
+    # Nothing was overwritten, so the next successful fetch still merges incrementally
+    upstream.failing.clear()
+    assert len(cache.fetch("AAA", dates[0])) == 25
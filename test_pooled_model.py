@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecasting
+import market_data
+import pooled_model
+from quant_utils import FinancialAnalyzer
+
+
+def momentum_closes(n_tickers=20, n_bars=600, phi=0.3, seed=1):
+    """Closes whose daily log returns are AR(1) with coefficient phi (a signal the model must find)."""
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, 0.01, (n_bars, n_tickers))
+    returns = np.zeros_like(shocks)
+    for t in range(1, n_bars):
+        returns[t] = phi * returns[t - 1] + shocks[t]
+    dates = pd.bdate_range(end="2026-09-30", periods=n_bars)
+    return pd.DataFrame(50 * np.exp(np.cumsum(returns, axis=0)), index=dates,
+                        columns=[f"T{i}" for i in range(n_tickers)])
+
+
+@pytest.fixture
+def artifact(tmp_path, monkeypatch):
+    monkeypatch.setattr(pooled_model, "MODEL_PATH", str(tmp_path / "pooled"))
+    forecasting.clear_cache()
+    yield pooled_model.MODEL_PATH
+    forecasting.clear_cache()
+
+
+def test_features_and_targets_match_pandas():
+    close = pd.Series(momentum_closes(1, 200).iloc[:, 0].to_numpy())
+    logp = np.log(close)
+    X, Y = pooled_model.features(close.to_numpy()), pooled_model.targets(close.to_numpy(), horizon=5)
+    np.testing.assert_allclose(X[:, 0], logp.diff(1), equal_nan=True)
+    np.testing.assert_allclose(X[:, 6], logp.diff(60), equal_nan=True)
+    np.testing.assert_allclose(X[:, 7], logp.diff().rolling(20).std(ddof=0), equal_nan=True)
+    np.testing.assert_allclose(X[:, 8], logp - np.log(close.rolling(50).mean()), equal_nan=True)
+    np.testing.assert_allclose(Y[:, 4], logp.shift(-5) - logp, equal_nan=True)
+    assert np.isfinite(X[pooled_model.warmup():]).all() and not np.isfinite(X[:pooled_model.warmup()]).all()
+
+
+def test_training_finds_momentum_and_round_trips(artifact):
+    model = pooled_model.train(momentum_closes())
+    assert model.meta["tickers"] == 20 and model.weights.shape == (10, pooled_model.HORIZON)
+    assert model.meta["r2"][0] > 0.05
+    assert model.weights[0, 0] > 0.1  # next-bar return loads on the last bar's return
+
+    assert not pooled_model.available()
+    model.save()
+    loaded = pooled_model.load()
+    assert isinstance(loaded.weights, np.memmap)
+    np.testing.assert_allclose(loaded.weights, model.weights)
+    assert pooled_model.load() is loaded
+
+    time.sleep(0.01)
+    pooled_model.train(momentum_closes(seed=2)).save()
+    assert pooled_model.load() is not loaded
+
+
+def test_pooled_forecaster_is_the_default_once_trained(offline_engine, artifact):
+    assert forecasting.default_forecaster() == forecasting.DEFAULT_FORECASTER
+    pooled_model.train(pd.DataFrame(offline_engine["AAA"]["Close"])).save()
+    assert forecasting.default_forecaster() == "pooled" and forecasting.default_forecaster("5m") != "pooled"
+
+    close = offline_engine["BBB"]["Close"].to_numpy()
+    model = forecasting.get_forecaster("pooled").fit(close)
+    path = model.predict(np.arange(len(close), len(close) + 40))
+    assert path.shape == (40,) and np.isfinite(path).all()
+    np.testing.assert_allclose(model.predict([0, 10]), close[[0, 10]])
+    with pytest.raises(ValueError):
+        forecasting.get_forecaster("pooled").fit(close[:30])
+
+    summary, fig, *_ = FinancialAnalyzer.get_analysis("BBB", include_extras=False)
+    assert fig is not None and np.isfinite(fig.data["Forecast"]).all()
+    assert any(key[3] == "pooled" for key in forecasting._cache)
+
+
+def test_short_histories_fall_back_and_the_artifact_loads_lazily(offline_engine, artifact, monkeypatch):
+    pooled_model.train(pd.DataFrame(offline_engine["AAA"]["Close"])).save()
+    loads = []
+    real_load = pooled_model.load
+    monkeypatch.setattr(pooled_model, "load", lambda path=None: loads.append(path) or real_load(path))
+
+    assert forecasting.get_forecaster("pooled").model is None and loads == []
+    close = offline_engine["BBB"]["Close"].to_numpy()
+    first = forecasting.get_fitted("pooled", "BBB", close, 0, len(close))
+    assert isinstance(first, forecasting.PooledForecaster) and len(loads) == 1
+    # Cache hits never map the weights again
+    assert forecasting.get_fitted("pooled", "BBB", close, 0, len(close)) is first and len(loads) == 1
+
+    short = forecasting.get_fitted("pooled", "BBB", close[:30], 0, 30)
+    assert isinstance(short, forecasting.RandomForestForecaster)
+    assert np.isfinite(short.predict(np.arange(30, 40))).all()
+
+    market_data.get_provider().frames["NEW"] = offline_engine["CCC"].iloc[-30:]
+    summary, fig, *_ = FinancialAnalyzer.get_analysis("NEW", include_extras=False)
+    assert not summary.startswith("Error") and np.isfinite(fig.data["Forecast"]).all()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+import portfolio_risk
+
+
+def sample_returns(seed=0, days=750, assets=4):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, days)
+    rets = market[:, None] * rng.uniform(0.5, 1.5, assets) + rng.normal(0, 0.008, (days, assets))
+    return rets, market
+
+
+def test_vectorized_metrics_match_single_portfolio_math():
+    rets, market = sample_returns()
+    weights = portfolio_risk.random_portfolios(rets.shape[1], 5000, seed=1)
+    table = portfolio_risk.risk_metrics(rets, weights, benchmark=market)
+    assert len(table) == 5000
+
+    for p in (0, 1234, 4999):
+        r = rets @ weights[p]
+        row = table.iloc[p]
+        assert np.isclose(row["Ann. Volatility"], r.std(ddof=1) * np.sqrt(252))
+        assert np.isclose(row["Beta"], np.cov(r, market)[0, 1] / market.var(ddof=1))
+        tail = np.sort(r)[:int(0.05 * len(r))]
+        assert np.isclose(row["VaR (hist)"], -tail[-1])
+        assert np.isclose(row["CVaR (hist)"], -tail.mean())
+        wealth = np.cumprod(1 + r)
+        assert np.isclose(row["Max Drawdown"], (wealth / np.maximum.accumulate(wealth) - 1).min())
+        assert row["CVaR (param)"] > row["VaR (param)"] > 0
+
+    contrib = portfolio_risk.risk_contributions(rets, weights[:10])
+    np.testing.assert_allclose(contrib.sum(axis=1), 1.0)
+
+
+def test_comparison_risk_on_mixed_calendars():
+    rets, market = sample_returns(days=400, assets=3)
+    dates = pd.date_range("2025-01-01", periods=400, freq="D")
+    closes = pd.DataFrame(100 * np.cumprod(1 + rets, axis=0), index=dates, columns=["AAA", "BBB", "BTC-USD"])
+    closes.loc[closes.index.dayofweek >= 5, ["AAA", "BBB"]] = np.nan
+    spy = pd.Series(100 * np.cumprod(1 + market), index=dates).where(dates.dayofweek < 5)
+
+    risk = portfolio_risk.comparison_risk(closes, spy)
+    assert set(risk["assets"]) == {"AAA", "BBB", "BTC-USD"}
+    assert abs(sum(a["Risk Contribution"] for a in risk["assets"].values()) - 1) < 1e-9
+    assert all(np.isfinite(v) for v in risk["portfolio"].values())
+    assert "Portfolio Risk" in portfolio_risk.format_risk_markdown(risk)
+
+
+def test_mixed_calendars_align_on_trading_days():
+    rets, market = sample_returns(days=400, assets=3)
+    dates = pd.date_range("2025-01-01", periods=400, freq="D")
+    closes = pd.DataFrame(100 * np.cumprod(1 + rets, axis=0), index=dates, columns=["AAA", "BBB", "BTC-USD"])
+    crypto = closes["BTC-USD"].copy()
+    closes.loc[closes.index.dayofweek >= 5, ["AAA", "BBB"]] = np.nan
+    spy = pd.Series(100 * np.cumprod(1 + market), index=dates).where(dates.dayofweek < 5).dropna()
+
+    aligned = portfolio_risk.aligned_returns(closes)
+    assert (aligned.index.dayofweek < 5).all() and (aligned.to_numpy() != 0).all()
+    # The crypto weekend lands on Monday instead of the equities getting zero returns
+    monday = aligned.index[aligned.index.dayofweek == 0][0]
+    friday = monday - pd.Timedelta(days=3)
+    assert np.isclose(aligned.at[monday, "BTC-USD"], crypto[monday] / crypto[friday] - 1)
+
+    risk = portfolio_risk.comparison_risk(closes, spy)
+    assert risk["periods_per_year"] == 252 and risk["observations"] == len(aligned)
+    assert "trading days" in portfolio_risk.format_risk_markdown(risk)
+
+    # Crypto alone keeps its weekends (the benchmark is carried over them) and annualizes over 365 days
+    alone = portfolio_risk.comparison_risk(closes[["BTC-USD"]], spy)
+    assert alone["periods_per_year"] == 365 and alone["observations"] == 399
+    vol = crypto.pct_change().dropna().std(ddof=1) * np.sqrt(365)
+    assert np.isclose(alone["portfolio"]["Ann. Volatility"], vol)
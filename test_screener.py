@@ -0,0 +1,85 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+import screener
+
+TICKERS = [f"T{i:02d}" for i in range(10)]
+
+
+def ragged_closes(days=320, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days)
+    closes = pd.DataFrame(50 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, len(TICKERS))), axis=0)),
+                          index=dates, columns=TICKERS)
+    closes.iloc[:100, 1] = np.nan    # listed later, still over 200 bars
+    closes.iloc[-5:, 2] = np.nan     # halted for the last week
+    closes.iloc[:200, 3] = np.nan    # too short for the SMA 200 rules
+    closes.iloc[::7, 4] = np.nan     # holes inside the history
+    return closes
+
+
+@pytest.fixture
+def offline_prices(monkeypatch):
+    closes = ragged_closes()
+    frames = {t: pd.DataFrame({c: closes[t] for c in ("Open", "High", "Low", "Close")}).assign(Volume=1000).dropna()
+              for t in TICKERS}
+    monkeypatch.setattr(market_data, "_provider", market_data.FixtureProvider(frames=frames))
+    return closes
+
+
+def test_right_align_keeps_each_ticker_on_its_own_calendar():
+    closes = ragged_closes()
+    aligned, n_bars, last_dates = screener._right_align(closes)
+    for col, ticker in enumerate(TICKERS):
+        own = closes[ticker].dropna()
+        assert n_bars[col] == len(own) and pd.Timestamp(last_dates[col]) == own.index[-1]
+        np.testing.assert_array_equal(aligned[-len(own):, col], own.to_numpy())
+        assert np.isnan(aligned[:len(closes) - len(own), col]).all()
+
+
+def test_screen_matrix_matches_single_ticker_screens():
+    closes = ragged_closes()
+    table = screener.screen_matrix(closes, include_quiet=True).set_index("Ticker")
+    assert sorted(table.index) == TICKERS
+    for ticker in TICKERS:
+        own = closes[[ticker]].dropna()
+        alone = screener.screen_matrix(own, include_quiet=True).iloc[0]
+        row = table.loc[ticker]
+        assert row["Signals"] == alone["Signals"] and row["Score"] == alone["Score"]
+        assert np.isclose(row["RSI"], alone["RSI"]) and row["Close"] == own[ticker].iloc[-1]
+        assert row["Last Bar"] == own.index[-1]
+    # Under 200 bars nothing fires, whatever the RSI says
+    assert table.loc["T03", "Signals"] == []
+
+    ranked = screener.screen_matrix(closes)
+    assert (ranked["Score"] > 0).all()
+    assert list(ranked["Score"]) == sorted(ranked["Score"], reverse=True)
+
+
+class RecordingPool(ProcessPoolExecutor):
+    started = []
+
+    def __init__(self, max_workers=None, **kwargs):
+        RecordingPool.started.append(max_workers)
+        super().__init__(max_workers=max_workers, **kwargs)
+
+
+def test_large_universes_are_chunked_across_processes(offline_prices, monkeypatch):
+    expected = screener.screen_universe(TICKERS, include_quiet=True)
+    assert len(expected) == len(TICKERS)
+
+    RecordingPool.started = []
+    monkeypatch.setattr(screener, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(screener, "PROCESS_POOL_THRESHOLD", 4)
+    pooled = screener.screen_universe(TICKERS, include_quiet=True, chunk_size=3, processes=2)
+    assert RecordingPool.started == [2]
+    pd.testing.assert_frame_equal(pooled, expected)
+
+    # Chunks where nothing fires are dropped before the merge
+    fired = screener.screen_universe(TICKERS, chunk_size=3, processes=2)
+    assert set(fired["Ticker"]) == set(expected.loc[expected["Score"] > 0, "Ticker"])
+    assert screener.screen_universe(["NOPE1", "NOPE2"], processes=2).empty
@@ -0,0 +1,47 @@
+import pytest
+
+from sentiment import SentimentScorer, get_scorer
+
+
+@pytest.fixture
+def scorer():
+    return SentimentScorer()
+
+
+def test_whole_words_only(scorer):
+    # "up" inside "support" and "low" inside "follow" used to score as substrings
+    assert scorer.score("Analysts support the follow-on offering") == 0.0
+    assert scorer.score("Shares up after upgrade") == 1.0
+    assert scorer.score("Stock hits a new low") == -0.5
+
+
+def test_negation_flips_nearby_hits(scorer):
+    assert scorer.score("Results were not strong") == -0.5
+    assert scorer.score("Company didn't miss") == 0.5
+    # Outside the three-token window the hit keeps its sign
+    assert scorer.score("Not that anyone expected it to rise") == 0.5
+
+
+def test_negation_stops_at_clause_breaks(scorer):
+    assert scorer.score("Stock rose. Not bad, no, then fell sharply") == 0.0
+    assert scorer.score("No guidance; shares fell") == -0.5
+    assert scorer.score("Not weak: margins strong") == 1.0
+
+
+def test_phrases_take_precedence_over_words(scorer):
+    assert scorer.score("Apple beats estimates") == 0.75
+    assert scorer.score("Shares at an all-time high") == 0.75
+    assert scorer.score("Company missed estimates again") == -0.75
+    # A clause break splits a phrase into its single words
+    assert scorer.score("Company beat. Estimates unchanged") == 0.5
+
+
+def test_batch_scores_and_aggregate(scorer):
+    headlines = ["Stock surges on record profits", "Shares plunge after guidance cut", "CEO speaks at conference"]
+    scores, aggregate = scorer.score_batch(headlines)
+    assert scores == [1.0, -1.0, 0.0]
+    assert aggregate == 0.0
+    # Negation never leaks into the next headline
+    assert scorer.score_batch(["Nothing new, not", "Shares rise"])[0] == [0.0, 0.5]
+    assert scorer.score_batch([]) == ([], 0.0)
+    assert get_scorer() is get_scorer()
@@ -0,0 +1,32 @@
+import symbol_index
+from financial_engine import FinancialEngine
+
+
+def test_names_aliases_and_typos_resolve_in_order():
+    resolve = FinancialEngine.resolve_tickers
+    assert resolve("compare telsa and microsft") == ["TSLA", "MSFT"]
+    assert resolve("What about Bank of America and jp morgan?") == ["BAC", "JPM"]
+    assert resolve("coca-cola vs pepsi vs mcdonald's") == ["KO", "PEP", "MCD"]
+    assert resolve("BTC and nvidia") == ["BTC-USD", "NVDA"]
+    assert resolve("Analyze BRK-B") == ["BRK-B"]
+
+
+def test_conversational_words_do_not_resolve():
+    resolve = FinancialEngine.resolve_tickers
+    assert resolve("What is the price trend for next month") == []
+    # "Target" the company only when written as a name
+    assert resolve("price target raised for apple") == ["AAPL"]
+    assert resolve("Check Target stock") == ["TGT"]
+
+
+def test_deletion_index_matches_pairwise_distance():
+    rows = [(f"S{i}", name, []) for i, name in enumerate(["Accenture plc", "Adobe Inc.", "Snowflake Inc.", "Salesforce Inc."])]
+    index = symbol_index.SymbolIndex(rows)
+    for word in ["acenture", "accentrue", "snowflak", "salseforce", "adobe", "sales", "xyzzy"]:
+        expected = min(
+            (w for w in index.vocabulary
+             if symbol_index.osa_distance(word, w, symbol_index.max_distance(w)) <= symbol_index.max_distance(w)),
+            key=lambda w: (symbol_index.osa_distance(word, w, 2), index.vocabulary[w]),
+            default=None,
+        )
+        assert index.correct(word) == expected
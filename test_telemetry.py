@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import forecasting
+import telemetry
+from financial_engine import FinancialEngine
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+def test_spans_feed_trace_histogram_and_error_counter():
+    with telemetry.trace() as trace:
+        with telemetry.span("stage.ok"):
+            time.sleep(0.01)
+        with pytest.raises(ValueError):
+            with telemetry.span("stage.bad"):
+                raise ValueError("boom")
+        with telemetry.trace() as inner:
+            assert inner is trace
+
+    timings = trace.timings()
+    assert timings["stage.ok"] >= 0.01 and timings["total"] >= timings["stage.ok"]
+    assert [s[3] for s in trace.spans] == [False, True]
+
+    snapshot = telemetry.metrics()
+    stages = {h["labels"]["stage"]: h["count"] for h in snapshot["histograms"] if h["name"] == "stage_seconds"}
+    assert stages == {"stage.ok": 1, "stage.bad": 1}
+    assert snapshot["counters"] == [{"name": "stage_errors_total", "labels": {"stage": "stage.bad"}, "value": 1}]
+
+
+def test_prometheus_text_format():
+    telemetry.cache_event("forecast", "hits")
+    telemetry.observe("stage_seconds", 0.2, stage='quote"d')
+    text = telemetry.prometheus_text()
+    assert '# TYPE quant_cache_events_total counter' in text
+    assert 'quant_cache_events_total{cache="forecast",event="hits"} 1' in text
+    assert 'quant_stage_seconds_bucket{stage="quote\\"d",le="0.1"} 0' in text
+    assert 'quant_stage_seconds_bucket{stage="quote\\"d",le="0.25"} 1' in text
+    assert 'quant_stage_seconds_count{stage="quote\\"d"} 1' in text
+
+
+def test_analysis_result_carries_stage_timings(offline_engine):
+    forecasting.clear_cache()
+    result = FinancialEngine.run_analysis("Analyze AAA")
+    # Spans from the concurrent source workers land in the request's trace
+    for stage in ("engine.resolve", "analyzer.download", "analyzer.indicators", "analyzer.forecast", "total"):
+        assert stage in result.timings
+    assert result.to_dict(include_charts=False)["timings"]["total"] == result.timings["total"]
+
+    FinancialEngine.run_analysis("Analyze AAA")
+    events = {(c["labels"].get("cache"), c["labels"].get("event")): c["value"]
+              for c in telemetry.metrics()["counters"] if c["name"] == "cache_events_total"}
+    assert events[("forecast", "misses")] == 1 and events[("forecast", "hits")] == 1
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_profile_reports(mode):
+    with telemetry.profile(mode, interval=0.001) as prof:
+        busy_loop(0.05)
+    assert "busy_loop" in prof.report
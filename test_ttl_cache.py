@@ -0,0 +1,120 @@
+import threading
+
+import pandas as pd
+import pytest
+import yfinance
+
+import ttl_cache
+from quant_utils import FinancialAnalyzer
+
+
+class FakeTicker:
+    calls = 0
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        FakeTicker.calls += 1
+        return {"trailingPE": 25.0, "marketCap": 1e12}
+
+    @property
+    def institutional_holders(self):
+        FakeTicker.calls += 1
+        return pd.DataFrame({"Holder": [f"Fund of {self.ticker}"], "pctHeld": [0.05]})
+
+    @property
+    def insider_transactions(self):
+        FakeTicker.calls += 1
+        return None
+
+
+@pytest.fixture
+def fake_yf(monkeypatch, tmp_path):
+    FakeTicker.calls = 0
+    monkeypatch.setattr(yfinance, "Ticker", FakeTicker)
+    monkeypatch.setattr(ttl_cache, "_caches", {})
+    monkeypatch.setattr(ttl_cache, "TTL_CACHE_DIR", str(tmp_path))
+    return FakeTicker
+
+
+def test_warm_request_makes_no_network_calls(fake_yf):
+    cold = (FinancialAnalyzer.get_fundamentals("AAPL"), FinancialAnalyzer.fetch_whale_frames("AAPL"))
+    calls = fake_yf.calls
+    assert calls == 3
+
+    warm = (FinancialAnalyzer.get_fundamentals("AAPL"), FinancialAnalyzer.fetch_whale_frames("aapl"))
+    assert fake_yf.calls == calls
+    assert warm[0] == cold[0] and warm[1][0].equals(cold[1][0])
+    stats = ttl_cache.all_stats()
+    assert stats["fundamentals"]["hits"] == 1 and stats["whale"]["hits"] == 1
+
+    # A new process starts warm from the persisted files (written by the batched flush)
+    ttl_cache.flush_all()
+    ttl_cache._caches.clear()
+    FinancialAnalyzer.get_fundamentals("AAPL")
+    assert fake_yf.calls == calls
+
+
+def test_stale_value_is_served_while_refreshing():
+    now = [1000.0]
+    cache = ttl_cache.TTLCache(ttl=10, stale_ttl=100, clock=lambda: now[0])
+    refreshed = threading.Event()
+
+    def fetch_v2():
+        refreshed.set()
+        return "v2"
+
+    assert cache.get_or_fetch("k", lambda: "v1") == "v1"
+    now[0] += 50
+    assert cache.get_or_fetch("k", fetch_v2) == "v1"
+    assert refreshed.wait(2)
+    for _ in range(100):
+        if cache.stats()["refreshes"]:
+            break
+        threading.Event().wait(0.01)
+    assert cache.get_or_fetch("k", lambda: "v3") == "v2"
+    assert cache.stats()["stale"] == 1
+
+    # Past the stale window the fetch is inline; a failure falls back to the old value
+    now[0] += 1000
+    assert cache.get_or_fetch("k", lambda: 1 / 0) == "v2"
+    with pytest.raises(ZeroDivisionError):
+        cache.get_or_fetch("missing", lambda: 1 / 0)
+
+
+def test_lru_eviction():
+    cache = ttl_cache.TTLCache(ttl=60, max_entries=2)
+    for key in "abc":
+        cache.get_or_fetch(key, lambda key=key: key)
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+    assert cache.get_or_fetch("a", lambda: "refetched") == "refetched"
+
+
+def test_saves_are_batched(tmp_path, monkeypatch):
+    monkeypatch.setattr(ttl_cache, "SAVE_DELAY", 60)
+    saves = []
+    monkeypatch.setattr(ttl_cache.TTLCache, "save", lambda self: saves.append(self))
+    cache = ttl_cache.TTLCache(path=str(tmp_path / "bulk.pkl"))
+    for i in range(500):
+        cache.get_or_fetch(f"k{i}", lambda i=i: i)
+    assert saves == []
+    ttl_cache.flush_all()
+    ttl_cache.flush_all()
+    assert saves == [cache]
+
+
+def test_fetch_lock_outlives_the_fetch_until_the_value_is_published():
+    cache = ttl_cache.TTLCache()
+    published = []
+    original_set = cache.set
+
+    def checking_set(key, value):
+        # A caller arriving now must still queue on the lock instead of fetching again
+        published.append(key in cache._fetch_locks)
+        original_set(key, value)
+
+    cache.set = checking_set
+    assert cache.get_or_fetch("k", lambda: "v") == "v"
+    assert published == [True] and cache._fetch_locks == {}
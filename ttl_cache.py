@@ -0,0 +1,251 @@
+import os
+import time
+import pickle
+import threading
+import multiprocessing.util
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import telemetry
+
+# Seconds a value is fresh, per source (fundamentals move daily, holder filings quarterly)
+SOURCE_TTLS = {
+    "fundamentals": int(os.environ.get("QUANT_TTL_FUNDAMENTALS", 6 * 60 * 60)),
+    "whale": int(os.environ.get("QUANT_TTL_WHALE", 24 * 60 * 60)),
+}
+DEFAULT_TTL = 60 * 60
+# After its TTL a value may still be served for this many TTLs while a background refresh runs
+STALE_FACTOR = 7
+MAX_ENTRIES = 2048
+
+# On-disk persistence (one pickle per source); set QUANT_TTL_CACHE_DIR="" to keep caches in memory only
+TTL_CACHE_DIR = os.environ.get(
+    "QUANT_TTL_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ttl")
+)
+# Writes are batched: a changed cache is persisted at most once per SAVE_DELAY seconds, and at exit
+SAVE_DELAY = float(os.environ.get("QUANT_TTL_SAVE_DELAY", 2.0))
+
+_refresh_pool = None
+_refresh_pool_lock = threading.Lock()
+
+
+def _get_refresh_pool():
+    global _refresh_pool
+    with _refresh_pool_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ttl-refresh")
+        return _refresh_pool
+
+
+_dirty = set()
+_flush_timer = None
+_flush_lock = threading.Lock()
+_exit_hook_pid = None
+
+
+def _mark_dirty(cache):
+    """Schedules one deferred save for cache, however many entries change before it runs."""
+    global _flush_timer, _exit_hook_pid
+    with _flush_lock:
+        _dirty.add(cache)
+        if _exit_hook_pid != os.getpid():
+            # Runs at interpreter exit and also when a multiprocessing worker exits (atexit does not)
+            multiprocessing.util.Finalize(None, flush_all, exitpriority=10)
+            _exit_hook_pid = os.getpid()
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(SAVE_DELAY, flush_all)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def flush_all():
+    """Writes every cache changed since it was last saved."""
+    global _flush_timer
+    with _flush_lock:
+        caches = list(_dirty)
+        _dirty.clear()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+    for cache in caches:
+        cache.save()
+
+
+def _reset_refresh_pool():
+    # Forked children get the executor and timer objects without their threads; start fresh ones on demand
+    global _refresh_pool, _refresh_pool_lock, _flush_timer, _flush_lock
+    _refresh_pool = None
+    _refresh_pool_lock = threading.Lock()
+    _flush_timer = None
+    _flush_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_refresh_pool)
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire, with stale-while-revalidate.
+
+    get_or_fetch() returns a fresh value straight from memory. A value past its TTL but inside
+    the stale window is returned immediately while one background refresh replaces it. Anything
+    older (or missing) is fetched inline; concurrent callers for the same key share that fetch.
+    If a fetch fails, an expired value is served rather than nothing. Failures are never cached.
+    With a path, changes are written back in batches (see SAVE_DELAY and flush_all).
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES, stale_ttl=None, path=None, clock=time.time, name=None):
+        self.ttl = ttl
+        self.name = name
+        self.stale_ttl = ttl * STALE_FACTOR if stale_ttl is None else stale_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._refreshing = set()
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "errors": 0, "evictions": 0}
+        if path:
+            self.load()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+        if self.name:
+            telemetry.cache_event(self.name, name)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def get_or_fetch(self, key, fetch):
+        entry = self._lookup(key)
+        if entry is not None:
+            age = self.clock() - entry[0]
+            if age <= self.ttl:
+                self._count("hits")
+                return entry[1]
+            if age <= self.ttl + self.stale_ttl:
+                self._count("stale")
+                self._schedule_refresh(key, fetch)
+                return entry[1]
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            # Another caller may have filled it while we waited
+            fresh = self._lookup(key)
+            if fresh is not None and self.clock() - fresh[0] <= self.ttl:
+                self._count("hits")
+                return fresh[1]
+            self._count("misses")
+            try:
+                try:
+                    value = fetch()
+                except Exception:
+                    self._count("errors")
+                    if fresh is not None:
+                        return fresh[1]
+                    raise
+                # Published before the fetch lock goes, so late callers find the value, not a new fetch
+                self.set(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(key, None)
+
+    def _schedule_refresh(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        _get_refresh_pool().submit(self._refresh, key, fetch)
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch()
+        except Exception:
+            self._count("errors")
+        else:
+            self.set(key, value)
+            self._count("refreshes")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+        if self.path:
+            _mark_dirty(self)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "size": len(self._entries), "refreshing": len(self._refreshing)}
+
+    def save(self):
+        """Writes the entries atomically (unique temp file + rename)."""
+        with self._lock:
+            snapshot = list(self._entries.items())
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                pickle.dump(snapshot, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def load(self):
+        """Restores persisted entries; an unreadable file just means a cold cache."""
+        try:
+            with open(self.path, "rb") as fh:
+                snapshot = pickle.load(fh)
+        except Exception:
+            return
+        now = self.clock()
+        with self._lock:
+            for key, (stored_at, value) in snapshot[-self.max_entries:]:
+                if now - stored_at <= self.ttl + self.stale_ttl:
+                    self._entries[key] = (stored_at, value)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(source):
+    """Process-wide cache for one data source, using its SOURCE_TTLS entry and persistence file."""
+    with _caches_lock:
+        if source not in _caches:
+            path = os.path.join(TTL_CACHE_DIR, f"{source}.pkl") if TTL_CACHE_DIR else None
+            _caches[source] = TTLCache(ttl=SOURCE_TTLS.get(source, DEFAULT_TTL), path=path, name=source)
+        return _caches[source]
+
+
+def set_cache(source, cache):
+    """Replaces the cache for a source (tests, custom TTLs)."""
+    with _caches_lock:
+        _caches[source] = cache
+
+
+def all_stats():
+    """Hit/miss/stale counters for every cache created so far."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {source: cache.stats() for source, cache in caches.items()}